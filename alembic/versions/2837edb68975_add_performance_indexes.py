@@ -0,0 +1,70 @@
+"""add performance indexes
+
+Revision ID: 2837edb68975
+Revises: 25de9e4a8673
+Create Date: 2026-10-18 09:12:41.531207
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2837edb68975"
+down_revision: Union[str, None] = "25de9e4a8673"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name, table, columns, extra create_index kwargs
+indexes = [
+    # merchant package listing / export, filtered by merchant and often status
+    ("ix_package_merchant_id_status", "package", ["merchant_id", "status"], {}),
+    # get_sum_* and block listing, covering so the sums are index only scans
+    (
+        "ix_package_block_id",
+        "package",
+        ["block_id"],
+        {"postgresql_include": ["weight", "width", "length", "height"]},
+    ),
+    # package -> order join, order_id filter and order cascade delete
+    ("ix_package_order_id", "package", ["order_id"], {}),
+    ("ix_package_status", "package", ["status"], {}),
+    # merchant dashboard / my_orders, by merchant newest first
+    ("ix_order_merchant_id_date", "order", ["merchant_id", "date"], {}),
+    # date range filters and the global ORDER BY date
+    ("ix_order_date", "order", ["date"], {}),
+    (
+        "ix_packagehistory_package_id_timestamp",
+        "packagehistory",
+        ["package_id", "timestamp"],
+        {},
+    ),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction, but it doesn't lock writes
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in indexes:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+                **kwargs,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in reversed(indexes):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,75 @@
+"""add package search
+
+Revision ID: 4e8a1c6d2b70
+Revises: 9d4c2a7e5f13
+Create Date: 2026-10-18 18:05:27.130945
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4e8a1c6d2b70"
+down_revision: Union[str, None] = "9d4c2a7e5f13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+search_vector = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A')"
+    " || setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+    " || setweight(to_tsvector('simple', coalesce(street, '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # a stored generated column rewrites the table once, run it off-peak
+    op.add_column(
+        "package",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(search_vector, persisted=True),
+        ),
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_package_search_vector",
+            "package",
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_package_phone_trgm",
+            "package",
+            ["phone"],
+            postgresql_using="gin",
+            postgresql_ops={"phone": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_package_phone_trgm",
+            table_name="package",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_package_search_vector",
+            table_name="package",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("package", "search_vector")
@@ -0,0 +1,56 @@
+"""add import jobs
+
+Revision ID: 6b1f0e3c9a42
+Revises: 2837edb68975
+Create Date: 2026-10-18 14:03:27.118402
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6b1f0e3c9a42"
+down_revision: Union[str, None] = "2837edb68975"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "importjob",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("merchant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("order_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("file_path", sa.String(), nullable=False),
+        sa.Column("batch_size", sa.Integer(), nullable=False),
+        sa.Column("skip_invalid", sa.Boolean(), nullable=False),
+        sa.Column("rows_processed", sa.Integer(), nullable=False),
+        sa.Column("rows_rejected", sa.Integer(), nullable=False),
+        sa.Column("result", postgresql.JSONB(), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["merchant_id"], ["merchant.account_id"]),
+        sa.ForeignKeyConstraint(["order_id"], ["order.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_importjob_merchant_id_created_at",
+        "importjob",
+        ["merchant_id", "created_at"],
+    )
+    op.create_index("ix_importjob_status", "importjob", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_importjob_status", table_name="importjob")
+    op.drop_index("ix_importjob_merchant_id_created_at", table_name="importjob")
+    op.drop_table("importjob")
@@ -0,0 +1,59 @@
+"""add merchant daily stats
+
+Revision ID: 9d4c2a7e5f13
+Revises: 6b1f0e3c9a42
+Create Date: 2026-10-18 16:41:09.552817
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from schemas.merchant_daily_stats import MERCHANT_DAILY_STATS_TRIGGERS
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9d4c2a7e5f13"
+down_revision: Union[str, None] = "6b1f0e3c9a42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+backfill = """
+INSERT INTO merchantdailystats (merchant_id, date, count, shipping, cod)
+SELECT o.merchant_id, o.date::date, count(*),
+       coalesce(sum(p.shipping_cost), 0), coalesce(sum(p.cod_cost), 0)
+FROM package p JOIN "order" o ON o.id = p.order_id
+GROUP BY 1, 2
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "merchantdailystats",
+        sa.Column("merchant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("shipping", sa.Float(), nullable=False),
+        sa.Column("cod", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["merchant_id"], ["merchant.account_id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("merchant_id", "date"),
+    )
+    # block package writes until the triggers are in place so nothing is missed
+    op.execute('LOCK TABLE package, "order" IN SHARE ROW EXCLUSIVE MODE')
+    op.execute(MERCHANT_DAILY_STATS_TRIGGERS)
+    op.execute(backfill)
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER merchantdailystats_order_update ON "order"')
+    op.execute("DROP TRIGGER merchantdailystats_package_delete ON package")
+    op.execute("DROP TRIGGER merchantdailystats_package_update ON package")
+    op.execute("DROP TRIGGER merchantdailystats_package_insert ON package")
+    op.execute("DROP FUNCTION merchantdailystats_order_change()")
+    op.execute("DROP FUNCTION merchantdailystats_package_change()")
+    op.drop_table("merchantdailystats")
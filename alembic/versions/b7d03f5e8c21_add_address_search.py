@@ -0,0 +1,57 @@
+"""add address search
+
+Revision ID: b7d03f5e8c21
+Revises: 4e8a1c6d2b70
+Create Date: 2026-10-18 19:22:48.604117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7d03f5e8c21"
+down_revision: Union[str, None] = "4e8a1c6d2b70"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# lower case, Vietnamese diacritics folded to plain letters
+accented = "àáạảãâầấậẩẫăằắặẳẵèéẹẻẽêềếệểễìíịỉĩòóọỏõôồốộổỗơờớợởỡùúụủũưừứựửữỳýỵỷỹđÀÁẠẢÃÂẦẤẬẨẪĂẰẮẶẲẴÈÉẸẺẼÊỀẾỆỂỄÌÍỊỈĨÒÓỌỎÕÔỒỐỘỔỖƠỜỚỢỞỠÙÚỤỦŨƯỪỨỰỬỮỲÝỴỶỸĐ"
+plain = "aaaaaaaaaaaaaaaaaeeeeeeeeeeeiiiiiooooooooooooooooouuuuuuuuuuuyyyyydaaaaaaaaaaaaaaaaaeeeeeeeeeeeiiiiiooooooooooooooooouuuuuuuuuuuyyyyyd"
+search_text = (
+    "translate(lower(coalesce(province, '') || ' ' || coalesce(district, '')"
+    f" || ' ' || coalesce(commune, '')), '{accented}', '{plain}')"
+)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column(
+        "address",
+        sa.Column("search_text", sa.String(), sa.Computed(search_text, persisted=True)),
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_address_search_text_trgm",
+            "address",
+            ["search_text"],
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_address_search_text_trgm",
+            table_name="address",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("address", "search_text")
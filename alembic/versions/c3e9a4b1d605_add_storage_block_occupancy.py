@@ -0,0 +1,59 @@
+"""add storage block occupancy
+
+Revision ID: c3e9a4b1d605
+Revises: b7d03f5e8c21
+Create Date: 2026-10-18 20:14:55.902371
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from schemas.storage_block import STORAGE_BLOCK_OCCUPANCY_TRIGGERS
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c3e9a4b1d605"
+down_revision: Union[str, None] = "b7d03f5e8c21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+backfill = """
+UPDATE storageblock b SET
+    current_weight = u.weight, current_size = u.size, current_count = u.count
+FROM (
+    SELECT block_id, coalesce(sum(weight), 0) AS weight,
+           coalesce(sum(width * length * height), 0) AS size, count(*) AS count
+    FROM package WHERE block_id IS NOT NULL GROUP BY block_id
+) u
+WHERE b.id = u.block_id
+"""
+
+
+def upgrade() -> None:
+    for column, type_ in [
+        ("current_weight", sa.Float()),
+        ("current_size", sa.Float()),
+        ("current_count", sa.Integer()),
+    ]:
+        op.add_column(
+            "storageblock",
+            sa.Column(column, type_, nullable=False, server_default="0"),
+        )
+    # the backfill and the triggers must see the same packages, or some would
+    # be counted twice or not at all
+    op.execute("LOCK TABLE package IN SHARE ROW EXCLUSIVE MODE")
+    op.execute(STORAGE_BLOCK_OCCUPANCY_TRIGGERS)
+    op.execute(backfill)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER storageblock_occupancy_delete ON package")
+    op.execute("DROP TRIGGER storageblock_occupancy_update ON package")
+    op.execute("DROP TRIGGER storageblock_occupancy_insert ON package")
+    op.execute("DROP FUNCTION storageblock_occupancy_change()")
+    op.drop_column("storageblock", "current_count")
+    op.drop_column("storageblock", "current_size")
+    op.drop_column("storageblock", "current_weight")
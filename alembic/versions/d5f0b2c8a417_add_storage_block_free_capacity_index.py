@@ -0,0 +1,44 @@
+"""add storage block free capacity index
+
+Revision ID: d5f0b2c8a417
+Revises: c3e9a4b1d605
+Create Date: 2026-10-18 21:02:41.518230
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d5f0b2c8a417"
+down_revision: Union[str, None] = "c3e9a4b1d605"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_storageblock_free_capacity",
+            "storageblock",
+            [
+                sa.text("(max_weight - current_weight) DESC"),
+                sa.text("(max_size - current_size) DESC"),
+                sa.text("(max_package - current_count) DESC"),
+            ],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_storageblock_free_capacity",
+            table_name="storageblock",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,31 @@
+"""add import job claim token
+
+Revision ID: e1a7c4d9b352
+Revises: d5f0b2c8a417
+Create Date: 2026-10-19 10:12:06.734519
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e1a7c4d9b352"
+down_revision: Union[str, None] = "d5f0b2c8a417"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "importjob",
+        sa.Column("claim_token", postgresql.UUID(as_uuid=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("importjob", "claim_token")
@@ -1,7 +1,10 @@
+import random
+
 import pytest
 from seedings import global_setup, global_teardown
 from fastapi.testclient import TestClient
 from main import app
+from utils.jwt import create_access_token_dict
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -18,3 +21,20 @@ def global_setup_teardown():
 @pytest.fixture
 def client():
     return TestClient(app)
+
+
+def bearer_headers(account_id) -> dict:
+    token = create_access_token_dict({"user_id": account_id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def staff_headers(client):
+    staff = random.choice(client.get("/api/v1/staff").json())
+    return bearer_headers(staff["account_id"])
+
+
+@pytest.fixture
+def merchant_headers(client):
+    merchant = random.choice(client.get("/api/v1/merchant").json())
+    return bearer_headers(merchant["account_id"])
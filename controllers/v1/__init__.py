@@ -10,6 +10,7 @@ from controllers.v1 import (
     staff,
     storage_block,
     google_auth,
+    internal,
 )
 
 router = APIRouter(
@@ -27,3 +28,4 @@ router.include_router(package.router)
 router.include_router(order.router)
 router.include_router(package_rate.router)
 router.include_router(google_auth.router)
+router.include_router(internal.router)
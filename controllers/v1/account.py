@@ -32,7 +32,7 @@ router = APIRouter(
 
 @router.get("/")
 async def get_account(account_repo: AccountRepoDep):
-    return account_repo.get_all()
+    return await account_repo.get_all()
 
 
 @router.get("/me")
@@ -63,12 +63,12 @@ async def login_user(
     account_repo: AccountRepoDep,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ):
-    return account_repo.login(form_data)
+    return await account_repo.login(form_data)
 
 
 @router.post("/")
 async def create_account(account: AccountCreate, account_repo: AccountRepoDep):
-    return account_repo.create(account)
+    return await account_repo.create(account)
 
 
 @router.patch("/{id}")
@@ -83,7 +83,7 @@ async def patch_account(
             status_code=400, detail="You are not authorized to modify this resource"
         )
 
-    updated = account_repo.update(id, account)
+    updated = await account_repo.update(id, account)
     return Account(**updated.__dict__)
 
 
@@ -99,7 +99,7 @@ async def patch_account_admin(
             status_code=400, detail="You are not authorized to modify this resource"
         )
 
-    updated = account_repo.update(id, account)
+    updated = await account_repo.update(id, account)
     return Account(**updated.__dict__)
 
 
@@ -112,14 +112,14 @@ async def delete_account(
             status_code=400, detail="You are not authorized to modify this resource"
         )
 
-    deleted = account_repo.delete(id)
+    deleted = await account_repo.delete(id)
     return Account(**deleted.__dict__)
 
 
 @router.get("/{id}")
 async def get_account_by_id(id: UUID, account_repo: AccountRepoDep) -> AccountWithType:
-    account = account_repo.get_by_id(id)
-    account_type = account_repo.get_user_id_type(id)
+    account = await account_repo.get_by_id(id)
+    account_type = await account_repo.get_user_id_type(id)
     if not account or not account_type:
         raise HTTPException(status_code=404, detail="Account not found")
 
@@ -129,4 +129,4 @@ async def get_account_by_id(id: UUID, account_repo: AccountRepoDep) -> AccountWi
 
 @router.get("/detail/{id}")
 async def get_accounts_detail(id: UUID, account_repo: AccountRepoDep):
-    return account_repo.get_by_id_detail(id)
+    return await account_repo.get_by_id_detail(id)
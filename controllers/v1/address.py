@@ -2,10 +2,11 @@ from typing import Annotated
 from uuid import UUID
 
 from fastapi import APIRouter, HTTPException
-from fastapi.params import Body
+from fastapi.params import Body, Query
 
 from dependencies import AddressRepoDep
 from models.address import AddressCreate, AddressUpdate
+from utils.search import fold_accents
 
 router = APIRouter(
     prefix="/address",
@@ -15,20 +16,22 @@ router = APIRouter(
 
 @router.get("/")
 async def get_address(address_repo: AddressRepoDep):
-    return address_repo.get_all()
+    return await address_repo.get_all()
 
 
 @router.get("/search")
-async def search_address(q: str, address_repo: AddressRepoDep):
-    if not q:
-        return address_repo.get_all()
-
-    terms = [term.strip().lower() for term in q.split() if term.strip()]
+async def search_address(
+    q: str,
+    address_repo: AddressRepoDep,
+    limit: int | None = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+):
+    terms = [fold_accents(term) for term in q.split()]
 
-    if not terms:
-        return address_repo.get_all()
+    if not terms and limit is None and offset == 0:
+        return await address_repo.get_all()
 
-    results = address_repo.search(terms)
+    results = await address_repo.search(terms, limit=limit, offset=offset)
 
     return [
         {
@@ -39,7 +42,9 @@ async def search_address(q: str, address_repo: AddressRepoDep):
             "matched_fields": [
                 field
                 for field in ["province", "district", "commune"]
-                if any(term in getattr(row, field).lower() for term in terms)
+                if any(
+                    term in fold_accents(getattr(row, field) or "") for term in terms
+                )
             ],
         }
         for row in results
@@ -48,7 +53,7 @@ async def search_address(q: str, address_repo: AddressRepoDep):
 
 @router.get("/{id}")
 async def get_address_by_id(id: UUID, address_repo: AddressRepoDep):
-    return address_repo.get_by_id(id)
+    return await address_repo.get_by_id(id)
 
 
 @router.post("/")
@@ -56,12 +61,12 @@ async def create_address(
     address: Annotated[AddressCreate, Body],
     address_repo: AddressRepoDep,
 ):
-    return address_repo.create(address)
+    return await address_repo.create(address)
 
 
 @router.delete("/{id}")
 async def delete_address(id: UUID, address_repo: AddressRepoDep):
-    return address_repo.delete(id)
+    return await address_repo.delete(id)
 
 
 @router.patch("/{id}")
@@ -71,6 +76,6 @@ async def patch_address(
     address_repo: AddressRepoDep,
 ):
     try:
-        return address_repo.update(id, updated)
+        return await address_repo.update(id, updated)
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
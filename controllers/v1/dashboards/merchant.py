@@ -26,6 +26,6 @@ async def package_per_day(
                 detail="You must me a merchant to view this, for staff, please use other route",
             )
 
-        return package_repo.query_package_days_ago(user.id, days_ago)
+        return await package_repo.query_package_days_ago(user.id, days_ago)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
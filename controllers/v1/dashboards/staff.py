@@ -12,6 +12,7 @@ from dependencies import (
     LoggedInDep,
     OrderRepoDep,
 )
+from repositories.pagination import CountStrategy
 
 router = APIRouter(
     prefix="/dashboard",
@@ -26,6 +27,7 @@ async def get_overview(
     order_repo: OrderRepoDep,
     start_date: datetime,
     end_date: datetime,
+    top: int = Query(5, ge=1, le=50, description="How many top merchants"),
 ):
     try:
         user = current_user
@@ -35,13 +37,46 @@ async def get_overview(
                 detail="You must me a staff member to view this",
             )
 
-        recent_packages = package_repo.query_packages(
-            min_date=start_date, max_date=end_date, limit=10000
+        summary = await package_repo.staff_overview(
+            start_date=start_date, end_date=end_date, top=top
+        )
+        orders = await order_repo.query_order_range(
+            start_date=start_date, end_date=end_date
         )
-        orders = order_repo.query_order_range(start_date=start_date, end_date=end_date)
 
-        return {"recent_packages": recent_packages, "orders": orders}
-        # return package_repo.query_package_days_ago(user.id, days_ago)
+        return {"summary": summary, "orders": orders}
+    except HTTPException:
+        raise
     except Exception as e:
         print(e)
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/recent_packages")
+async def get_recent_packages(
+    current_user: LoggedInDep,
+    package_repo: PackageRepoDep,
+    start_date: datetime,
+    end_date: datetime,
+    offset: int = Query(1, ge=1, description="Page number"),
+    limit: int = Query(10, ge=1, le=50, description="Items per page"),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    count: CountStrategy = Query("exact", description="How the total is counted"),
+):
+    if current_user.type != "STAFF":
+        raise HTTPException(
+            status_code=401,
+            detail="You must me a staff member to view this",
+        )
+
+    try:
+        return await package_repo.query_packages_paginated(
+            min_date=start_date,
+            max_date=end_date,
+            page=offset,
+            page_size=limit,
+            cursor=cursor,
+            count=count,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -58,21 +58,21 @@ async def google_auth(token: GoogleToken, account_repo: AccountRepoDep):
 
     user: AccountSchema | None = None
     try:
-        user = account_repo.get_by_google_id(user_info["sub"])
+        user = await account_repo.get_by_google_id(user_info["sub"])
     except:
         user = None
 
     if not user:
         # check if email exists but without Google auth
         try:
-            user = account_repo.get_by_email(user_info["email"])
+            user = await account_repo.get_by_email(user_info["email"])
         except:
             user = None
         print(user)
         if user:
             # link Google ID to existing account
             account_update = AccountUpdate(google_id=user_info["sub"])
-            account_repo.update(user.id, account_update)
+            await account_repo.update(user.id, account_update)
         else:
             raise HTTPException(
                 status_code=401,
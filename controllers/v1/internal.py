@@ -0,0 +1,33 @@
+from fastapi import APIRouter
+
+from connection import (
+    engine,
+    async_engine,
+    db_mode,
+    replicas,
+    async_replicas,
+)
+from dependencies import StaffDep
+from utils.pool import pool_status
+
+router = APIRouter(
+    prefix="/_internal",
+    tags=["internal"],
+)
+
+
+@router.get("/pool")
+async def get_pool_status(staff: StaffDep):
+    return {
+        "mode": db_mode,
+        "sync": pool_status(engine.pool),
+        "async": pool_status(async_engine.sync_engine.pool),
+        "replicas": [
+            {**replica, "pool": pool_status(e.pool)}
+            for replica, e in zip(replicas.status(), replicas.engines)
+        ],
+        "async_replicas": [
+            {**replica, "pool": pool_status(e.pool)}
+            for replica, e in zip(async_replicas.status(), async_replicas.engines)
+        ],
+    }
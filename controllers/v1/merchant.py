@@ -22,7 +22,7 @@ router.include_router(dashboard.router)
 
 @router.get("/")
 async def get_merchants(merchant_repo: MerchantRepoDep):
-    return merchant_repo.get_all()
+    return await merchant_repo.get_all()
 
 
 @router.post("/register")
@@ -32,13 +32,13 @@ async def register_merchant(
     merchant_repo: MerchantRepoDep,
     account_repo: AccountRepoDep,
 ) -> MerchantDetails:
-    account = account_repo.create(account_create)
+    account = await account_repo.create(account_create)
     account_model = Account(**account.__dict__)
     merchant_model = MerchantCreate(
         **merchant_create.model_dump(),
         account_id=account.id,
     )
-    merchant = merchant_repo.create(merchant_model)
+    merchant = await merchant_repo.create(merchant_model)
 
     return MerchantDetails(account=account_model, **merchant_model.model_dump())
 
@@ -50,8 +50,8 @@ async def get_merchant_by_id(
     account_repo: AccountRepoDep,
     is_detailed: bool = False,
 ):
-    merchant = merchant_repo.get_by_id(id)
-    account = account_repo.get_by_id(id)
+    merchant = await merchant_repo.get_by_id(id)
+    account = await account_repo.get_by_id(id)
 
     merchant_model = Merchant(**merchant.__dict__)
     if is_detailed:
@@ -73,10 +73,10 @@ async def update_merchant(
     if merchant is None or account is None:
         raise HTTPException(status_code=404, detail="Merchant not found")
 
-    account_model = account_repo.update(id, account_updated)
-    merchant_model = merchant_repo.update(id, merchant_updated)
+    account_model = await account_repo.update(id, account_updated)
+    merchant_model = await merchant_repo.update(id, merchant_updated)
 
-    account_repo.refresh(account_model)
+    await account_repo.refresh(account_model)
     return MerchantDetails(
         **merchant_model.__dict__, account=Account(**account_model.__dict__)
     )
@@ -92,7 +92,7 @@ async def update_merchant_separate(
     if merchant is None:
         raise HTTPException(status_code=404, detail="Merchant not found")
 
-    return merchant_repo.update(id, merchant_updated)
+    return await merchant_repo.update(id, merchant_updated)
 
 
 @router.delete("/{id}")
@@ -101,10 +101,10 @@ async def delete_merchant(
     merchant_repo: MerchantRepoDep,
     account_repo: AccountRepoDep,
 ):
-    account = account_repo.get_by_id(id)
-    merchant = merchant_repo.get_by_id(id)
+    account = await account_repo.get_by_id(id)
+    merchant = await merchant_repo.get_by_id(id)
 
-    merchant_repo.delete(id)
-    account_repo.delete(id)
+    await merchant_repo.delete(id)
+    await account_repo.delete(id)
 
     return MerchantDetails(**merchant.__dict__, account=Account(**account.__dict__))
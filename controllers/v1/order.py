@@ -6,6 +6,7 @@ from fastapi.params import Query
 
 from dependencies import OrderRepoDep, LoggedInDep
 from models.order import OrderCreate, OrderUpdate
+from repositories.pagination import CountStrategy
 
 router = APIRouter(
     prefix="/order",
@@ -18,8 +19,9 @@ async def get_order(
     order_repo: OrderRepoDep,
     page: int | None = Query(1, ge=1),
     limit: int | None = Query(10, ge=1, le=100),
+    count: CountStrategy = Query("exact", description="How the total is counted"),
 ):
-    return order_repo.get_all_paginated(page=page, page_size=limit)
+    return await order_repo.get_all_paginated(page=page, page_size=limit, count=count)
 
 
 @router.get("/my_orders")
@@ -28,9 +30,10 @@ async def get_orders_by_merchant(
     order_repo: OrderRepoDep,
     page: Annotated[int, Query(gt=0)] = 1,
     limit: Annotated[int, Query(gt=0, le=100)] = 10,
+    count: CountStrategy = Query("exact", description="How the total is counted"),
 ):
-    paginated = order_repo.get_by_merchant_id_paginated(
-        user.id, page=page, page_size=limit
+    paginated = await order_repo.get_by_merchant_id_paginated(
+        user.id, page=page, page_size=limit, count=count
     )
     return paginated
 
@@ -41,7 +44,7 @@ async def create_order(
     order_repo: OrderRepoDep,
 ):
     try:
-        res = order_repo.create(order)
+        res = await order_repo.create(order)
         return res
     except ValueError as e:
         print(e)
@@ -53,7 +56,7 @@ async def create_order(
 
 @router.get("/{id}")
 async def get_orders_by_id(id: UUID, order_repo: OrderRepoDep):
-    order = order_repo.get_by_id(id)
+    order = await order_repo.get_by_id(id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
@@ -62,7 +65,7 @@ async def get_orders_by_id(id: UUID, order_repo: OrderRepoDep):
 
 @router.delete("/{id}")
 async def delete_order(id: UUID, order_repo: OrderRepoDep):
-    return order_repo.delete_with_cascade(id)
+    return await order_repo.delete_with_cascade(id)
 
 
 @router.patch("/{id}")
@@ -72,6 +75,6 @@ async def patch_order(
     order_repo: OrderRepoDep,
 ):
     try:
-        return order_repo.update(id, updated)
+        return await order_repo.update(id, updated)
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
@@ -1,21 +1,39 @@
-import csv
-import io
 from datetime import datetime
-from uuid import UUID
-from io import BytesIO
-import pandas as pd
+from typing import Literal
+from uuid import UUID, uuid4
+import os
+import tempfile
 from fastapi import APIRouter, HTTPException, Query, Body, UploadFile, File
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
 from dependencies import (
     PackageRepoDep,
     LoggedInDep,
     OrderRepoDep,
     MerchantRepoDep,
     PackageHistoryRepoDep,
+    ImportJobRepoDep,
+    StaffDep,
 )
-from models.order import OrderCreate
-from models.package import PackageCreate, PackageUpdate, Package, PackageCreateNoOrder
+from models.import_job import ImportJobCreate, ImportJobStatus
+from models.order import Order, OrderCreate
+from models.package import (
+    PackageCreate,
+    PackageUpdate,
+    Package,
+    PackageCreateNoOrder,
+    PackageQuoteRequest,
+    PackageQuoteResponse,
+    PackageMove,
+    PackageMoveResult,
+)
+from repositories.pagination import CountStrategy
 import controllers.v1.package_history as package_history
+from connection import engine, replicas
+from utils.export import copy_query
+from utils.import_jobs import save_upload, submit_import_job
+from utils.package_csv import open_package_csv, read_package_rows
 
 router = APIRouter(
     prefix="/package",
@@ -29,13 +47,43 @@ router.include_router(package_history.router)
 async def get_packages(
     package_repo: PackageRepoDep,
 ):
-    return package_repo.get_all()
+    return await package_repo.get_all()
 
 
 @router.post("/")
 async def create_package(package_create: PackageCreate, package_repo: PackageRepoDep):
     try:
-        return package_repo.create(package_create)
+        return await package_repo.create(package_create)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/quote", response_model=PackageQuoteResponse)
+async def quote_packages(
+    quote: PackageQuoteRequest, package_repo: PackageRepoDep, user: LoggedInDep
+):
+    try:
+        packages = await package_repo.quote(quote.packages)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return PackageQuoteResponse(
+        packages=packages, total=sum(package["total"] for package in packages)
+    )
+
+
+@router.post("/move", response_model=PackageMoveResult)
+async def move_packages(
+    move: PackageMove, package_repo: PackageRepoDep, staff: StaffDep
+):
+    try:
+        return await package_repo.move_to_block(
+            move.block_id,
+            package_ids=move.package_ids,
+            from_block_ids=move.from_block_ids,
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -52,7 +100,7 @@ async def create_single_merchant_packages(
     merchant_repo: MerchantRepoDep,
 ):
     try:
-        merchant = merchant_repo.get_by_id(user.id)
+        merchant = await merchant_repo.get_by_id(user.id)
 
         if not merchant:
             raise HTTPException(status_code=400, detail="You must be a merchant")
@@ -62,12 +110,12 @@ async def create_single_merchant_packages(
             date=datetime.now(),
             details=f"Order auto-created at {datetime.now()}",
         )
-        order = order_repo.create(order_create)
+        order = await order_repo.create(order_create)
 
         package_create.merchant_id = user.id
         package_create.order_id = order.id
         package = PackageCreate(**package_create.model_dump())
-        return package_repo.create(package)
+        return await package_repo.create(package)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -79,67 +127,103 @@ async def create_single_merchant_packages(
 async def create_bulk_merchant_packages(
     user: LoggedInDep,
     package_repo: PackageRepoDep,
-    order_repo: OrderRepoDep,
     merchant_repo: MerchantRepoDep,
+    import_job_repo: ImportJobRepoDep,
     file: UploadFile = File(...),
+    batch_size: int = Query(1000, ge=1, le=10000),
+    skip_invalid: bool = Query(
+        False, description="Leave out bad rows instead of rejecting the upload"
+    ),
+    background: bool = Query(
+        False, description="Return a job id right away and import in the background"
+    ),
 ):
-    try:
-        merchant = merchant_repo.get_by_id(user.id)
-        if not merchant:
-            raise HTTPException(status_code=400, detail="You must be a merchant")
+    merchant = await merchant_repo.get_by_id(user.id)
+    if not merchant:
+        raise HTTPException(status_code=400, detail="You must be a merchant")
+
+    if background:
+        return await create_bulk_import_job(
+            user, import_job_repo, file, batch_size, skip_invalid
+        )
 
-        # Read and decode CSV file
-        content = await file.read()
-        decoded_content = content.decode("utf-8")
-        csv_reader = csv.DictReader(io.StringIO(decoded_content))
+    try:
+        # the upload is spooled to disk, rows are decoded and parsed as they are read
+        reader = open_package_csv(file.file)
 
-        packages = []
-        order_create = OrderCreate(
+        # created with the packages, a rejected upload leaves no empty order
+        order = Order(
+            id=uuid4(),
             merchant_id=merchant.account_id,
             date=datetime.now(),
             details=f"Bulk order auto-created at {datetime.now()}",
         )
-        order = order_repo.create(order_create)
-
-        for row in csv_reader:
-            try:
-                package_data = PackageCreate(
-                    merchant_id=user.id,
-                    order_id=order.id,
-                    description=row["description"],
-                    address_id=row["address_id"],
-                    name=row["name"],
-                    phone=row["phone"],
-                    street=row["street"],
-                    width=float(row["width"]),
-                    height=float(row["height"]),
-                    length=float(row["length"]),
-                    weight=float(row["weight"]),
-                    is_fragile=bool(row["is_fragile"]),
-                    is_urgent=bool(row["is_urgent"]),
-                    status=row.get("status", "ORDERED"),
-                    package_rate_id=row["package_rate_id"],
-                )
-                packages.append(package_data)
-            except KeyError as e:
-                print(e)
-                raise HTTPException(status_code=400, detail=f"Missing column: {str(e)}")
-            except ValueError as e:
-                print(e)
-                raise HTTPException(status_code=400, detail=f"Invalid value: {str(e)}")
-
-        created_packages = package_repo.bulk_create(packages)
-
-        return {
-            "message": "Bulk upload successful",
-            "created_packages": len(created_packages),
-        }
 
+        return await package_repo.import_packages(
+            read_package_rows(reader, user.id, order.id),
+            batch_size=batch_size,
+            skip_invalid=skip_invalid,
+            order=order,
+        )
+    except ValueError as e:
+        print(e)
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+async def create_bulk_import_job(
+    user, import_job_repo, file: UploadFile, batch_size, skip_invalid
+):
+    try:
+        path = await run_in_threadpool(save_upload, file.file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # the worker creates the order with the packages
+    job = await import_job_repo.create(
+        ImportJobCreate(
+            merchant_id=user.id,
+            file_path=path,
+            batch_size=batch_size,
+            skip_invalid=skip_invalid,
+        )
+    )
+    submit_import_job(job.id)
+    return JSONResponse(
+        status_code=202, content={"job_id": str(job.id), "status": job.status}
+    )
+
+
+@router.get("/my_packages/bulk/{job_id}", response_model=ImportJobStatus)
+async def get_bulk_import_job(
+    job_id: UUID, user: LoggedInDep, import_job_repo: ImportJobRepoDep
+):
+    job = await import_job_repo.get_for_merchant(job_id, user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Import job {job_id} not found")
+
+    rows_per_second = None
+    if job.started_at:
+        elapsed = ((job.finished_at or datetime.now()) - job.started_at).total_seconds()
+        rows_per_second = round(job.rows_processed / elapsed, 1) if elapsed else None
+
+    return ImportJobStatus(
+        id=job.id,
+        status=job.status,
+        order_id=job.order_id,
+        rows_processed=job.rows_processed,
+        rows_rejected=job.rows_rejected,
+        rows_per_second=rows_per_second,
+        result=job.result,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
 @router.get("/my_packages")
 async def get_merchant_packages(
     package_repo: "PackageRepoDep",
@@ -155,20 +239,27 @@ async def get_merchant_packages(
     days_ago: int = Query(365, gt=0),
     offset: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(10, ge=1, le=50, description="Items per page"),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    count: CountStrategy = Query("exact", description="How the total is counted"),
 ):
-    results = package_repo.query_packages_paginated(
-        merchant_id=user.id,
-        block_id=block_id,
-        order_id=order_id,
-        is_urgent=is_urgent,
-        is_fragile=is_fragile,
-        min_weight=min_weight,
-        max_weight=max_weight,
-        days_ago=days_ago,
-        status=status,
-        page=offset,
-        page_size=limit,
-    )
+    try:
+        results = await package_repo.query_packages_paginated(
+            merchant_id=user.id,
+            block_id=block_id,
+            order_id=order_id,
+            is_urgent=is_urgent,
+            is_fragile=is_fragile,
+            min_weight=min_weight,
+            max_weight=max_weight,
+            days_ago=days_ago,
+            status=status,
+            page=offset,
+            page_size=limit,
+            cursor=cursor,
+            count=count,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return results
 
 
@@ -187,10 +278,12 @@ async def export_merchant_packages(
     days_ago: int = Query(365, gt=0),
     limit: int = Query(999999, ge=0),
     offset: int = Query(0, ge=0),
+    format: Literal["xlsx", "csv", "ndjson"] = "xlsx",
+    gzip: bool = False,
 ):
-    try:
-        current_date = datetime.now().strftime("%Y-%m-%d %H%M:%S")
-        results = package_repo.query_packages(
+    current_date = datetime.now().strftime("%Y-%m-%d %H%M:%S")
+    if format != "xlsx":
+        query = await package_repo.build_export_query(
             merchant_id=user.id,
             block_id=block_id,
             order_id=order_id,
@@ -203,114 +296,53 @@ async def export_merchant_packages(
             status=status,
             offset=offset,
         )
-
-        df = pd.DataFrame([package for package in results])
-        df = df.drop(
-            [
-                "_sa_instance_state",
-                "merchant_id",
-                "merchant_name",
-                "package_rate_id",
-                "block_id",
-            ],
-            axis=1,
+        filename = f"parcelpoint_packages_{current_date}.{format}"
+        media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+        if gzip:
+            filename += ".gz"
+            media_type = "application/gzip"
+        # the health check connects synchronously, keep it off the event loop
+        replica = await run_in_threadpool(replicas.choose)
+        return StreamingResponse(
+            copy_query(replica or engine, query, format, compress=gzip),
+            media_type=media_type,
+            headers={"Content-Disposition": f"attachment; filename={filename}"},
         )
 
-        column_order = [
-            col
-            for col in df.columns
-            if col
-            not in ["width", "length", "height", "weight", "shipping_cost", "cod_cost"]
-        ] + ["width", "length", "height", "weight", "shipping_cost", "cod_cost"]
-
-        df = df[column_order]
-        row_count = len(df)
-
-        sum_cod = df["cod_cost"].sum()
-        sum_shipping = df["shipping_cost"].sum()
-
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-            df.to_excel(writer, index=False, sheet_name="Packages", startrow=5)
-
-            workbook = writer.book
-            sheet = writer.sheets["Packages"]
-
-            title_format = workbook.add_format(
-                {"font_name": "JetBrains Mono", "font_size": 18, "bold": True}
-            )
-            subtitle_format = workbook.add_format(
-                {"font_name": "JetBrains Mono", "font_size": 11}
-            )
-            header_format = workbook.add_format(
-                {
-                    "font_name": "JetBrains Mono",
-                    "font_size": 11,
-                    "bold": True,
-                    "align": "center",
-                    "bg_color": "#B3D8A8",
-                    "border": 1,
-                }
-            )
-            currency_format = workbook.add_format({"num_format": '#,##0"₫"'})
-            light_fill_format = workbook.add_format({"bg_color": "#FBFFE4"})
-
-            # Header
-            sheet.write("A1", "ParcelPoint", title_format)
-            sheet.write("A2", "Package Report", subtitle_format)
-            sheet.write("A3", f"Report exported on {current_date}", subtitle_format)
-            sheet.write("A4", f"Days Queried: {days_ago}", subtitle_format)
-            sheet.write("E2", f"Total Revenue: {sum_cod}", subtitle_format)
-            sheet.write("E3", f"Total Shipping fee: {sum_shipping}", subtitle_format)
-            sheet.write("E4", f"Total Packages: {row_count}", subtitle_format)
-
-            # format rows and widths
-            for col_num, column_title in enumerate(df.columns, 0):
-                sheet.write(5, col_num, column_title, header_format)
-
-            for col_num, column_title in enumerate(df.columns):
-                max_length = max(
-                    df[column_title].astype(str).map(len).max(), len(column_title)
-                )
-                sheet.set_column(col_num, col_num, max_length + 2)
-
-            # zebra striping the table
-            for row in range(6, 6 + row_count, 2):
-                sheet.set_row(row, None, light_fill_format)
-
-            if "shipping_cost" in df.columns:
-                shipping_cost_col_idx = df.columns.get_loc("shipping_cost")
-                for row in range(6, 6 + row_count):
-                    sheet.write(
-                        row,
-                        shipping_cost_col_idx,
-                        df.iloc[row - 6, shipping_cost_col_idx],
-                        currency_format,
-                    )
-
-            if "cod_cost" in df.columns:
-                cod_cost_col_idx = df.columns.get_loc("cod_cost")
-                for row in range(6, 6 + row_count):
-                    sheet.write(
-                        row,
-                        cod_cost_col_idx,
-                        df.iloc[row - 6, cod_cost_col_idx],
-                        currency_format,
-                    )
-
-        output.seek(0)
+    # the workbook is written to disk first, the session is closed before a
+    # streamed response body runs
+    with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as file:
+        path = file.name
 
-        return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={
-                "Content-Disposition": f"attachment; filename=parcelpoint_packages_{current_date}.xlsx"
-            },
+    try:
+        await package_repo.export_packages_xlsx(
+            path,
+            current_date,
+            merchant_id=user.id,
+            block_id=block_id,
+            order_id=order_id,
+            is_urgent=is_urgent,
+            is_fragile=is_fragile,
+            min_weight=min_weight,
+            max_weight=max_weight,
+            days_ago=days_ago,
+            limit=limit,
+            status=status,
+            offset=offset,
         )
-
     except Exception as e:
+        os.remove(path)
         raise HTTPException(status_code=400, detail=str(e))
 
+    return FileResponse(
+        path,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={
+            "Content-Disposition": f"attachment; filename=parcelpoint_packages_{current_date}.xlsx"
+        },
+        background=BackgroundTask(os.remove, path),
+    )
+
 
 @router.get("/search")
 async def search_packages(
@@ -324,22 +356,36 @@ async def search_packages(
     min_weight: float | None = None,
     max_weight: float | None = None,
     days_ago: int | None = None,
+    q: str | None = Query(
+        None,
+        min_length=1,
+        max_length=200,
+        description="Recipient name, description, street or phone fragment",
+    ),
     limit: int = Query(20, le=50),
     offset: int = Query(1, gt=0),  # page
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    count: CountStrategy = Query("exact", description="How the total is counted"),
 ):
-    results = package_repo.query_packages_paginated(
-        merchant_id=merchant_id,
-        block_id=block_id,
-        order_id=order_id,
-        is_urgent=is_urgent,
-        is_fragile=is_fragile,
-        min_weight=min_weight,
-        max_weight=max_weight,
-        days_ago=days_ago,
-        status=status,
-        page=offset,
-        page_size=limit,
-    )
+    try:
+        results = await package_repo.query_packages_paginated(
+            merchant_id=merchant_id,
+            block_id=block_id,
+            order_id=order_id,
+            is_urgent=is_urgent,
+            is_fragile=is_fragile,
+            min_weight=min_weight,
+            max_weight=max_weight,
+            days_ago=days_ago,
+            q=q,
+            status=status,
+            page=offset,
+            page_size=limit,
+            cursor=cursor,
+            count=count,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return results
 
 
@@ -348,7 +394,7 @@ async def patch_package(
     id: UUID, package_patched: PackageUpdate, package_repo: PackageRepoDep
 ) -> Package:
     try:
-        updated = package_repo.update(id, package_patched)
+        updated = await package_repo.update(id, package_patched)
         return Package(**updated.__dict__)
     except ValueError as e:
         print(e)
@@ -363,8 +409,8 @@ async def delete_block(
     id: UUID, package_repo: PackageRepoDep, package_history_repo: PackageHistoryRepoDep
 ) -> Package:
     try:
-        package_history_repo.delete_all_by_package_id(id)
-        deleted = package_repo.delete(id)
+        await package_history_repo.delete_all_by_package_id(id)
+        deleted = await package_repo.delete(id)
         return Package(**deleted.__dict__)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -375,7 +421,7 @@ async def delete_block(
 
 @router.get("/{id}")
 async def get_package(id: UUID, package_repo: PackageRepoDep) -> Package:
-    package = package_repo.get_by_id(id)
+    package = await package_repo.get_by_id(id)
     if not package:
         raise HTTPException(status_code=404, detail="Package not found")
     return Package(**package.__dict__)
@@ -19,7 +19,7 @@ async def create_history(
 ):
     try:
         print(package_history_create)
-        return package_history_repo.create(package_history_create)
+        return await package_history_repo.create(package_history_create)
     except Exception as e:
         print(e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -28,6 +28,6 @@ async def create_history(
 @router.get("/{id}")
 async def get_history_of_package(id: UUID, package_history_repo: PackageHistoryRepoDep):
     try:
-        return package_history_repo.get_history_by_package_id(id)
+        return await package_history_repo.get_history_by_package_id(id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
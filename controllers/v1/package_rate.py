@@ -1,8 +1,8 @@
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 
-from dependencies import PackageRateRepoDep
+from dependencies import PackageRateRepoDep, PackageRepoDep, StaffDep
 from models.package_rate import PackageRateUpdate, PackageRateCreate
 
 router = APIRouter(
@@ -13,12 +13,12 @@ router = APIRouter(
 
 @router.get("/")
 async def get_package_rate(package_rate_repo: PackageRateRepoDep):
-    return package_rate_repo.get_all()
+    return await package_rate_repo.get_all()
 
 
 @router.get("/{id}")
 async def get_package_rate_by_id(id: UUID, package_rate_repo: PackageRateRepoDep):
-    package_rate = package_rate_repo.get_by_id(id)
+    package_rate = await package_rate_repo.get_by_id(id)
     if not package_rate:
         raise HTTPException(status_code=404, detail="package_rate not found")
 
@@ -30,7 +30,7 @@ async def create_package_rate(
     package_rate: PackageRateCreate, package_rate_repo: PackageRateRepoDep
 ):
     try:
-        res = package_rate_repo.create(package_rate)
+        res = await package_rate_repo.create(package_rate)
         return res
     except Exception as e:
         return HTTPException(status_code=500, detail="Internal server error")
@@ -39,7 +39,7 @@ async def create_package_rate(
 @router.delete("/{id}")
 async def delete_package_rate(id: UUID, package_rate_repo: PackageRateRepoDep):
     try:
-        return package_rate_repo.delete(id)
+        return await package_rate_repo.delete(id)
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
 
@@ -49,6 +49,27 @@ async def patch_package_rate(
     id: UUID, updated: PackageRateUpdate, package_rate_repo: PackageRateRepoDep
 ):
     try:
-        return package_rate_repo.update(id, updated)
+        return await package_rate_repo.update(id, updated)
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
+
+
+@router.post("/{id}/reprice")
+async def reprice_packages(
+    id: UUID,
+    package_rate_repo: PackageRateRepoDep,
+    package_repo: PackageRepoDep,
+    staff: StaffDep,
+    status: list[str] | None = Query(
+        None, description="Only packages in these statuses"
+    ),
+    dry_run: bool = Query(False, description="Report the change without applying it"),
+    batch_size: int | None = Query(
+        None, ge=1, description="Reprice in batches of this size instead of at once"
+    ),
+):
+    # 404 when the rate does not exist
+    await package_rate_repo.get_by_id(id)
+    return await package_repo.reprice(
+        rate_id=id, statuses=status, dry_run=dry_run, batch_size=batch_size
+    )
@@ -23,7 +23,7 @@ router.include_router(staff.router)
 
 @router.get("/")
 async def get_staff(staff_repo: StaffRepoDep):
-    return staff_repo.get_all()
+    return await staff_repo.get_all()
 
 
 @router.post("/register")
@@ -34,13 +34,13 @@ async def register_staff(
     account_repo: AccountRepoDep,
 ) -> StaffDetails:
     try:
-        account = account_repo.create(account_create)
+        account = await account_repo.create(account_create)
         account_model = Account(**account.__dict__)
         staff_model = StaffCreate(
             **staff_create.model_dump(),
             account_id=account.id,
         )
-        staff = staff_repo.create(staff_model)
+        staff = await staff_repo.create(staff_model)
 
         return StaffDetails(account=account_model, **staff_model.model_dump())
     except Exception as e:
@@ -54,11 +54,11 @@ async def get_staff_by_id(
     account_repo: AccountRepoDep,
     is_detailed: bool = False,
 ):
-    staff = staff_repo.get_by_id(id)
+    staff = await staff_repo.get_by_id(id)
 
     if staff is None:
         raise HTTPException(status_code=404, detail="Staff not found")
-    account = account_repo.get_by_id(id)
+    account = await account_repo.get_by_id(id)
     if staff is None:
         raise HTTPException(
             status_code=500, detail="Staff found but user isn't, something's wrong"
@@ -85,8 +85,8 @@ async def update_staff(
         raise HTTPException(status_code=404, detail="Merchant not found")
 
     try:
-        account_model = account_repo.update(id, account_updated)
-        staff_model = staff_repo.update(id, staff_updated)
+        account_model = await account_repo.update(id, account_updated)
+        staff_model = await staff_repo.update(id, staff_updated)
 
         if account_model is None:
             raise HTTPException(
@@ -94,7 +94,7 @@ async def update_staff(
                 detail="Merchant found but user isn't, something's wrong",
             )
 
-        account_repo.refresh(account_model)
+        await account_repo.refresh(account_model)
         return StaffDetails(
             **staff_model.__dict__, account=Account(**account_model.__dict__)
         )
@@ -114,7 +114,7 @@ async def update_staff_separate(
     if _staff is None:
         raise HTTPException(status_code=404, detail="Merchant not found")
 
-    return staff_repo.update(id, staff_updated)
+    return await staff_repo.update(id, staff_updated)
 
 
 @router.delete("/{id}")
@@ -123,12 +123,12 @@ async def delete_staff(
     staff_repo: StaffRepoDep,
     account_repo: AccountRepoDep,
 ):
-    account = account_repo.get_by_id(id)
-    staff = staff_repo.get_by_id(id)
+    account = await account_repo.get_by_id(id)
+    staff = await staff_repo.get_by_id(id)
     if account is None or staff is None:
         raise HTTPException(status_code=404, detail="Staff not found")
 
-    staff_repo.delete(id)
-    account_repo.delete(id)
+    await staff_repo.delete(id)
+    await account_repo.delete(id)
 
     return StaffDetails(**staff.__dict__, account=Account(**account.__dict__))
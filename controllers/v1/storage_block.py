@@ -1,9 +1,15 @@
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 
-from dependencies import StorageBlockRepoDep
-from models.storage_block import StorageBlockCreate, StorageBlockUpdate, StorageBlock
+from dependencies import StaffDep, StorageBlockRepoDep
+from models.storage_block import (
+    StorageBlockAllocateRequest,
+    StorageBlockAllocation,
+    StorageBlockCreate,
+    StorageBlockUpdate,
+    StorageBlock,
+)
 
 router = APIRouter(
     prefix="/storage_block",
@@ -15,17 +21,28 @@ router = APIRouter(
 async def get_storage_blocks(
     storage_block_repo: StorageBlockRepoDep,
 ):
-    blocks = storage_block_repo.get_all()
+    blocks = await storage_block_repo.get_all()
     print(blocks)
     return blocks
 
 
+@router.get("/suggest")
+async def suggest_blocks(
+    storage_block_repo: StorageBlockRepoDep,
+    volume: float = Query(ge=0),
+    weight: float = Query(ge=0),
+    k: int = Query(5, ge=1, le=100),
+) -> list[StorageBlock]:
+    """Blocks the package fits in right now, the emptiest first"""
+    return await storage_block_repo.find_blocks(volume, weight, k=k)
+
+
 @router.post("/")
 async def create_block(
     block_create: StorageBlockCreate, storage_block_repo: StorageBlockRepoDep
 ):
     try:
-        return storage_block_repo.create(block_create)
+        return await storage_block_repo.create(block_create)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -33,12 +50,27 @@ async def create_block(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/allocate", response_model=StorageBlockAllocation)
+async def allocate_blocks(
+    allocate: StorageBlockAllocateRequest,
+    storage_block_repo: StorageBlockRepoDep,
+    staff: StaffDep,
+    dry_run: bool = Query(False, description="Compute the assignments, write nothing"),
+):
+    try:
+        return await storage_block_repo.allocate(
+            allocate.package_ids, block_ids=allocate.block_ids, dry_run=dry_run
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.patch("/{id}")
 async def patch_block(
     id: UUID, block_patched: StorageBlockUpdate, storage_block_repo: StorageBlockRepoDep
 ) -> StorageBlock:
     try:
-        updated = storage_block_repo.update(id, block_patched)
+        updated = await storage_block_repo.update(id, block_patched)
         return StorageBlock(**updated.__dict__)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -51,7 +83,7 @@ async def delete_block(
     id: UUID, storage_block_repo: StorageBlockRepoDep
 ) -> StorageBlock:
     try:
-        deleted = storage_block_repo.delete(id)
+        deleted = await storage_block_repo.delete(id)
         return StorageBlock(**deleted.__dict__)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -61,7 +93,7 @@ async def delete_block(
 
 @router.get("/{id}")
 async def get_block(id: UUID, storage_block_repo: StorageBlockRepoDep) -> StorageBlock:
-    block = storage_block_repo.get_by_id(id)
+    block = await storage_block_repo.get_by_id(id)
     if not block:
         raise HTTPException(status_code=404, detail="Account not found")
     return StorageBlock(**block.__dict__)
@@ -3,10 +3,13 @@ from typing import Annotated
 from fastapi import Depends, HTTPException, Cookie
 from fastapi.params import Depends
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from connection import get_db
+from connection import get_session
 from models.users.account import Account, AccountWithType
+from repositories.base import AsyncRepository
+from repositories.import_job import ImportJobRepository
 from repositories.order import OrderRepository
 from repositories.package_history import PackageHistoryRepository
 from repositories.package_rate import PackageRateRepository
@@ -18,73 +21,110 @@ from repositories.users.staff import StaffRepository
 from repositories.storage_block import StorageBlockRepository
 from utils.jwt import verify_token, verify_token_dict
 
-DBSession = Annotated[Session, Depends(get_db)]
+DBSession = Annotated[Session | AsyncSession, Depends(get_session)]
 
 
-def get_account_repository(db: DBSession) -> AccountRepository:
-    return AccountRepository(db)
+def as_async_repository(repository_cls, db: Session | AsyncSession):
+    if isinstance(db, AsyncSession):
+        return AsyncRepository(repository_cls(db.sync_session), db)
+    return AsyncRepository(repository_cls(db))
 
 
-AccountRepoDep = Annotated[AccountRepository, Depends(get_account_repository)]
+def get_account_repository(db: DBSession) -> AsyncRepository[AccountRepository]:
+    return as_async_repository(AccountRepository, db)
 
 
-def get_address_repository(db: DBSession) -> AddressRepository:
-    return AddressRepository(db)
+AccountRepoDep = Annotated[
+    AsyncRepository[AccountRepository], Depends(get_account_repository)
+]
+
 
+def get_address_repository(db: DBSession) -> AsyncRepository[AddressRepository]:
+    return as_async_repository(AddressRepository, db)
 
-AddressRepoDep = Annotated[AddressRepository, Depends(get_address_repository)]
 
+AddressRepoDep = Annotated[
+    AsyncRepository[AddressRepository], Depends(get_address_repository)
+]
 
-def get_merchant_repository(db: DBSession) -> MerchantRepository:
-    return MerchantRepository(db)
 
+def get_merchant_repository(db: DBSession) -> AsyncRepository[MerchantRepository]:
+    return as_async_repository(MerchantRepository, db)
 
-MerchantRepoDep = Annotated[MerchantRepository, Depends(get_merchant_repository)]
 
+MerchantRepoDep = Annotated[
+    AsyncRepository[MerchantRepository], Depends(get_merchant_repository)
+]
 
-def get_package_repository(db: DBSession) -> PackageRepository:
-    return PackageRepository(db)
 
+def get_package_repository(db: DBSession) -> AsyncRepository[PackageRepository]:
+    return as_async_repository(PackageRepository, db)
 
-PackageRepoDep = Annotated[PackageRepository, Depends(get_package_repository)]
 
+PackageRepoDep = Annotated[
+    AsyncRepository[PackageRepository], Depends(get_package_repository)
+]
 
-def get_staff_repository(db: DBSession) -> StaffRepository:
-    return StaffRepository(db)
 
+def get_staff_repository(db: DBSession) -> AsyncRepository[StaffRepository]:
+    return as_async_repository(StaffRepository, db)
 
-StaffRepoDep = Annotated[StaffRepository, Depends(get_staff_repository)]
 
+StaffRepoDep = Annotated[
+    AsyncRepository[StaffRepository], Depends(get_staff_repository)
+]
 
-def get_storage_block_repository(db: DBSession) -> StorageBlockRepository:
-    return StorageBlockRepository(db)
+
+def get_storage_block_repository(
+    db: DBSession,
+) -> AsyncRepository[StorageBlockRepository]:
+    return as_async_repository(StorageBlockRepository, db)
 
 
 StorageBlockRepoDep = Annotated[
-    StorageBlockRepository, Depends(get_storage_block_repository)
+    AsyncRepository[StorageBlockRepository], Depends(get_storage_block_repository)
 ]
 
 
-def get_order_repository(db: DBSession) -> OrderRepository:
-    return OrderRepository(db)
+def get_order_repository(db: DBSession) -> AsyncRepository[OrderRepository]:
+    return as_async_repository(OrderRepository, db)
 
 
-OrderRepoDep = Annotated[OrderRepository, Depends(get_order_repository)]
+OrderRepoDep = Annotated[
+    AsyncRepository[OrderRepository], Depends(get_order_repository)
+]
 
 
-def get_package_rate_repository(db: DBSession) -> PackageRateRepository:
-    return PackageRateRepository(db)
+def get_package_rate_repository(
+    db: DBSession,
+) -> AsyncRepository[PackageRateRepository]:
+    return as_async_repository(PackageRateRepository, db)
 
 
-PackageRateRepoDep = Annotated[OrderRepository, Depends(get_package_rate_repository)]
+PackageRateRepoDep = Annotated[
+    AsyncRepository[PackageRateRepository], Depends(get_package_rate_repository)
+]
 
 
-def get_package_history_repository(db: DBSession) -> PackageHistoryRepository:
-    return PackageHistoryRepository(db)
+def get_package_history_repository(
+    db: DBSession,
+) -> AsyncRepository[PackageHistoryRepository]:
+    return as_async_repository(PackageHistoryRepository, db)
 
 
 PackageHistoryRepoDep = Annotated[
-    PackageHistoryRepository, Depends(get_package_history_repository)
+    AsyncRepository[PackageHistoryRepository], Depends(get_package_history_repository)
+]
+
+
+def get_import_job_repository(
+    db: DBSession,
+) -> AsyncRepository[ImportJobRepository]:
+    return as_async_repository(ImportJobRepository, db)
+
+
+ImportJobRepoDep = Annotated[
+    AsyncRepository[ImportJobRepository], Depends(get_import_job_repository)
 ]
 
 
@@ -100,10 +140,10 @@ def require_logged_in_user(token: Annotated[str | None, Cookie()] = None):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def require_logged_in_merchant(
+async def require_logged_in_merchant(
     user: Account = Depends(require_logged_in_user), account_repo=AccountRepoDep
 ):
-    type = account_repo.get_user_id_type(user)
+    type = await account_repo.get_user_id_type(user)
     if type != "MERCHANT":
         raise HTTPException(
             status_code=401,
@@ -111,10 +151,10 @@ def require_logged_in_merchant(
         )
 
 
-def require_logged_in_staff(
+async def require_logged_in_staff(
     staff: Account = Depends(require_logged_in_user), account_repo=AccountRepoDep
 ):
-    type = account_repo.get_user_id_type(staff)
+    type = await account_repo.get_user_id_type(staff)
     if type != "STAFF":
         raise HTTPException(
             status_code=401,
@@ -130,9 +170,21 @@ async def get_current_user(
 ) -> AccountWithType:
     user = verify_token_dict(token)
     user_id = user["user_id"]
-    user = account_repo.get_by_id(user_id)
-    user_type = account_repo.get_user_id_type(user_id)
+    user = await account_repo.get_by_id(user_id)
+    user_type = await account_repo.get_user_id_type(user_id)
     return AccountWithType(type=user_type, **user.__dict__)
 
 
 LoggedInDep = Annotated[AccountWithType, Depends(get_current_user)]
+
+
+async def get_current_staff(current_user: LoggedInDep) -> AccountWithType:
+    if current_user.type != "STAFF":
+        raise HTTPException(
+            status_code=401,
+            detail="Unauthorized access, you must be a staff to perform this action",
+        )
+    return current_user
+
+
+StaffDep = Annotated[AccountWithType, Depends(get_current_staff)]
@@ -21,7 +21,6 @@ import { PieChart, Pie, Cell, Legend } from "recharts";
 import { format } from "date-fns";
 import { ArrowUpRight, CalendarIcon } from "lucide-react";
 import fetchStaffDashboard from "@/lib/dataStaff";
-import { Package } from "@/types/packages";
 import { formatTimestamp, VNDong } from "@/lib/regionFormat";
 import {
   ChartConfig,
@@ -44,47 +43,42 @@ interface DasboardInfo {
     merchant_id: string;
     staff_id: string;
   }[];
-  recent_packages: Package[];
+  summary: OverviewSummary;
+}
+
+interface OverviewTotals {
+  count: number;
+  shipping: number;
+  cod: number;
+}
+
+// aggregated by the backend, packages are paged separately
+interface OverviewSummary extends OverviewTotals {
+  orders: number;
+  status: (OverviewTotals & { status: string })[];
+  days: (OverviewTotals & { date: string })[];
+  top_merchants: (OverviewTotals & { merchant_id: string; name: string })[];
 }
 
 interface Summary {
   totalShippingCost: number;
   totalCodCost: number;
   totalPackages: number;
+  totalOrders: number;
   statusCount: { name: string; value: number }[];
 }
 
-function calculatePackageSummary(packages: Package[]): Summary {
-  const statusCount: Record<string, number> = {};
-
-  const result = packages.reduce(
-    (summary, pkg) => {
-      summary.totalShippingCost += pkg.shipping_cost;
-      summary.totalCodCost += pkg.cod_cost;
-      summary.totalPackages++;
-
-      if (statusCount[pkg.status]) {
-        statusCount[pkg.status]++;
-      } else {
-        statusCount[pkg.status] = 1;
-      }
-
-      return summary;
-    },
-    {
-      totalShippingCost: 0,
-      totalCodCost: 0,
-      totalPackages: 0,
-      statusCount: [],
-    } as Summary,
-  );
-
-  result.statusCount = Object.entries(statusCount).map(([name, value]) => ({
-    name,
-    value,
-  }));
-
-  return result;
+function toSummary(overview: OverviewSummary): Summary {
+  return {
+    totalShippingCost: overview.shipping,
+    totalCodCost: overview.cod,
+    totalPackages: overview.count,
+    totalOrders: overview.orders,
+    statusCount: overview.status.map((entry) => ({
+      name: entry.status,
+      value: entry.count,
+    })),
+  };
 }
 
 interface StorageBlock {
@@ -149,7 +143,7 @@ export default function StaffDashboard() {
       endDate,
     )) as DasboardInfo;
 
-    const summary = calculatePackageSummary(data.recent_packages);
+    const summary = toSummary(data.summary);
 
     const result: DashboardData = {
       storageBlocks: [
@@ -275,7 +269,7 @@ export default function StaffDashboard() {
           </CardHeader>
           <CardContent>
             <h3 className="text-2xl font-bold">
-              {dashboardData.recentOrders.length}
+              {dashboardData.summary.totalOrders}
             </h3>
           </CardContent>
         </Card>
@@ -1,7 +1,7 @@
 export interface Account {
   id: string;
   name: string;
-  hashed_password: string;
+  hashed_password?: string;
   phone: string;
   address_id: string;
   email: string;
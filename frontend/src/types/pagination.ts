@@ -4,5 +4,6 @@ export interface Pagination<T> {
   next?: number;
   previous?: number;
   page_count: number;
+  next_cursor?: string | null;
   data: T[];
 }
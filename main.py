@@ -1,13 +1,30 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 
 from controllers.v1 import router
+from connection import url
+from utils.import_jobs import executor, resume_import_jobs
+from utils.rate_cache import RateListener, rate_cache
 
 origins = [
     "http://localhost:3000",
 ]
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    rate_listener = RateListener(rate_cache, url)
+    rate_listener.start()
+    await run_in_threadpool(resume_import_jobs)
+    yield
+    executor.shutdown(wait=False, cancel_futures=True)
+    await run_in_threadpool(rate_listener.stop)
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
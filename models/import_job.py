@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import Literal
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class BaseImportJob(BaseModel):
+    merchant_id: UUID
+    order_id: UUID | None = None
+    status: Literal["QUEUED", "RUNNING", "SUCCEEDED", "FAILED"] = "QUEUED"
+    file_path: str
+    batch_size: int = 1000
+    skip_invalid: bool = False
+
+
+class ImportJob(BaseImportJob):
+    id: UUID
+    rows_processed: int = 0
+    rows_rejected: int = 0
+    result: dict | None = None
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+class ImportJobCreate(BaseImportJob):
+    pass
+
+
+class ImportJobUpdate(BaseModel):
+    status: Literal["QUEUED", "RUNNING", "SUCCEEDED", "FAILED"] | None = None
+    rows_processed: int | None = None
+    rows_rejected: int | None = None
+    result: dict | None = None
+    error: str | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+class ImportJobStatus(BaseModel):
+    id: UUID
+    status: str
+    order_id: UUID | None
+    rows_processed: int
+    rows_rejected: int
+    rows_per_second: float | None
+    result: dict | None
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
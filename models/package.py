@@ -1,7 +1,7 @@
 from typing import Literal
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class BasePackage(BaseModel):
@@ -69,3 +69,47 @@ class PackageUpdate(BasePackage):
     package_rate_id: UUID | None = None
     shipping_cost: float | None = None
     cod_cost: float | None = None
+
+
+class PackageQuoteItem(BaseModel):
+    width: float = Field(gt=0)
+    height: float = Field(gt=0)
+    length: float = Field(gt=0)
+    weight: float = Field(ge=0)
+
+    is_fragile: bool = False
+    is_urgent: bool = False
+
+    package_rate_id: UUID
+
+
+class PackageQuoteRequest(BaseModel):
+    packages: list[PackageQuoteItem] = Field(min_length=1, max_length=5000)
+
+
+class PackageQuote(BaseModel):
+    package_rate_id: UUID
+    base: float
+    urgent: float
+    fragile: float
+    oversize: float
+    overweight: float
+    total: float
+
+
+class PackageQuoteResponse(BaseModel):
+    packages: list[PackageQuote]
+    total: float
+
+
+class PackageMove(BaseModel):
+    block_id: UUID
+    # by id, by the blocks they are in, or both
+    package_ids: list[UUID] | None = Field(None, min_length=1, max_length=20000)
+    from_block_ids: list[UUID] | None = Field(None, min_length=1)
+
+
+class PackageMoveResult(BaseModel):
+    moved: int
+    weight: float
+    size: float
@@ -7,8 +7,13 @@ T = TypeVar("T", bound=BaseModel)
 
 class Pagination(BaseModel, Generic[T]):
     current_page: int
-    page_count: int
-    items: int
+    # None when the total count was skipped
+    page_count: int | None
+    items: int | None
+    # False when items is an estimate or a cached value
+    count_exact: bool = True
     previous: int | None
     next: int | None
+    # opaque keyset cursor for the page after this one
+    next_cursor: str | None = None
     data: List[T]
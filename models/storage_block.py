@@ -12,6 +12,9 @@ class BaseStorageBlock(BaseModel):
 
 class StorageBlock(BaseStorageBlock):
     id: UUID
+    current_weight: float = 0
+    current_size: float = 0
+    current_count: int = 0
 
 
 class StorageBlockCreate(BaseStorageBlock):
@@ -23,3 +26,20 @@ class StorageBlockUpdate(BaseModel):
     max_weight: float | None = None
     max_size: float | None = None
     max_package: float | None = None
+
+
+class StorageBlockAllocateRequest(BaseModel):
+    package_ids: list[UUID] = Field(min_length=1, max_length=20000)
+    # only these blocks, any block with room when left out
+    block_ids: list[UUID] | None = None
+
+
+class StorageBlockAssignment(BaseModel):
+    package_id: UUID
+    block_id: UUID
+
+
+class StorageBlockAllocation(BaseModel):
+    assignments: list[StorageBlockAssignment]
+    unplaced: list[UUID]
+    skipped: list[UUID]
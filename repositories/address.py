@@ -1,54 +1,45 @@
-from gettext import textdomain
 from typing import List
 
-from sqlalchemy import text
+from sqlalchemy import case, desc, func, or_, select
 from sqlalchemy.orm import Session
 
 from repositories.base import BaseRepository
 from schemas.address import AddressSchema
 from models.address import AddressCreate, AddressUpdate
+from utils.search import ACCENTED, PLAIN, fold_accents
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
 
 
 class AddressRepository(BaseRepository[AddressSchema, AddressCreate, AddressUpdate]):
     def __init__(self, db: Session):
         super().__init__(db, AddressSchema)
 
-    def search(self, search_terms: List[str]):
-        conditions = []
-        params = {}
-
-        for i, term in enumerate(search_terms):
-            param_name = f"term_{i}"
-            params[param_name] = f"%{term}%"
-            conditions.append(
-                f"""
-                LOWER(province) LIKE :{param_name} OR
-                LOWER(district) LIKE :{param_name} OR
-                LOWER(commune) LIKE :{param_name}
-            """
+    def search(
+        self, search_terms: List[str], limit: int | None = None, offset: int = 0
+    ):
+        """Addresses containing every term in any part, ignoring case and
+        diacritics. A part equal to a term scores 3, containing one scores 1"""
+        terms = [fold_accents(term) for term in search_terms]
+        parts = [AddressSchema.province, AddressSchema.district, AddressSchema.commune]
+
+        query = select(AddressSchema.id, *parts)
+        if terms:
+            # one trigram index scan per term, the score only runs on matches
+            query = query.where(
+                *[AddressSchema.search_text.like(_like_pattern(t)) for t in terms]
             )
+            scores = []
+            for part in parts:
+                folded = func.translate(func.lower(part), ACCENTED, PLAIN)
+                scores.append(case((folded.in_(terms), 3), else_=0))
+                contains = or_(*[folded.contains(t, autoescape=True) for t in terms])
+                scores.append(case((contains, 1), else_=0))
+            query = query.order_by(desc(sum(scores[1:], scores[0])))
+
+        query = query.order_by(*parts, AddressSchema.id).offset(offset).limit(limit)
 
-        where_clause = " AND ".join(f"({condition})" for condition in conditions)
-
-        query = text(
-            f"""
-             SELECT id, province, district, commune
-            FROM parcelpoint.public.address
-            WHERE {where_clause}
-            ORDER BY
-                (
-                    CASE WHEN LOWER(province) = ANY(ARRAY[:exact_terms]) THEN 3 ELSE 0 END +
-                    CASE WHEN LOWER(district) = ANY(ARRAY[:exact_terms]) THEN 3 ELSE 0 END +
-                    CASE WHEN LOWER(commune) = ANY(ARRAY[:exact_terms]) THEN 3 ELSE 0 END +
-                    CASE WHEN LOWER(province) LIKE ANY(ARRAY[:terms]) THEN 1 ELSE 0 END +
-                    CASE WHEN LOWER(district) LIKE ANY(ARRAY[:terms]) THEN 1 ELSE 0 END +
-                    CASE WHEN LOWER(commune) LIKE ANY(ARRAY[:terms]) THEN 1 ELSE 0 END
-                ) DESC
-            """
-        )
-
-        # add the terms arrays to params
-        params.update({"terms": search_terms, "exact_terms": search_terms})
-
-        result = self.db.execute(query, params).fetchall()
-        return result
+        return self.db.execute(query).fetchall()
@@ -3,8 +3,10 @@ from uuid import UUID, uuid4
 
 from fastapi import HTTPException
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
+from starlette.concurrency import run_in_threadpool
 from starlette.status import HTTP_404_NOT_FOUND
 
 SchemaType = TypeVar("SchemaType")
@@ -55,3 +57,32 @@ class BaseRepository(Generic[SchemaType, CreateSchemaType, UpdateSchemaType]):
 
     def refresh(self, instance):
         self.db.refresh(instance)
+
+
+RepositoryType = TypeVar("RepositoryType", bound=BaseRepository)
+
+
+class AsyncRepository(Generic[RepositoryType]):
+    """Awaitable version of a repository, every method of the wrapped repository
+    becomes a coroutine.
+
+    With an AsyncSession the call goes through ``run_sync``, so the queries use the
+    async driver and never block the event loop. Without one (sync mode) the call
+    runs on the threadpool like a regular ``def`` route would.
+    """
+
+    def __init__(self, repository: RepositoryType, session: AsyncSession | None = None):
+        self.repository = repository
+        self.session = session
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.repository, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            if self.session is None:
+                return await run_in_threadpool(attr, *args, **kwargs)
+            return await self.session.run_sync(lambda _: attr(*args, **kwargs))
+
+        return call
@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from models.import_job import ImportJobCreate, ImportJobUpdate
+from repositories.base import BaseRepository
+from schemas.import_job import ImportJobSchema
+
+
+class ImportJobRepository(
+    BaseRepository[ImportJobSchema, ImportJobCreate, ImportJobUpdate]
+):
+    def __init__(self, db: Session):
+        super().__init__(db, ImportJobSchema)
+
+    def get_for_merchant(self, id: UUID, merchant_id: UUID) -> ImportJobSchema | None:
+        return self.db.scalars(
+            select(ImportJobSchema).where(
+                ImportJobSchema.id == id, ImportJobSchema.merchant_id == merchant_id
+            )
+        ).first()
+
+    def claim(self, id: UUID) -> ImportJobSchema | None:
+        """Marks a queued job as running, only one worker can win it. The job's
+        ``claim_token`` identifies the winner until the job is requeued"""
+        job = self.db.scalars(
+            update(ImportJobSchema)
+            .where(ImportJobSchema.id == id, ImportJobSchema.status == "QUEUED")
+            .values(
+                status="RUNNING",
+                rows_processed=0,
+                rows_rejected=0,
+                started_at=datetime.now(),
+                updated_at=datetime.now(),
+                claim_token=uuid4(),
+            )
+            .returning(ImportJobSchema)
+        ).first()
+        if job is not None:
+            # not expired by the commit, the token is the one this claim set
+            self.db.expunge(job)
+        self.db.commit()
+        return job
+
+    def _update_claimed(self, id: UUID, token: UUID, commit: bool = True, **values):
+        """Updates the job if ``token`` still holds it, returns whether it did"""
+        updated = self.db.execute(
+            update(ImportJobSchema)
+            .where(
+                ImportJobSchema.id == id,
+                ImportJobSchema.status == "RUNNING",
+                ImportJobSchema.claim_token == token,
+            )
+            .values(updated_at=datetime.now(), **values)
+            .returning(ImportJobSchema.id)
+        ).first()
+        if commit:
+            self.db.commit()
+        return updated is not None
+
+    def renew(self, id: UUID, token: UUID) -> bool:
+        return self._update_claimed(id, token)
+
+    def report_progress(
+        self, id: UUID, token: UUID, rows_processed: int, rows_rejected: int
+    ) -> bool:
+        return self._update_claimed(
+            id, token, rows_processed=rows_processed, rows_rejected=rows_rejected
+        )
+
+    def finish(
+        self,
+        id: UUID,
+        token: UUID,
+        status: str,
+        result: dict | None = None,
+        error: str | None = None,
+        commit: bool = True,
+        order_id: UUID | None = None,
+    ) -> bool:
+        """Records the outcome, unless the claim was lost. Without ``commit`` it
+        is part of the caller's transaction, e.g. the one inserting the packages
+        and ``order_id``, their order"""
+        values = {
+            "status": status,
+            "result": result,
+            "error": error,
+            "finished_at": datetime.now(),
+        }
+        if order_id is not None:
+            values["order_id"] = order_id
+        if result is not None:
+            values["rows_processed"] = (
+                result["created_packages"] + result["rejected_packages"]
+            )
+            values["rows_rejected"] = result["rejected_packages"]
+        return self._update_claimed(id, token, commit=commit, **values)
+
+    def requeue_abandoned(self, stale_after: timedelta) -> list[UUID]:
+        """Queued jobs and running jobs nobody reported on for ``stale_after``.
+        Their claim is dropped, a worker still running one can no longer commit
+        it, so the job starts over without importing anything twice"""
+        ids = self.db.scalars(
+            update(ImportJobSchema)
+            .where(
+                or_(
+                    ImportJobSchema.status == "QUEUED",
+                    and_(
+                        ImportJobSchema.status == "RUNNING",
+                        ImportJobSchema.updated_at < datetime.now() - stale_after,
+                    ),
+                )
+            )
+            .values(status="QUEUED", updated_at=datetime.now(), claim_token=None)
+            .returning(ImportJobSchema.id)
+        ).all()
+        self.db.commit()
+        return list(ids)
@@ -0,0 +1,51 @@
+from uuid import UUID
+
+from sqlalchemy import Date, cast, delete, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from schemas.merchant_daily_stats import MerchantDailyStatsSchema
+from schemas.order import OrderSchema
+from schemas.package import PackageSchema
+
+
+class MerchantDailyStatsRepository:
+    """The rollup is written by triggers, this only reads it and rebuilds it"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def backfill(self, merchant_id: UUID | None = None) -> int:
+        """Recomputes the rollup from the packages, for every merchant or one.
+        Package writes wait until it commits so none is counted twice or missed"""
+        try:
+            self.db.execute(
+                text('LOCK TABLE package, "order" IN SHARE ROW EXCLUSIVE MODE')
+            )
+
+            stale = delete(MerchantDailyStatsSchema)
+            totals = (
+                select(
+                    OrderSchema.merchant_id,
+                    cast(OrderSchema.date, Date),
+                    func.count(PackageSchema.id),
+                    func.coalesce(func.sum(PackageSchema.shipping_cost), 0),
+                    func.coalesce(func.sum(PackageSchema.cod_cost), 0),
+                )
+                .join(OrderSchema, PackageSchema.order_id == OrderSchema.id)
+                .group_by(OrderSchema.merchant_id, cast(OrderSchema.date, Date))
+            )
+            if merchant_id is not None:
+                stale = stale.where(MerchantDailyStatsSchema.merchant_id == merchant_id)
+                totals = totals.where(OrderSchema.merchant_id == merchant_id)
+
+            self.db.execute(stale)
+            result = self.db.execute(
+                insert(MerchantDailyStatsSchema).from_select(
+                    ["merchant_id", "date", "count", "shipping", "cod"], totals
+                )
+            )
+            self.db.commit()
+            return result.rowcount
+        except Exception:
+            self.db.rollback()
+            raise
@@ -9,9 +9,11 @@ from sqlalchemy.sql.functions import func
 from models.order import OrderCreate, OrderUpdate
 from models.pagination import Pagination
 from repositories.base import BaseRepository
+from repositories.pagination import CountStrategy, count_items, count_pages
 from schemas.order import OrderSchema
 from schemas.package import PackageSchema
 from schemas.users import MerchantSchema, AccountSchema
+from utils.routing import read_only
 
 
 class OrderRepository(BaseRepository[OrderSchema, OrderCreate, OrderUpdate]):
@@ -27,26 +29,24 @@ class OrderRepository(BaseRepository[OrderSchema, OrderCreate, OrderUpdate]):
 
     def get_by_merchant_id(self, id: UUID):
         query = (
-            select(OrderSchema, func.count(PackageSchema.id))
+            select(
+                *OrderSchema.__table__.columns,
+                func.count(PackageSchema.id).label("count"),
+            )
             .join(PackageSchema, OrderSchema.id == PackageSchema.order_id)
             .where(OrderSchema.merchant_id == id)
             .group_by(OrderSchema.id)
             .order_by(desc(OrderSchema.date))
         )
 
-        results = self.db.execute(query).all()
-        orders = []
-        for order, count in results:
-            order_dict = order.__dict__
-            order_dict["count"] = count
-            orders.append(order_dict)
-        return orders
+        return [row._asdict() for row in self.db.execute(query)]
 
     def _build_base_order_query(self, merchant_id: Optional[UUID] = None):
         """Build the base query for orders with package count."""
-        query = select(OrderSchema, func.count(PackageSchema.id)).join(
-            PackageSchema, OrderSchema.id == PackageSchema.order_id
-        )
+        query = select(
+            *OrderSchema.__table__.columns,
+            func.count(PackageSchema.id).label("count"),
+        ).join(PackageSchema, OrderSchema.id == PackageSchema.order_id)
 
         if merchant_id:
             query = query.where(OrderSchema.merchant_id == merchant_id)
@@ -54,84 +54,103 @@ class OrderRepository(BaseRepository[OrderSchema, OrderCreate, OrderUpdate]):
         return query.group_by(OrderSchema.id).order_by(desc(OrderSchema.date))
 
     def _execute_paginated_query(
-        self, base_query, count_query, page: int = 1, page_size: int = 10
+        self,
+        base_query,
+        count_query,
+        page: int = 1,
+        page_size: int = 10,
+        count: CountStrategy = "exact",
+        table: str | None = None,
     ) -> Pagination[dict]:
         """Execute paginated query and return paginated results."""
-        # Get total count
-        total_items = self.db.execute(count_query).scalar() or 0
+        # Get total count, count_query only selects the ids being counted
+        total_items, count_exact = None, False
+        if count != "window":
+            total_items, count_exact = count_items(
+                self.db, count_query, count, table=table
+            )
 
         # Calculate pagination
         offset = (page - 1) * page_size
         paginated_query = base_query.offset(offset).limit(page_size)
+        if count == "window":
+            paginated_query = paginated_query.add_columns(
+                func.count().over().label("total_count")
+            )
 
         # Execute query
-        results = self.db.execute(paginated_query).all()
-
-        # Process results
-        items = []
-        for result in results:
-            if len(result) == 2:  # Order and count
-                order, count = result
-                item_dict = order.__dict__
-                item_dict["count"] = count
-            elif len(result) == 3:  # Order, customer name, and count
-                order, customer, count = result
-                item_dict = order.__dict__
-                item_dict["customer"] = customer
-                item_dict["count"] = count
-
-            if "_sa_instance_state" in item_dict:
-                del item_dict["_sa_instance_state"]
-
-            items.append(item_dict)
+        items = [row._asdict() for row in self.db.execute(paginated_query)]
+
+        if count == "window":
+            if items:
+                total_items, count_exact = items[0]["total_count"], True
+            else:
+                total_items, count_exact = count_items(self.db, count_query, "exact")
+            for item in items:
+                del item["total_count"]
 
         # Build pagination info
-        page_count = (total_items + page_size - 1) // page_size
+        page_count = count_pages(total_items, page_size)
         previous_page = page - 1 if page > 1 else None
-        next_page = page + 1 if page < page_count else None
+        if page_count is None:
+            next_page = page + 1 if len(items) == page_size else None
+        else:
+            next_page = page + 1 if page < page_count else None
 
         return Pagination[dict](
             current_page=page,
             page_count=page_count,
             items=total_items,
+            count_exact=count_exact,
             previous=previous_page,
             next=next_page,
             data=items,
         )
 
-    def get_all_paginated(self, page: int = 1, page_size: int = 10):
+    def get_all_paginated(
+        self, page: int = 1, page_size: int = 10, count: CountStrategy = "exact"
+    ):
         """Get all orders with pagination."""
         base_query = self._build_base_order_query()
 
-        count_query = select(func.count()).select_from(
+        count_query = (
             select(OrderSchema.id)
             .join(PackageSchema, OrderSchema.id == PackageSchema.order_id)
             .group_by(OrderSchema.id)
-            .subquery()
         )
 
-        return self._execute_paginated_query(base_query, count_query, page, page_size)
+        return self._execute_paginated_query(
+            base_query, count_query, page, page_size, count, table="order"
+        )
 
     def get_by_merchant_id_paginated(
-        self, id: UUID, page: int = 1, page_size: int = 10
+        self,
+        id: UUID,
+        page: int = 1,
+        page_size: int = 10,
+        count: CountStrategy = "exact",
     ):
         """Get orders for a specific merchant with pagination."""
         base_query = self._build_base_order_query(merchant_id=id)
 
-        count_query = select(func.count()).select_from(
+        count_query = (
             select(OrderSchema.id)
             .join(PackageSchema, OrderSchema.id == PackageSchema.order_id)
             .where(OrderSchema.merchant_id == id)
             .group_by(OrderSchema.id)
-            .subquery()
         )
 
-        return self._execute_paginated_query(base_query, count_query, page, page_size)
+        return self._execute_paginated_query(
+            base_query, count_query, page, page_size, count, table="order"
+        )
 
+    @read_only
     def query_order_range(self, start_date: datetime, end_date: datetime):
         query = (
             select(
-                OrderSchema, MerchantSchema.company_name, func.count(PackageSchema.id)
+                *OrderSchema.__table__.columns,
+                MerchantSchema.company_name.label("customer"),
+                func.count(PackageSchema.id).label("count"),
             )
             .join(MerchantSchema, OrderSchema.merchant_id == MerchantSchema.account_id)
             .join(PackageSchema, OrderSchema.id == PackageSchema.order_id)
@@ -144,12 +163,4 @@ class OrderRepository(BaseRepository[OrderSchema, OrderCreate, OrderUpdate]):
             .limit(20)
         )
 
-        results = self.db.execute(query).all()
-
-        orders = []
-        for order, customer, count in results:
-            order_dict = order.__dict__
-            order_dict["customer"] = customer
-            order_dict["count"] = count
-            orders.append(order_dict)
-        return orders
+        return [row._asdict() for row in self.db.execute(query)]
@@ -1,23 +1,57 @@
 from datetime import timedelta, datetime
 from turtledemo.penrose import start
+from typing import Callable, Iterable
 from uuid import UUID, uuid4
 
-from sqlalchemy import and_, desc, cast, Date, func, Integer, text, select, String
+import numpy as np
+from sqlalchemy import (
+    and_,
+    false,
+    or_,
+    desc,
+    cast,
+    Date,
+    func,
+    Integer,
+    text,
+    insert,
+    select,
+    update,
+    String,
+    tuple_,
+)
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import Session
 from sqlalchemy.sql.functions import count
 
 from models.order import Order
-from models.package import PackageCreate, PackageUpdate, Package
+from models.package import PackageCreate, PackageUpdate, Package, PackageQuoteItem
 from models.pagination import Pagination
 from models.users.account import Account
 from repositories.base import BaseRepository
+from repositories.pagination import CountStrategy, count_items, count_pages
 from repositories.package_rate import PackageRateRepository
 from repositories.storage_block import StorageBlockRepository
+from schemas.address import AddressSchema
+from schemas.merchant_daily_stats import MerchantDailyStatsSchema
 from schemas.order import OrderSchema
 from schemas.package import PackageSchema
-from schemas.users import AccountSchema
+from schemas.package_rate import PackageRateSchema
+from schemas.storage_block import StorageBlockSchema
+from schemas.users import AccountSchema, MerchantSchema
 from seedings.package_rate import oversize_rate
+from utils.cursor import encode_cursor, decode_cursor
+from utils.export import PACKAGE_EXPORT_COLUMNS, write_packages_xlsx
+from utils.package_csv import ImportRow
+from utils.pricing import (
+    price_breakdown,
+    price_package,
+    price_packages,
+    shipping_cost_expression,
+)
+from utils.rate_cache import rate_cache
+from utils.routing import read_only
+from utils.search import phone_fragment, prefix_tsquery
 
 
 def satisfy_metric(volume, height):
@@ -25,6 +59,14 @@ def satisfy_metric(volume, height):
         raise ValueError("Volume and height must be larger than 0.0")
 
 
+# every column but search_vector, which only the search reads
+PACKAGE_COLUMNS = [
+    column
+    for column in PackageSchema.__table__.columns
+    if column.key != "search_vector"
+]
+
+
 class PackageRepository(BaseRepository[PackageSchema, PackageCreate, PackageUpdate]):
     def __init__(self, db: Session):
         super().__init__(db, PackageSchema)
@@ -44,11 +86,17 @@ class PackageRepository(BaseRepository[PackageSchema, PackageCreate, PackageUpda
         max_date: datetime | None = None,
         status: str | None = None,
         days_ago: int | None = None,
+        q: str | None = None,
     ):
-        """Helper method to build the base query with filters"""
+        """Helper method to build the base query with filters, it selects plain
+        columns so listings get light rows instead of ORM entities. With ``q``
+        the best matches come first instead of the newest"""
         query = (
-            self.db.query(PackageSchema)
-            .add_columns(OrderSchema.date, AccountSchema.name)
+            select(
+                *PACKAGE_COLUMNS,
+                OrderSchema.date.label("order_date"),
+                AccountSchema.name.label("merchant_name"),
+            )
             .join(OrderSchema, PackageSchema.order_id == OrderSchema.id)
             .join(AccountSchema, AccountSchema.id == PackageSchema.merchant_id)
         )
@@ -79,12 +127,28 @@ class PackageRepository(BaseRepository[PackageSchema, PackageCreate, PackageUpda
             date_threshold = datetime.now() - timedelta(days=days_ago)
             filters.append(OrderSchema.date >= date_threshold)
 
+        ranking = []
+        if q is not None:
+            tsquery = prefix_tsquery(q)
+            phone = phone_fragment(q)
+            matches = []
+            if tsquery:
+                tsquery = func.to_tsquery("simple", tsquery)
+                matches.append(PackageSchema.search_vector.bool_op("@@")(tsquery))
+                ranking.append(desc(func.ts_rank(PackageSchema.search_vector, tsquery)))
+            if phone:
+                matches.append(PackageSchema.phone.like(f"%{phone}%"))
+            # nothing searchable in q matches nothing
+            filters.append(or_(*matches) if matches else false())
+
         if filters:
-            query = query.filter(and_(*filters))
+            query = query.where(and_(*filters))
 
-        query = query.order_by(desc(OrderSchema.date))
+        # package id breaks ties so the order is stable for keyset pagination
+        query = query.order_by(*ranking, desc(OrderSchema.date), desc(PackageSchema.id))
         return query
 
+    @read_only
     def query_packages(
         self,
         merchant_id: UUID | None = None,
@@ -98,6 +162,7 @@ class PackageRepository(BaseRepository[PackageSchema, PackageCreate, PackageUpda
         max_date: datetime | None = None,
         status: str | None = None,
         days_ago: int | None = None,
+        q: str | None = None,
         limit: int = 20,
         offset: int = 0,
     ):
@@ -113,17 +178,13 @@ class PackageRepository(BaseRepository[PackageSchema, PackageCreate, PackageUpda
             max_date,
             status,
             days_ago,
+            q,
         )
 
-        results = query.offset(offset).limit(limit).all()
-        packages = []
-        for package, date, merchant in results:
-            package_dict = package.__dict__
-            package_dict["order_date"] = date
-            package_dict["merchant_name"] = merchant
-            packages.append(package_dict)
-        return packages
+        results = self.db.execute(query.offset(offset).limit(limit))
+        return [row._asdict() for row in results]
 
+    @read_only
     def query_packages_paginated(
         self,
         merchant_id: UUID | None = None,
@@ -137,8 +198,11 @@ class PackageRepository(BaseRepository[PackageSchema, PackageCreate, PackageUpda
         max_date: datetime | None = None,
         status: str | None = None,
         days_ago: int | None = None,
+        q: str | None = None,
         page: int = 1,
         page_size: int = 10,
+        cursor: str | None = None,
+        count: CountStrategy = "exact",
     ) -> Pagination:
         query = self._build_package_query(
             merchant_id,
@@ -152,38 +216,187 @@ class PackageRepository(BaseRepository[PackageSchema, PackageCreate, PackageUpda
             max_date,
             status,
             days_ago,
+            q,
         )
 
-        subquery = query.subquery()
-        count_query = self.db.query(func.count(subquery.c.id))
-
-        total_items = count_query.scalar() or 0
-
-        offset = (page - 1) * page_size
-        page_count = (total_items + page_size - 1) // page_size
-        previous_page = page - 1 if page > 1 else None
-        next_page = page + 1 if page < page_count else None
+        base_query = query
+        total_items, count_exact = None, False
+        if count != "window" or cursor:
+            total_items, count_exact = count_items(
+                self.db,
+                base_query,
+                "exact" if count == "window" else count,
+                table="package",
+                # days_ago rather than the cutoff it binds, which moves every call
+                key=(
+                    merchant_id,
+                    block_id,
+                    order_id,
+                    is_urgent,
+                    is_fragile,
+                    min_weight,
+                    max_weight,
+                    min_date,
+                    max_date,
+                    status,
+                    days_ago,
+                    q,
+                ),
+            )
 
-        results = query.offset(offset).limit(page_size).all()
+        if cursor and q is not None:
+            raise ValueError("cursor can't be combined with q, page with offset")
+        if cursor:
+            # keyset mode, seek past the last row of the previous page
+            cursor_date, cursor_id = decode_cursor(cursor)
+            query = query.where(
+                OrderSchema.date <= cursor_date,
+                tuple_(OrderSchema.date, PackageSchema.id)
+                < tuple_(cursor_date, cursor_id),
+            )
+        else:
+            query = query.offset((page - 1) * page_size)
+            if count == "window":
+                query = query.add_columns(func.count().over().label("total_count"))
+
+        # one extra row tells whether there is a next page without counting
+        results = self.db.execute(query.limit(page_size + 1)).all()
+        has_next = len(results) > page_size
+        packages = [row._asdict() for row in results[:page_size]]
+
+        if count == "window" and not cursor:
+            if packages:
+                total_items, count_exact = packages[0]["total_count"], True
+            else:
+                # past the last page there is no row to carry the count
+                total_items, count_exact = count_items(self.db, base_query, "exact")
+            for package in packages:
+                del package["total_count"]
 
-        packages = []
-        for package, date, merchant in results:
-            package_dict = package.__dict__
-            package_dict["order_date"] = date
-            package_dict["merchant_name"] = merchant
-            if "_sa_instance_state" in package_dict:
-                del package_dict["_sa_instance_state"]
-            packages.append(package_dict)
+        next_cursor = None
+        # search results are ranked, the cursor only knows date order
+        if has_next and q is None:
+            last = packages[-1]
+            next_cursor = encode_cursor(last["order_date"], last["id"])
 
         return Pagination[dict](
             current_page=page,
-            page_count=page_count,
+            page_count=count_pages(total_items, page_size),
             items=total_items,
-            previous=previous_page,
-            next=next_page,
+            count_exact=count_exact,
+            previous=page - 1 if page > 1 and not cursor else None,
+            next=page + 1 if has_next and not cursor else None,
+            next_cursor=next_cursor,
             data=packages,
         )
 
+    def _export_summary(self, query) -> dict:
+        """Totals and the longest text of every exported column, all in one pass
+        over the filtered rows"""
+        rows = query.subquery()
+        columns = [
+            func.max(func.length(cast(rows.c[column], String))).label(column)
+            for column in PACKAGE_EXPORT_COLUMNS
+        ]
+        summary = (
+            self.db.execute(
+                select(
+                    func.count().label("count"),
+                    func.coalesce(func.sum(rows.c.cod_cost), 0).label("sum_cod"),
+                    func.coalesce(func.sum(rows.c.shipping_cost), 0).label(
+                        "sum_shipping"
+                    ),
+                    *columns,
+                )
+            )
+            .one()
+            ._asdict()
+        )
+
+        return {
+            "count": summary.pop("count"),
+            "sum_cod": summary.pop("sum_cod"),
+            "sum_shipping": summary.pop("sum_shipping"),
+            "widths": summary,
+        }
+
+    @read_only
+    def export_packages_xlsx(
+        self,
+        path: str,
+        exported_on: str,
+        merchant_id: UUID | None = None,
+        block_id: UUID | None = None,
+        order_id: UUID | None = None,
+        is_urgent: bool | None = None,
+        is_fragile: bool | None = None,
+        min_weight: float | None = None,
+        max_weight: float | None = None,
+        status: str | None = None,
+        days_ago: int = 365,
+        limit: int = 999999,
+        offset: int = 0,
+        batch_size: int = 1000,
+    ):
+        """Writes the package report to ``path``, rows are fetched ``batch_size``
+        at a time through a server side cursor so they are never all in memory"""
+        query = (
+            self._build_package_query(
+                merchant_id=merchant_id,
+                block_id=block_id,
+                order_id=order_id,
+                is_urgent=is_urgent,
+                is_fragile=is_fragile,
+                min_weight=min_weight,
+                max_weight=max_weight,
+                status=status,
+                days_ago=days_ago,
+            )
+            .offset(offset)
+            .limit(limit)
+        )
+
+        summary = self._export_summary(query)
+        rows = self.db.execute(query.execution_options(yield_per=batch_size))
+        write_packages_xlsx(
+            path,
+            (row._mapping for row in rows),
+            summary,
+            days_ago,
+            exported_on,
+        )
+
+    def build_export_query(
+        self,
+        merchant_id: UUID | None = None,
+        block_id: UUID | None = None,
+        order_id: UUID | None = None,
+        is_urgent: bool | None = None,
+        is_fragile: bool | None = None,
+        min_weight: float | None = None,
+        max_weight: float | None = None,
+        status: str | None = None,
+        days_ago: int = 365,
+        limit: int = 999999,
+        offset: int = 0,
+    ):
+        """Same filters as the export, narrowed to the exported columns. It is only
+        built here, COPY runs it on a connection of its own while streaming"""
+        query = self._build_package_query(
+            merchant_id=merchant_id,
+            block_id=block_id,
+            order_id=order_id,
+            is_urgent=is_urgent,
+            is_fragile=is_fragile,
+            min_weight=min_weight,
+            max_weight=max_weight,
+            status=status,
+            days_ago=days_ago,
+        )
+        columns = [query.selected_columns[column] for column in PACKAGE_EXPORT_COLUMNS]
+        return query.with_only_columns(*columns).offset(offset).limit(limit)
+
+    @read_only
     def query_package_days_ago(self, id: UUID, days_ago: int = 5):
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=days_ago - 1)
@@ -194,20 +407,15 @@ class PackageRepository(BaseRepository[PackageSchema, PackageCreate, PackageUpda
             .label("date")
         ).cte("date_series")
 
+        # one pre-aggregated row per day, kept current by triggers
         packages_count = (
-            select(
-                cast(OrderSchema.date, Date).label("date"),
-                func.count(PackageSchema.id).label("count"),
-                func.sum(PackageSchema.shipping_cost).label("shipping"),
-                func.sum(PackageSchema.cod_cost).label("cod"),
-            )
-            .join(OrderSchema, PackageSchema.order_id == OrderSchema.id)
-            .filter(
-                cast(OrderSchema.date, Date) >= start_date,
-                OrderSchema.merchant_id == id,
+            select(MerchantDailyStatsSchema)
+            .where(
+                MerchantDailyStatsSchema.merchant_id == id,
+                MerchantDailyStatsSchema.date.between(start_date, end_date),
             )
-            .group_by(cast(OrderSchema.date, Date))
-        ).subquery()
+            .subquery()
+        )
 
         query = (
             select(
@@ -232,23 +440,216 @@ class PackageRepository(BaseRepository[PackageSchema, PackageCreate, PackageUpda
         ]
         return daily_counts
 
+    @read_only
+    def staff_overview(self, start_date: datetime, end_date: datetime, top: int = 5):
+        """What the staff dashboard shows for packages ordered in the range,
+        aggregated in a single pass with grouping sets"""
+        day = cast(OrderSchema.date, Date)
+        query = (
+            select(
+                func.grouping(PackageSchema.status).label("by_status"),
+                func.grouping(day).label("by_day"),
+                func.grouping(OrderSchema.merchant_id).label("by_merchant"),
+                PackageSchema.status,
+                day.label("date"),
+                OrderSchema.merchant_id,
+                func.count(PackageSchema.id).label("count"),
+                func.count(func.distinct(OrderSchema.id)).label("orders"),
+                func.coalesce(func.sum(PackageSchema.shipping_cost), 0).label(
+                    "shipping"
+                ),
+                func.coalesce(func.sum(PackageSchema.cod_cost), 0).label("cod"),
+            )
+            .join(OrderSchema, PackageSchema.order_id == OrderSchema.id)
+            .where(OrderSchema.date >= start_date, OrderSchema.date <= end_date)
+            .group_by(
+                func.grouping_sets(
+                    tuple_(PackageSchema.status),
+                    tuple_(day),
+                    tuple_(OrderSchema.merchant_id),
+                    tuple_(),
+                )
+            )
+        )
+
+        totals = {"count": 0, "orders": 0, "shipping": 0, "cod": 0}
+        statuses, days, merchants = [], [], []
+        for row in self.db.execute(query):
+            values = {
+                "count": row.count,
+                "shipping": row.shipping,
+                "cod": row.cod,
+            }
+            # grouping() is 0 for the column the row is grouped by
+            if not row.by_status:
+                statuses.append({"status": row.status, **values})
+            elif not row.by_day:
+                days.append({"date": row.date, **values})
+            elif not row.by_merchant:
+                merchants.append({"merchant_id": row.merchant_id, **values})
+            else:
+                totals = {**values, "orders": row.orders}
+
+        merchants = sorted(merchants, key=lambda m: m["shipping"], reverse=True)[:top]
+        names = dict(
+            self.db.execute(
+                select(MerchantSchema.account_id, MerchantSchema.company_name).where(
+                    MerchantSchema.account_id.in_(m["merchant_id"] for m in merchants)
+                )
+            ).all()
+        )
+        for merchant in merchants:
+            merchant["name"] = names.get(merchant["merchant_id"])
+
+        return {
+            **totals,
+            # status is nullable, those go last
+            "status": sorted(
+                statuses, key=lambda s: (s["status"] is None, s["status"] or "")
+            ),
+            "days": sorted(days, key=lambda d: d["date"]),
+            "top_merchants": merchants,
+        }
+
     def calculate_package_pricing(self, package: PackageCreate) -> float:
-        rate = self.package_rate.get_by_id(package.package_rate_id)
-        # 50000 cm3 standard base for oversize
-        oversize = package.length * package.width * package.height - 50000
-        overweight = int(package.weight - rate.base_weight)
-        urgent = rate.urgent_rate if package.is_urgent else 0
-        fragile = rate.fragile_rate if package.is_fragile else 0
-
-        total_fee = (
-            rate.base_rate
-            + urgent
-            + fragile
-            + (rate.oversize_rate if oversize > 0 else 0)
-            + (overweight * rate.overweight_rate_per_kg if overweight > 0 else 0)
+        rate = rate_cache.get(self.db, package.package_rate_id)
+        if rate is None:
+            raise ValueError(f"Package rate {package.package_rate_id} does not exist")
+        return price_package(package, rate)
+
+    def quote(self, items: list[PackageQuoteItem]) -> list[dict]:
+        """Prices and fee breakdown of every item, nothing is written. Rates come
+        from the rate cache so a warm quote does not touch the database"""
+        rates = rate_cache.get_many(self.db, {item.package_rate_id for item in items})
+        missing = {item.package_rate_id for item in items} - rates.keys()
+        if missing:
+            raise ValueError(
+                f"Package rate {', '.join(str(id) for id in missing)} does not exist"
+            )
+
+        rate_list = list(rates.values())
+        positions = {rate.id: i for i, rate in enumerate(rate_list)}
+        fees = price_breakdown(
+            np.array([item.length for item in items], dtype=np.float64),
+            np.array([item.width for item in items], dtype=np.float64),
+            np.array([item.height for item in items], dtype=np.float64),
+            np.array([item.weight for item in items], dtype=np.float64),
+            np.array([item.is_urgent for item in items], dtype=bool),
+            np.array([item.is_fragile for item in items], dtype=bool),
+            np.array([positions[item.package_rate_id] for item in items]),
+            rates=rate_list,
+        )
+        columns = {name: values.tolist() for name, values in fees.items()}
+        return [
+            {
+                "package_rate_id": item.package_rate_id,
+                **{name: values[i] for name, values in columns.items()},
+            }
+            for i, item in enumerate(items)
+        ]
+
+    def _reprice_query(
+        self,
+        rate_id: UUID | None,
+        statuses: list[str] | None,
+        after_id: UUID | None = None,
+        limit: int | None = None,
+    ):
+        """Current and recomputed price of the packages to reprice, in id order"""
+        new_cost = shipping_cost_expression(PackageSchema, PackageRateSchema)
+        query = (
+            select(
+                PackageSchema.id,
+                PackageSchema.shipping_cost.label("old"),
+                new_cost.label("new"),
+            )
+            .join(
+                PackageRateSchema, PackageSchema.package_rate_id == PackageRateSchema.id
+            )
+            .order_by(PackageSchema.id)
         )
+        if rate_id:
+            query = query.where(PackageSchema.package_rate_id == rate_id)
+        if statuses:
+            query = query.where(PackageSchema.status.in_(statuses))
+        if after_id:
+            query = query.where(PackageSchema.id > after_id)
+        if limit:
+            query = query.limit(limit)
+        return query
 
-        return total_fee
+    def _reprice_batch(self, query) -> tuple[int, float, UUID | None]:
+        """One UPDATE for every package of ``query`` whose price changed, returns
+        the packages changed, the total difference and the last id looked at"""
+        batch = query.with_for_update(of=PackageSchema).cte("batch")
+        updated = (
+            update(PackageSchema)
+            .where(
+                PackageSchema.id == batch.c.id,
+                PackageSchema.shipping_cost.is_distinct_from(batch.c.new),
+            )
+            .values(shipping_cost=batch.c.new)
+            .returning((batch.c.new - func.coalesce(batch.c.old, 0)).label("delta"))
+            .cte("updated")
+        )
+        # a single statement, the CTEs run once
+        changed, delta, last_id = self.db.execute(
+            select(
+                select(func.count()).select_from(updated).scalar_subquery(),
+                select(func.coalesce(func.sum(updated.c.delta), 0)).scalar_subquery(),
+                # there is no max(uuid)
+                select(batch.c.id)
+                .order_by(desc(batch.c.id))
+                .limit(1)
+                .scalar_subquery(),
+            )
+        ).one()
+        return changed, delta, last_id
+
+    def reprice(
+        self,
+        rate_id: UUID | None = None,
+        statuses: list[str] | None = None,
+        dry_run: bool = False,
+        batch_size: int | None = None,
+    ) -> dict:
+        """Recomputes shipping_cost in the database after a rate changed.
+
+        Without ``batch_size`` it is a single UPDATE ... FROM packagerate, with it
+        the packages are walked in id order and every batch is its own short
+        transaction. ``dry_run`` only reports what would change.
+        """
+        if dry_run:
+            rows = self._reprice_query(rate_id, statuses).order_by(None).subquery()
+            differs = rows.c.old.is_distinct_from(rows.c.new)
+            changed, delta = self.db.execute(
+                select(
+                    func.count().filter(differs),
+                    func.coalesce(
+                        func.sum(rows.c.new - func.coalesce(rows.c.old, 0)).filter(
+                            differs
+                        ),
+                        0,
+                    ),
+                )
+            ).one()
+            return {"dry_run": True, "packages": changed, "delta": delta}
+
+        changed, delta, after_id = 0, 0.0, None
+        try:
+            while True:
+                query = self._reprice_query(rate_id, statuses, after_id, batch_size)
+                batch_changed, batch_delta, after_id = self._reprice_batch(query)
+                self.db.commit()
+                changed += batch_changed
+                delta += batch_delta
+                if not batch_size or after_id is None:
+                    break
+        except Exception:
+            self.db.rollback()
+            raise
+
+        return {"dry_run": False, "packages": changed, "delta": delta}
 
     def refresh_package_pricing(self, id: UUID):
         package = self.get_by_id(id)
@@ -276,51 +677,176 @@ class PackageRepository(BaseRepository[PackageSchema, PackageCreate, PackageUpda
 
         return super().create(package)
 
-    def bulk_create(self, packages: list[PackageCreate]) -> list[PackageSchema]:
-        created_packages = []
+    def _get_block_usage(self, block_ids: set[UUID]) -> dict[UUID, dict]:
+        """Limits and current usage of the blocks, one query for all"""
+        query = select(
+            StorageBlockSchema.id,
+            StorageBlockSchema.max_weight,
+            StorageBlockSchema.max_size,
+            StorageBlockSchema.max_package,
+            StorageBlockSchema.current_weight.label("weight"),
+            StorageBlockSchema.current_size.label("size"),
+            StorageBlockSchema.current_count.label("count"),
+        )
+        # locked until the packages are committed, in id order against deadlocks
+        query = (
+            query.where(StorageBlockSchema.id.in_(block_ids))
+            .order_by(StorageBlockSchema.id)
+            .with_for_update()
+        )
+        return {row.id: row._asdict() for row in self.db.execute(query)}
+
+    def _load_for_batch(
+        self, packages: list[PackageCreate], rates: dict, blocks: dict, addresses: dict
+    ) -> None:
+        """Loads the rates, block usage and addresses the batch needs and are not
+        known yet. Usage of known blocks is kept in memory, it already counts the
+        packages inserted earlier in the transaction"""
+        rate_ids = {package.package_rate_id for package in packages} - rates.keys()
+        if rate_ids:
+            rates.update(rate_cache.get_many(self.db, rate_ids))
+        address_ids = {package.address_id for package in packages} - addresses.keys()
+        if address_ids:
+            found = set(
+                self.db.scalars(
+                    select(AddressSchema.id).where(AddressSchema.id.in_(address_ids))
+                )
+            )
+            addresses.update({id: id in found for id in address_ids})
+        block_ids = {
+            package.block_id for package in packages if package.block_id
+        } - blocks.keys()
+        if block_ids:
+            blocks.update(self._get_block_usage(block_ids))
+
+    def _prepare_package(
+        self,
+        package: PackageCreate,
+        shipping_cost: float | None,
+        blocks: dict,
+        addresses: dict,
+    ) -> dict:
+        """Sets the batch computed price and books the package's space in
+        ``blocks``, raises ValueError without touching ``blocks`` if it can't be
+        created. ``shipping_cost`` is None when the rate does not exist"""
+        if not addresses[package.address_id]:
+            raise ValueError("unknown address")
+        if shipping_cost is None:
+            raise ValueError(f"Package rate {package.package_rate_id} does not exist")
+        package.shipping_cost = shipping_cost
+
+        # Validate storage block constraints if block_id is provided
+        if package.block_id:
+            volume = package.width * package.height * package.length
+            weight = package.weight
 
-        try:
-            # Begin transaction explicitly (though SQLAlchemy sessions are already transactional)
-            for package in packages:
-                # Calculate shipping cost
-                package.shipping_cost = self.calculate_package_pricing(package)
+            try:
+                satisfy_metric(volume, weight)
+            except ValueError as e:
+                raise ValueError(f"Invalid package metrics: {str(e)}")
+
+            block = blocks.get(package.block_id)
+            if block is None:
+                raise ValueError(f"Storage block {package.block_id} does not exist")
+            if (
+                block["weight"] + weight > block["max_weight"]
+                or block["size"] + volume > block["max_size"]
+                or block["count"] + 1 > block["max_package"]
+            ):
+                raise ValueError(
+                    f"Package with dimensions {package.width}x{package.height}x{package.length} "
+                    f"and weight {package.weight} exceeds the limit of the block {package.block_id}"
+                )
+            block["weight"] += weight
+            block["size"] += volume
+            block["count"] += 1
 
-                # Validate storage block constraints if block_id is provided
-                if package.block_id:
-                    volume = package.width * package.height * package.length
-                    weight = package.weight
+        package_dict = package.model_dump()
+        package_dict["id"] = uuid4()
+        return package_dict
 
-                    try:
-                        satisfy_metric(volume, weight)
-                    except ValueError as e:
-                        raise ValueError(f"Invalid package metrics: {str(e)}")
+    def _insert_packages(self, packages: list[dict]) -> None:
+        # executemany, batched into multi-row INSERTs by the driver
+        if packages:
+            self.db.execute(insert(PackageSchema), packages)
 
-                    is_exceed_limit = self.storage_block.check_if_exceed_limit(
-                        volume, weight, package.block_id
+    def import_packages(
+        self,
+        rows: Iterable[ImportRow],
+        batch_size: int = 1000,
+        skip_invalid: bool = False,
+        max_errors: int = 1000,
+        progress: Callable[[int, int], None] | None = None,
+        before_commit: Callable[[dict], None] | None = None,
+        order: Order | None = None,
+    ) -> dict:
+        """Creates packages from ``rows`` of (line, package, parse error), holding
+        at most ``batch_size`` packages at a time. ``order``, the one the rows
+        belong to, is created along with them.
+
+        By default the first bad row rolls everything back and raises ValueError
+        with its line. With ``skip_invalid`` bad rows are left out and reported,
+        the first ``max_errors`` of them with their line and reason. ``progress``
+        is called with the rows processed and rejected so far after each batch,
+        ``before_commit`` with the report in the transaction of the packages,
+        either can raise to roll everything back.
+        """
+        rates, blocks, addresses = {}, {}, {}
+        created, rejected, errors = 0, 0, []
+
+        def reject(line: int, error: str):
+            nonlocal rejected
+            if not skip_invalid:
+                raise ValueError(f"Line {line}: {error}")
+            rejected += 1
+            if len(errors) < max_errors:
+                errors.append({"line": line, "error": error})
+
+        def flush(batch: list[tuple[int, PackageCreate]]):
+            nonlocal created
+            packages = [package for _, package in batch]
+            self._load_for_batch(packages, rates, blocks, addresses)
+            prices = price_packages(packages, rates)
+            prepared = []
+            for (line, package), price in zip(batch, prices):
+                try:
+                    prepared.append(
+                        self._prepare_package(package, price, blocks, addresses)
                     )
-                    if is_exceed_limit:
-                        raise ValueError(
-                            f"Package with dimensions {package.width}x{package.height}x{package.length} "
-                            f"and weight {package.weight} exceeds the limit of the block {package.block_id}"
-                        )
-
-                # Create the package
-                package_dict = package.model_dump()
-                package_dict["id"] = uuid4()
-                db_obj = PackageSchema(**package_dict)
-                self.db.add(db_obj)
-                self.db.flush()
-
-                created_packages.append(db_obj)
-
-            # If we get here, all packages were created successfully
-            self.db.commit()
-            return created_packages
+                except ValueError as e:
+                    reject(line, str(e))
+            self._insert_packages(prepared)
+            created += len(prepared)
+            if progress:
+                progress(created + rejected, rejected)
 
-        except Exception as e:
-            # Any exception will trigger a rollback
+        try:
+            if order is not None:
+                self.db.execute(insert(OrderSchema), order.model_dump())
+            batch = []
+            for line, package, error in rows:
+                if error is not None:
+                    reject(line, error)
+                    continue
+                batch.append((line, package))
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+            flush(batch)
+            report = {
+                "message": "Bulk upload successful",
+                "created_packages": created,
+                "rejected_packages": rejected,
+                "errors": errors,
+            }
+            if before_commit:
+                before_commit(report)
+            self.db.commit()
+        except Exception:
             self.db.rollback()
-            raise ValueError(f"Bulk package creation failed: {str(e)}")
+            raise
+
+        return report
 
     def update(self, id: UUID, package_updated: PackageUpdate) -> PackageSchema | None:
         package = self.get_by_id(id)
@@ -344,9 +870,16 @@ class PackageRepository(BaseRepository[PackageSchema, PackageCreate, PackageUpda
 
         weight = package_updated.weight if package_updated.weight else package.weight
 
-        if package_updated.block_id:
+        block_id = package_updated.block_id or package.block_id
+        resized = any(
+            getattr(package_updated, field) is not None
+            for field in ("width", "height", "length", "weight")
+        )
+        if block_id and (package_updated.block_id or resized):
+            # a move changes both blocks, lock them in the same order as anyone else
+            self.storage_block.lock([package.block_id, block_id])
             is_exceed_limit = self.storage_block.check_if_exceed_limit(
-                volume, weight, package_updated.block_id, exclude_package=id
+                volume, weight, block_id, exclude_package=id
             )
 
             if is_exceed_limit:
@@ -356,3 +889,81 @@ class PackageRepository(BaseRepository[PackageSchema, PackageCreate, PackageUpda
                 )
 
         return super().update(id, package_updated)
+
+    def move_to_block(
+        self,
+        block_id: UUID,
+        package_ids: list[UUID] | None = None,
+        from_block_ids: list[UUID] | None = None,
+    ) -> dict:
+        """Moves the packages, given by id, by the blocks they are in, or both,
+        to ``block_id`` in one transaction. Capacity is checked once for the
+        whole set, all or nothing, and the move is a single UPDATE.
+        Packages already in the block are left out"""
+        if package_ids is None and from_block_ids is None:
+            raise ValueError("Give the packages to move or the blocks to empty")
+
+        conditions = [PackageSchema.block_id.is_distinct_from(block_id)]
+        if package_ids is not None:
+            conditions.append(PackageSchema.id.in_(package_ids))
+        if from_block_ids is not None:
+            conditions.append(PackageSchema.block_id.in_(from_block_ids))
+
+        try:
+            sources = self.db.scalars(
+                select(PackageSchema.block_id).where(*conditions).distinct()
+            ).all()
+            # every block that changes, in the same order as single moves
+            self.storage_block.lock([block_id, *sources])
+            block = self.storage_block.get_occupancy(block_id)
+            if block is None:
+                raise ValueError(f"Storage block {block_id} does not exist")
+
+            # a package that changed block before the lock is not moved
+            locked = [source for source in sources if source is not None]
+            moving = self.db.execute(
+                select(
+                    PackageSchema.id,
+                    func.coalesce(PackageSchema.weight, 0).label("weight"),
+                    func.coalesce(
+                        PackageSchema.width
+                        * PackageSchema.height
+                        * PackageSchema.length,
+                        0,
+                    ).label("size"),
+                )
+                .where(
+                    *conditions,
+                    or_(
+                        PackageSchema.block_id.in_(locked),
+                        PackageSchema.block_id.is_(None),
+                    ),
+                )
+                .order_by(PackageSchema.id)
+                .with_for_update()
+            ).all()
+
+            weight = sum(package.weight for package in moving)
+            size = sum(package.size for package in moving)
+            if (
+                block.current_weight + weight > block.max_weight
+                or block.current_size + size > block.max_size
+                or block.current_count + len(moving) > block.max_package
+            ):
+                raise ValueError(
+                    f"Moving {len(moving)} packages would exceed the limits of the block"
+                )
+
+            if moving:
+                self.db.execute(
+                    update(PackageSchema)
+                    .where(PackageSchema.id.in_([package.id for package in moving]))
+                    .values(block_id=block_id)
+                    .execution_options(synchronize_session=False)
+                )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        return {"moved": len(moving), "weight": weight, "size": size}
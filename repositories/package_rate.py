@@ -1,8 +1,12 @@
+from uuid import UUID
+
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from models.package_rate import PackageRateCreate, PackageRateUpdate
 from repositories.base import BaseRepository
 from schemas.package_rate import PackageRateSchema
+from utils.rate_cache import RATE_CHANNEL, rate_cache
 
 
 class PackageRateRepository(
@@ -10,3 +14,25 @@ class PackageRateRepository(
 ):
     def __init__(self, db: Session):
         super().__init__(db, PackageRateSchema)
+
+    def _notify_changed(self):
+        # delivered to the other processes only when the transaction commits
+        self.db.execute(select(func.pg_notify(RATE_CHANNEL, "")))
+
+    def create(self, schema: PackageRateCreate) -> PackageRateSchema:
+        self._notify_changed()
+        package_rate = super().create(schema)
+        rate_cache.invalidate()
+        return package_rate
+
+    def update(self, id: UUID, schema: PackageRateUpdate) -> PackageRateSchema | None:
+        self._notify_changed()
+        package_rate = super().update(id, schema)
+        rate_cache.invalidate()
+        return package_rate
+
+    def delete(self, id: UUID) -> PackageRateSchema:
+        self._notify_changed()
+        package_rate = super().delete(id)
+        rate_cache.invalidate()
+        return package_rate
@@ -0,0 +1,100 @@
+import hashlib
+import os
+import threading
+from typing import Literal
+
+from cachetools import TTLCache
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.orm import Session
+
+# exact: COUNT over the filtered query
+# window: count(*) OVER () on the page query itself, no second pass
+# cached: exact count cached per query + filters for COUNT_CACHE_TTL seconds
+# estimate: planner estimate, pg_class.reltuples when unfiltered else EXPLAIN rows
+# none: skip counting
+CountStrategy = Literal["exact", "window", "cached", "estimate", "none"]
+
+_count_cache = TTLCache(maxsize=1024, ttl=int(os.getenv("COUNT_CACHE_TTL", "60")))
+_count_cache_lock = threading.Lock()
+
+
+def _cache_key(db: Session, query: Select, key: tuple | None = None) -> str:
+    compiled = query.compile(dialect=db.get_bind().dialect)
+    if key is None:
+        key = tuple(sorted(compiled.params.items()))
+    return hashlib.sha1(f"{compiled}|{key!r}".encode()).hexdigest()
+
+
+def _exact_count(db: Session, query: Select) -> int:
+    count_query = select(func.count()).select_from(query.order_by(None).subquery())
+    return db.execute(count_query).scalar() or 0
+
+
+def _cached_count(
+    db: Session, query: Select, key: tuple | None = None
+) -> tuple[int, bool]:
+    key = _cache_key(db, query, key)
+    with _count_cache_lock:
+        cached = _count_cache.get(key)
+    if cached is not None:
+        return cached, False
+
+    total = _exact_count(db, query)
+    with _count_cache_lock:
+        _count_cache[key] = total
+    return total, True
+
+
+def _explain_rows(db: Session, query: Select) -> int:
+    compiled = query.order_by(None).compile(dialect=db.get_bind().dialect)
+    plan = (
+        db.connection()
+        .exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params)
+        .scalar()
+    )
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _estimated_count(db: Session, query: Select, table: str | None) -> int:
+    # the table statistics only describe the listing when nothing is filtered
+    if table is not None and query.whereclause is None:
+        reltuples = db.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": f'"{table}"'},
+        ).scalar()
+        # -1 means the table was never analyzed
+        if reltuples is not None and reltuples >= 0:
+            return int(reltuples)
+    return _explain_rows(db, query)
+
+
+def count_items(
+    db: Session,
+    query: Select,
+    strategy: CountStrategy,
+    table: str | None = None,
+    key: tuple | None = None,
+) -> tuple[int | None, bool]:
+    """Total rows of ``query`` and whether that number is exact.
+
+    ``table`` is the main table of the listing, when the query has no filters the
+    estimate comes straight from its statistics. ``window`` counts are read from
+    the page rows by the caller, here they are counted exactly.
+
+    ``key`` stands in for the bound parameters when caching, pass the filter
+    arguments when the query binds values that change on every call, like a
+    cutoff computed from ``datetime.now()``.
+    """
+    if strategy == "none":
+        return None, False
+    if strategy == "cached":
+        return _cached_count(db, query, key)
+    if strategy == "estimate":
+        return _estimated_count(db, query, table), False
+    return _exact_count(db, query), True
+
+
+def count_pages(total_items: int | None, page_size: int) -> int | None:
+    if total_items is None:
+        return None
+    return (total_items + page_size - 1) // page_size
@@ -1,6 +1,20 @@
+from typing import Iterable
 from uuid import UUID
 
-from sqlalchemy import and_, text, func, select
+import numpy as np
+from sqlalchemy import (
+    Float,
+    and_,
+    cast,
+    column,
+    or_,
+    text,
+    func,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
 from sqlalchemy.orm import Session
 
 from models.package import Package
@@ -8,6 +22,11 @@ from models.storage_block import StorageBlockCreate, StorageBlockUpdate, Storage
 from repositories.base import BaseRepository
 from schemas.package import PackageSchema
 from schemas.storage_block import StorageBlockSchema
+from utils.allocation import UNPLACED, first_fit_decreasing
+from utils.routing import read_only
+
+# relative difference between current_* and the real sums that counts as drift
+DRIFT_TOLERANCE = 1e-9
 
 
 class StorageBlockRepository(
@@ -18,18 +37,17 @@ class StorageBlockRepository(
 
     def update(self, id: UUID, schema: StorageBlockUpdate) -> StorageBlockSchema | None:
         try:
-            curr_size = self.get_sum_size(id)
-            if schema.max_size and curr_size > schema.max_size:
+            # packages can't be added while the limits are checked and changed
+            block = self.get_occupancy(id, lock=True)
+            if schema.max_size and block.current_size > schema.max_size:
                 raise ValueError(
                     "You can't adjust size that would overload existing packages"
                 )
-            curr_weight = self.get_sum_weight(id)
-            if schema.max_weight and curr_weight > schema.max_weight:
+            if schema.max_weight and block.current_weight > schema.max_weight:
                 raise ValueError(
                     "You can't adjust weight that would overload existing packages"
                 )
-            curr_count = self.get_sum_count(id)
-            if schema.max_package and curr_count > schema.max_package:
+            if schema.max_package and block.current_count > schema.max_package:
                 raise ValueError(
                     "You can't adjust count that would overload existing packages"
                 )
@@ -38,96 +56,281 @@ class StorageBlockRepository(
         except Exception as e:
             print(e)
 
-    def get_sum_size(self, block_id: UUID | None) -> float:
-        total_volume = (
-            self.db.query(
-                func.sum(
-                    PackageSchema.width * PackageSchema.length * PackageSchema.height
-                )
+    def lock(self, block_ids: Iterable[UUID | None]):
+        """Locks the blocks until the transaction ends. Always in id order, so
+        two transactions locking some of the same blocks can't deadlock"""
+        ids = sorted({id for id in block_ids if id})
+        if ids:
+            self.db.execute(
+                select(StorageBlockSchema.id)
+                .where(StorageBlockSchema.id.in_(ids))
+                .order_by(StorageBlockSchema.id)
+                .with_for_update()
             )
-            .filter(PackageSchema.block_id == block_id)
-            .scalar()
-        )
-        return 0.0 if total_volume is None else float(total_volume)
+
+    def get_occupancy(self, block_id: UUID | None, lock: bool = False):
+        """Limits and current_* of the block, None if there is no such block.
+        With ``lock`` they can't change until the transaction ends"""
+        query = select(
+            StorageBlockSchema.max_weight,
+            StorageBlockSchema.max_size,
+            StorageBlockSchema.max_package,
+            StorageBlockSchema.current_weight,
+            StorageBlockSchema.current_size,
+            StorageBlockSchema.current_count,
+        ).where(StorageBlockSchema.id == block_id)
+        if lock:
+            query = query.with_for_update()
+        return self.db.execute(query).first()
+
+    def get_sum_size(self, block_id: UUID | None) -> float:
+        block = self.get_occupancy(block_id)
+        return 0.0 if block is None else float(block.current_size)
 
     def get_sum_count(self, block_id: UUID | None) -> int:
-        total_count = (
-            self.db.query(func.count(PackageSchema.id))
-            .filter(PackageSchema.block_id == block_id)
-            .scalar()
-        )
-        return 0 if total_count is None else int(total_count)
+        block = self.get_occupancy(block_id)
+        return 0 if block is None else int(block.current_count)
 
     def get_sum_weight(self, block_id: UUID | None) -> float:
-        total_weight = (
-            self.db.query(func.sum(PackageSchema.weight))
-            .filter(PackageSchema.block_id == block_id)
-            .scalar()
-        )
-        return 0.0 if total_weight is None else float(total_weight)
+        block = self.get_occupancy(block_id)
+        return 0.0 if block is None else float(block.current_weight)
 
     def check_if_exceed_limit(
         self, volume, weight, block_id: UUID | None, exclude_package: UUID | None = None
     ) -> bool:
         # sometimes you might need to check a package already in a block if modify it exceed limit, in that case
         # pass its id to exclude
+        # the block stays locked until the caller commits, so what passes the
+        # check still fits when the package is written
+        block = self.get_occupancy(block_id, lock=True)
+        if block is None:
+            raise ValueError(f"Storage block {block_id} does not exist")
+        current_weight = block.current_weight
+        current_size = block.current_size
+        current_count = block.current_count
 
-        sql = text(
-            """
-            SELECT max_weight, max_size, max_package 
-            FROM parcelpoint.public.storageblock
-            WHERE storageblock.id = :id
+        if exclude_package:
+            package = self.db.execute(
+                select(
+                    PackageSchema.block_id,
+                    PackageSchema.weight,
+                    PackageSchema.width * PackageSchema.height * PackageSchema.length,
+                ).where(PackageSchema.id == exclude_package)
+            ).first()
+            # only counted in the block if it is there already
+            if package and package.block_id == block_id:
+                current_weight -= package[1]
+                current_size -= package[2]
+                current_count -= 1
+
+        if current_weight + weight > block.max_weight:
+            return True
+        if current_size + volume > block.max_size:
+            return True
+        return current_count + 1 > block.max_package
+
+    def reconcile(self, repair: bool = False) -> list[dict]:
+        """Compares current_* of every block with its packages, and with
+        ``repair`` sets them to the real values. Returns the blocks that were
+        off. Package writes wait while it runs so the comparison is exact"""
+        usage = (
+            select(
+                PackageSchema.block_id,
+                func.sum(PackageSchema.weight).label("weight"),
+                func.sum(
+                    PackageSchema.width * PackageSchema.length * PackageSchema.height
+                ).label("size"),
+                func.count(PackageSchema.id).label("count"),
+            )
+            .where(PackageSchema.block_id.is_not(None))
+            .group_by(PackageSchema.block_id)
+            .subquery()
+        )
+        weight = func.coalesce(usage.c.weight, 0)
+        size = func.coalesce(usage.c.size, 0)
+        count = func.coalesce(usage.c.count, 0)
+        query = (
+            select(
+                StorageBlockSchema.id,
+                StorageBlockSchema.current_weight,
+                StorageBlockSchema.current_size,
+                StorageBlockSchema.current_count,
+                weight.label("weight"),
+                size.label("size"),
+                count.label("count"),
+            )
+            .outerjoin(usage, usage.c.block_id == StorageBlockSchema.id)
+            .where(
+                or_(
+                    # floats pick up rounding errors from adding and subtracting
+                    func.abs(StorageBlockSchema.current_weight - weight)
+                    > DRIFT_TOLERANCE * func.greatest(1, func.abs(weight)),
+                    func.abs(StorageBlockSchema.current_size - size)
+                    > DRIFT_TOLERANCE * func.greatest(1, func.abs(size)),
+                    StorageBlockSchema.current_count != count,
+                )
+            )
+            .order_by(StorageBlockSchema.id)
+        )
+
+        try:
+            self.db.execute(text("LOCK TABLE package IN SHARE MODE"))
+            drifted = [row._asdict() for row in self.db.execute(query)]
+            if repair:
+                for block in drifted:
+                    self.db.execute(
+                        update(StorageBlockSchema)
+                        .where(StorageBlockSchema.id == block["id"])
+                        .values(
+                            current_weight=block["weight"],
+                            current_size=block["size"],
+                            current_count=block["count"],
+                        )
+                    )
+                self.db.commit()
+            else:
+                self.db.rollback()
+            return drifted
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def allocate(
+        self,
+        package_ids: list[UUID],
+        block_ids: list[UUID] | None = None,
+        dry_run: bool = False,
+    ) -> dict:
+        """Puts a batch of packages without block into blocks, all of them at
+        once with ``first_fit_decreasing``, optionally only into ``block_ids``.
+
+        Free capacity is read once with every candidate block locked, and the
+        assignments are written in a single UPDATE. Packages that are missing or
+        already in a block are returned as ``skipped`` and left alone.
         """
+        free_weight = StorageBlockSchema.max_weight - StorageBlockSchema.current_weight
+        free_size = StorageBlockSchema.max_size - StorageBlockSchema.current_size
+        free_count = StorageBlockSchema.max_package - StorageBlockSchema.current_count
+        blocks_query = (
+            select(
+                StorageBlockSchema.id,
+                free_weight.label("weight"),
+                free_size.label("size"),
+                free_count.label("count"),
+                # fullest share of any of the three
+                func.greatest(
+                    StorageBlockSchema.current_weight / StorageBlockSchema.max_weight,
+                    StorageBlockSchema.current_size / StorageBlockSchema.max_size,
+                    StorageBlockSchema.current_count
+                    / cast(StorageBlockSchema.max_package, Float),
+                ).label("fill"),
+            )
+            .where(free_weight > 0, free_size > 0, free_count > 0)
+            .order_by(StorageBlockSchema.id)
+            .with_for_update()
         )
-        result = self.db.execute(sql, {"id": block_id}).fetchone()
-        max_weight, max_size, max_package = result
+        if block_ids is not None:
+            blocks_query = blocks_query.where(StorageBlockSchema.id.in_(block_ids))
 
-        if exclude_package:
-            sql_package = text(
-                """SELECT width, height, length, weight FROM parcelpoint.public.package WHERE id = :id"""
+        packages_query = (
+            select(
+                PackageSchema.id,
+                func.coalesce(PackageSchema.weight, 0).label("weight"),
+                func.coalesce(
+                    PackageSchema.width * PackageSchema.length * PackageSchema.height,
+                    0,
+                ).label("size"),
             )
-            result_package = self.db.execute(
-                sql_package, {"id": exclude_package}
-            ).fetchone()
-            exclude_vol = result_package[0] * result_package[1] * result_package[2]
-            exclude_weight = result_package[3]
-            max_weight += exclude_weight
-            max_size += exclude_vol
-            max_package += 1
-
-        if self.get_sum_weight(block_id) + weight > max_weight:
-            return True
-        if self.get_sum_size(block_id) + volume > max_size:
-            return True
-        return self.get_sum_count(block_id) + 1 > max_package
+            .where(PackageSchema.id.in_(package_ids), PackageSchema.block_id.is_(None))
+            .order_by(PackageSchema.id)
+            .with_for_update()
+        )
+
+        try:
+            # blocks before packages, the same order as package updates
+            blocks = self.db.execute(blocks_query).all()
+            packages = self.db.execute(packages_query).all()
+
+            # partly filled blocks first, empty ones stay free for what is left
+            blocks.sort(key=lambda block: -block.fill)
+            placement = first_fit_decreasing(
+                np.array([package.weight for package in packages], dtype=np.float64),
+                np.array([package.size for package in packages], dtype=np.float64),
+                np.array([block.weight for block in blocks], dtype=np.float64),
+                np.array([block.size for block in blocks], dtype=np.float64),
+                np.array([block.count for block in blocks], dtype=np.int64),
+            )
+
+            assignments = [
+                {"package_id": package.id, "block_id": blocks[block].id}
+                for package, block in zip(packages, placement.tolist())
+                if block != UNPLACED
+            ]
+            if assignments and not dry_run:
+                assigned = values(
+                    column("package_id", PostgresUUID(as_uuid=True)),
+                    column("block_id", PostgresUUID(as_uuid=True)),
+                    name="assigned",
+                ).data([(a["package_id"], a["block_id"]) for a in assignments])
+                self.db.execute(
+                    update(PackageSchema)
+                    .where(PackageSchema.id == assigned.c.package_id)
+                    .values(block_id=assigned.c.block_id)
+                    .execution_options(synchronize_session=False)
+                )
+                self.db.commit()
+            else:
+                self.db.rollback()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        found = {package.id for package in packages}
+        return {
+            "assignments": assignments,
+            "unplaced": [
+                package.id
+                for package, block in zip(packages, placement.tolist())
+                if block == UNPLACED
+            ],
+            "skipped": [id for id in dict.fromkeys(package_ids) if id not in found],
+        }
+
+    @read_only
+    def find_blocks(
+        self,
+        volume: float,
+        weight: float,
+        k: int | None = 5,
+        num_package: int = 1,
+        exclude_block: UUID | None = None,
+    ) -> list[dict]:
+        """Blocks with room for the packages, most free weight then size first,
+        at most ``k`` of them. Reads ``ix_storageblock_free_capacity`` in order
+        and stops after k matches, however many blocks there are.
+
+        Only a suggestion, placing the package checks the block again.
+        """
+        free_weight, free_size, free_count = StorageBlockSchema.free_capacity()
+        query = (
+            select(*StorageBlockSchema.__table__.columns)
+            .where(
+                free_weight >= weight,
+                free_size >= volume,
+                free_count >= num_package,
+            )
+            .order_by(free_weight.desc(), free_size.desc(), free_count.desc())
+            .limit(k)
+        )
+        if exclude_block is not None:
+            query = query.where(StorageBlockSchema.id != exclude_block)
+        return [row._asdict() for row in self.db.execute(query)]
 
     def get_storage_block_within_limits(
         self, package: UUID, vol: float, weight: float, num_package: int = 1
     ):
-        sql = text(
-            """
-            SELECT sb.*
-            FROM parcelpoint.public.storageblock sb
-            LEFT JOIN parcelpoint.public.package p ON sb.id = p.block_id
-            WHERE sb.id != :package_id
-            GROUP BY sb.id, sb.max_package, sb.max_weight, sb.max_size
-            HAVING 
-                (sb.max_package >= (COUNT(p.id) + :num_package))
-                AND (sb.max_weight >= (COALESCE(SUM(p.weight), 0) + :weight))
-                AND (sb.max_size >= (COALESCE(SUM(p.width * p.length * p.height), 0) + :vol))
-            ORDER BY 
-                (sb.max_weight - COALESCE(SUM(p.weight), 0)) DESC,
-                (sb.max_size - COALESCE(SUM(p.width * p.length * p.height), 0)) DESC;
-            """,
-        )
-        return self.db.execute(
-            sql,
-            {
-                "package_id": package,
-                "num_package": num_package,
-                "weight": weight,
-                "vol": vol,
-            },
+        return self.find_blocks(
+            vol, weight, k=None, num_package=num_package, exclude_block=package
         )
 
     def get_storage_block_under_capacity(
@@ -137,9 +340,7 @@ class StorageBlockRepository(
             """
             SELECT sb.*
             FROM parcelpoint.public.storageblock sb
-            LEFT JOIN parcelpoint.public.package p ON sb.id = p.block_id
             WHERE (sb.max_package < :num) AND (sb.max_weight < :weight) AND (sb.max_size < :vol)
-            GROUP BY sb.id, sb.max_package, sb.max_weight, sb.max_size
         """
         )
 
@@ -147,34 +348,12 @@ class StorageBlockRepository(
             sql, {"num": num_package, "weight": weight, "vol": volume}
         )
 
+    @read_only
     def get_all(self):
-        query = (
-            select(
-                StorageBlockSchema,
-                func.sum(func.coalesce(PackageSchema.weight, 0)).label(
-                    "current_weight"
-                ),
-                func.sum(
-                    func.coalesce(
-                        PackageSchema.width
-                        * PackageSchema.height
-                        * PackageSchema.length,
-                        0,
-                    )
-                ).label("current_size"),
-            )
-            .outerjoin(PackageSchema, StorageBlockSchema.id == PackageSchema.block_id)
-            .group_by(
-                StorageBlockSchema.id,
-            )
+        query = select(
+            *StorageBlockSchema.__table__.columns,
+            StorageBlockSchema.current_weight.label("weight"),
+            StorageBlockSchema.current_size.label("size"),
         )
 
-        result = self.db.execute(query).all()
-        storage_blocks = []
-        for block, weight, size in result:
-            storage_block = block.__dict__
-            storage_block["weight"] = weight
-            storage_block["size"] = size
-            storage_blocks.append(storage_block)
-
-        return storage_blocks
+        return [row._asdict() for row in self.db.execute(query)]
@@ -4,7 +4,7 @@ from uuid import uuid4, UUID
 import bcrypt
 from fastapi import HTTPException, status
 from psycopg.errors import UniqueViolation
-from sqlalchemy import and_
+from sqlalchemy import and_, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from starlette.status import HTTP_400_BAD_REQUEST
@@ -49,45 +49,63 @@ class AccountRepository(BaseRepository[AccountSchema, AccountCreate, AccountUpda
     def __init__(self, db: Session):
         super().__init__(db, AccountSchema)
 
+    def _labelled_columns(self, schema, prefix: str):
+        # generated columns are search helpers, not part of the account
+        return [
+            column.label(f"{prefix}{column.key}")
+            for column in schema.__table__.columns
+            if column.computed is None
+        ]
+
+    def _split_row(self, row, nested: tuple[str, ...]) -> dict:
+        result = {}
+        for key, value in row._mapping.items():
+            prefix, _, column = key.partition("__")
+            if prefix in nested:
+                result.setdefault(prefix, {})[column] = value
+            else:
+                result[key] = value
+        # left joined address is missing when the account has none
+        if result.get("address", {}).get("id") is None:
+            result["address"] = None
+        return result
+
     def get_all(self):
-        merchant_accounts = (
-            self.db.query(AccountSchema, MerchantSchema, AddressSchema)
+        account_columns = [
+            column
+            for column in AccountSchema.__table__.columns
+            if column.key != "hashed_password"
+        ]
+        address_columns = self._labelled_columns(AddressSchema, "address__")
+
+        merchant_query = (
+            select(
+                *account_columns,
+                *self._labelled_columns(MerchantSchema, "merchant__"),
+                *address_columns,
+            )
             .join(MerchantSchema, AccountSchema.id == MerchantSchema.account_id)
             .outerjoin(AddressSchema, AccountSchema.address_id == AddressSchema.id)
-            .all()
         )
 
-        staff_accounts = (
-            self.db.query(AccountSchema, StaffSchema, AddressSchema)
+        staff_query = (
+            select(
+                *account_columns,
+                *self._labelled_columns(StaffSchema, "staff__"),
+                *address_columns,
+            )
             .join(StaffSchema, AccountSchema.id == StaffSchema.account_id)
             .outerjoin(AddressSchema, AccountSchema.address_id == AddressSchema.id)
-            .all()
         )
 
-        merchant_results = []
-
-        for account, merchant, address in merchant_accounts:
-            result = account.__dict__.copy()
-            result.pop("_sa_instance_state", None)
-            result["merchant"] = {
-                k: v for k, v in merchant.__dict__.items() if not k.startswith("_")
-            }
-            result["address"] = {
-                k: v for k, v in address.__dict__.items() if not k.startswith("_")
-            }
-            merchant_results.append(result)
-
-        staff_results = []
-        for account, staff, address in staff_accounts:
-            result = account.__dict__.copy()
-            result.pop("_sa_instance_state", None)
-            result["staff"] = {
-                k: v for k, v in staff.__dict__.items() if not k.startswith("_")
-            }
-            result["address"] = {
-                k: v for k, v in address.__dict__.items() if not k.startswith("_")
-            }
-            staff_results.append(result)
+        merchant_results = [
+            self._split_row(row, ("merchant", "address"))
+            for row in self.db.execute(merchant_query)
+        ]
+        staff_results = [
+            self._split_row(row, ("staff", "address"))
+            for row in self.db.execute(staff_query)
+        ]
 
         return {"merchants": merchant_results, "staff": staff_results}
 
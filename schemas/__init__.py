@@ -1,3 +1,4 @@
+from sqlalchemy import DDL, Table, event
 from sqlalchemy.orm import DeclarativeBase
 
 
@@ -5,6 +6,17 @@ class Base(DeclarativeBase):
     pass
 
 
+def create_with(table: Table, statements: str):
+    """Runs ``statements`` when create_all creates ``table``, after every table
+    is created, so triggers can be put on tables created later"""
+
+    def create(metadata, connection, tables=(), **kw):
+        if table in tables:
+            connection.execute(DDL(statements))
+
+    event.listen(Base.metadata, "after_create", create)
+
+
 from schemas import (
     package_rate,
     package,
@@ -13,4 +25,6 @@ from schemas import (
     order,
     users,
     package_history,
+    import_job,
+    merchant_daily_stats,
 )
@@ -1,13 +1,41 @@
-from sqlalchemy import Column, String
+from sqlalchemy import DDL, Column, Computed, Index, String, event
 from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
+from sqlalchemy.orm import deferred
 
 from schemas import Base
+from utils.search import fold_accents_sql
+
+# every part, folded, so one trigram index serves a term in any of them
+ADDRESS_SEARCH_TEXT = fold_accents_sql(
+    "coalesce(province, '') || ' ' || coalesce(district, '')"
+    " || ' ' || coalesce(commune, '')"
+)
 
 
 class AddressSchema(Base):
     __tablename__ = "address"
+    __table_args__ = (
+        Index(
+            "ix_address_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
+    )
 
     id = Column(PostgresUUID(as_uuid=True), primary_key=True)
     province = Column(String)
     district = Column(String)
     commune = Column(String)
+
+    search_text = deferred(
+        Column(String, Computed(ADDRESS_SEARCH_TEXT, persisted=True))
+    )
+
+
+# the trigram index needs pg_trgm
+event.listen(
+    AddressSchema.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+)
@@ -0,0 +1,55 @@
+from sqlalchemy import (
+    Column,
+    String,
+    ForeignKey,
+    DateTime,
+    Integer,
+    Boolean,
+    Index,
+    func,
+)
+from sqlalchemy.dialects.postgresql import UUID as PostgresUUID, JSONB
+
+from schemas import Base
+from schemas.order import OrderSchema
+from schemas.users.merchant import MerchantSchema
+
+
+class ImportJobSchema(Base):
+    __tablename__ = "importjob"
+    __table_args__ = (
+        Index("ix_importjob_merchant_id_created_at", "merchant_id", "created_at"),
+        Index("ix_importjob_status", "status"),
+    )
+
+    id = Column(PostgresUUID(as_uuid=True), primary_key=True)
+
+    merchant_id = Column(
+        PostgresUUID(as_uuid=True),
+        ForeignKey(MerchantSchema.account_id),
+        nullable=False,
+    )
+    order_id = Column(
+        PostgresUUID(as_uuid=True), ForeignKey(OrderSchema.id), nullable=True
+    )
+
+    # QUEUED, RUNNING, SUCCEEDED or FAILED
+    status = Column(String, nullable=False, default="QUEUED")
+    file_path = Column(String, nullable=False)
+    batch_size = Column(Integer, nullable=False, default=1000)
+    skip_invalid = Column(Boolean, nullable=False, default=False)
+
+    rows_processed = Column(Integer, nullable=False, default=0)
+    rows_rejected = Column(Integer, nullable=False, default=0)
+    result = Column(JSONB, nullable=True)
+    error = Column(String, nullable=True)
+
+    created_at = Column(DateTime, nullable=False, default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    # touched on every progress report, a RUNNING job that stopped touching it
+    # belonged to a worker that died
+    updated_at = Column(DateTime, nullable=False, default=func.now())
+    # set by each claim, the worker holding it is the only one allowed to report
+    # on the job and commit its packages
+    claim_token = Column(PostgresUUID(as_uuid=True), nullable=True)
@@ -0,0 +1,133 @@
+from sqlalchemy import Column, Date, Float, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
+
+from schemas import Base, create_with
+from schemas.users.merchant import MerchantSchema
+
+
+class MerchantDailyStatsSchema(Base):
+    """Packages per merchant and order day, what the merchant dashboard shows.
+    Kept up to date by the triggers below, never written by the application"""
+
+    __tablename__ = "merchantdailystats"
+
+    merchant_id = Column(
+        PostgresUUID(as_uuid=True),
+        ForeignKey(MerchantSchema.account_id, ondelete="CASCADE"),
+        primary_key=True,
+    )
+    date = Column(Date, primary_key=True)
+
+    count = Column(Integer, nullable=False, default=0)
+    shipping = Column(Float, nullable=False, default=0)
+    cod = Column(Float, nullable=False, default=0)
+
+
+# statement level, one upsert per statement however many packages it touches.
+# Days are the order's day, like the dashboard, packages without order are not
+# counted. Migration 9d4c2a7e5f13 installs this too.
+MERCHANT_DAILY_STATS_TRIGGERS = """
+CREATE OR REPLACE FUNCTION merchantdailystats_package_change() RETURNS trigger AS $$
+BEGIN
+    -- packages counted in with sign 1, counted out with sign -1
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO merchantdailystats AS s (merchant_id, date, count, shipping, cod)
+        SELECT o.merchant_id, o.date::date, sum(c.sign), sum(c.shipping), sum(c.cod)
+        FROM (
+            SELECT order_id, coalesce(shipping_cost, 0) AS shipping,
+                   coalesce(cod_cost, 0) AS cod, 1 AS sign
+            FROM new_packages
+        ) c
+        JOIN "order" o ON o.id = c.order_id
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (merchant_id, date) DO UPDATE SET
+            count = s.count + EXCLUDED.count,
+            shipping = s.shipping + EXCLUDED.shipping,
+            cod = s.cod + EXCLUDED.cod;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO merchantdailystats AS s (merchant_id, date, count, shipping, cod)
+        SELECT o.merchant_id, o.date::date, sum(c.sign), sum(c.shipping), sum(c.cod)
+        FROM (
+            SELECT order_id, -coalesce(shipping_cost, 0) AS shipping,
+                   -coalesce(cod_cost, 0) AS cod, -1 AS sign
+            FROM old_packages
+        ) c
+        JOIN "order" o ON o.id = c.order_id
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (merchant_id, date) DO UPDATE SET
+            count = s.count + EXCLUDED.count,
+            shipping = s.shipping + EXCLUDED.shipping,
+            cod = s.cod + EXCLUDED.cod;
+    ELSE
+        INSERT INTO merchantdailystats AS s (merchant_id, date, count, shipping, cod)
+        SELECT o.merchant_id, o.date::date, sum(c.sign), sum(c.shipping), sum(c.cod)
+        FROM (
+            SELECT order_id, coalesce(shipping_cost, 0) AS shipping,
+                   coalesce(cod_cost, 0) AS cod, 1 AS sign
+            FROM new_packages
+            UNION ALL
+            SELECT order_id, -coalesce(shipping_cost, 0) AS shipping,
+                   -coalesce(cod_cost, 0) AS cod, -1 AS sign
+            FROM old_packages
+        ) c
+        JOIN "order" o ON o.id = c.order_id
+        GROUP BY 1, 2
+        -- e.g. a status change, nothing to add or remove
+        HAVING sum(c.sign) <> 0 OR sum(c.shipping) <> 0 OR sum(c.cod) <> 0
+        ORDER BY 1, 2
+        ON CONFLICT (merchant_id, date) DO UPDATE SET
+            count = s.count + EXCLUDED.count,
+            shipping = s.shipping + EXCLUDED.shipping,
+            cod = s.cod + EXCLUDED.cod;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- an order moving to another day or merchant takes its packages along
+CREATE OR REPLACE FUNCTION merchantdailystats_order_change() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO merchantdailystats AS s (merchant_id, date, count, shipping, cod)
+    SELECT moved.merchant_id, moved.day, sum(moved.sign),
+           sum(moved.sign * coalesce(p.shipping_cost, 0)),
+           sum(moved.sign * coalesce(p.cod_cost, 0))
+    FROM (
+        SELECT n.id, n.merchant_id, n.date::date AS day, 1 AS sign
+        FROM new_orders n JOIN old_orders o ON o.id = n.id
+        WHERE (n.merchant_id, n.date::date) IS DISTINCT FROM (o.merchant_id, o.date::date)
+        UNION ALL
+        SELECT o.id, o.merchant_id, o.date::date, -1
+        FROM new_orders n JOIN old_orders o ON o.id = n.id
+        WHERE (n.merchant_id, n.date::date) IS DISTINCT FROM (o.merchant_id, o.date::date)
+    ) moved
+    JOIN package p ON p.order_id = moved.id
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+    ON CONFLICT (merchant_id, date) DO UPDATE SET
+        count = s.count + EXCLUDED.count,
+        shipping = s.shipping + EXCLUDED.shipping,
+        cod = s.cod + EXCLUDED.cod;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER merchantdailystats_package_insert
+    AFTER INSERT ON package REFERENCING NEW TABLE AS new_packages
+    FOR EACH STATEMENT EXECUTE FUNCTION merchantdailystats_package_change();
+CREATE TRIGGER merchantdailystats_package_update
+    AFTER UPDATE ON package
+    REFERENCING OLD TABLE AS old_packages NEW TABLE AS new_packages
+    FOR EACH STATEMENT EXECUTE FUNCTION merchantdailystats_package_change();
+CREATE TRIGGER merchantdailystats_package_delete
+    AFTER DELETE ON package REFERENCING OLD TABLE AS old_packages
+    FOR EACH STATEMENT EXECUTE FUNCTION merchantdailystats_package_change();
+CREATE TRIGGER merchantdailystats_order_update
+    AFTER UPDATE ON "order"
+    REFERENCING OLD TABLE AS old_orders NEW TABLE AS new_orders
+    FOR EACH STATEMENT EXECUTE FUNCTION merchantdailystats_order_change();
+"""
+
+# databases built with create_all instead of migrations get the triggers too
+create_with(MerchantDailyStatsSchema.__table__, MERCHANT_DAILY_STATS_TRIGGERS)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, DateTime, Text
+from sqlalchemy import Column, ForeignKey, DateTime, Text, Index
 from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
 from schemas.users.merchant import MerchantSchema
 from schemas import Base
@@ -6,6 +6,10 @@ from schemas import Base
 
 class OrderSchema(Base):
     __tablename__ = "order"
+    __table_args__ = (
+        Index("ix_order_merchant_id_date", "merchant_id", "date"),
+        Index("ix_order_date", "date"),
+    )
 
     id = Column(PostgresUUID(as_uuid=True), primary_key=True)
 
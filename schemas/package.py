@@ -1,5 +1,16 @@
-from sqlalchemy import Column, String, ForeignKey, Float, Boolean
-from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
+from sqlalchemy import (
+    DDL,
+    Column,
+    Computed,
+    String,
+    ForeignKey,
+    Float,
+    Boolean,
+    Index,
+    event,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID as PostgresUUID
+from sqlalchemy.orm import deferred
 from schemas.users.merchant import MerchantSchema
 from schemas import Base
 from schemas.address import AddressSchema
@@ -7,9 +18,35 @@ from schemas.order import OrderSchema
 from schemas.package_rate import PackageRateSchema
 from schemas.storage_block import StorageBlockSchema
 
+# the recipient name weighs most, then the description, then the street.
+# 'simple' because names and streets are not English, nothing to stem
+PACKAGE_SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A')"
+    " || setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+    " || setweight(to_tsvector('simple', coalesce(street, '')), 'C')"
+)
+
 
 class PackageSchema(Base):
     __tablename__ = "package"
+    __table_args__ = (
+        Index("ix_package_merchant_id_status", "merchant_id", "status"),
+        Index(
+            "ix_package_block_id",
+            "block_id",
+            postgresql_include=["weight", "width", "length", "height"],
+        ),
+        Index("ix_package_order_id", "order_id"),
+        Index("ix_package_status", "status"),
+        # q= of the package search, words and phone fragments
+        Index("ix_package_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_package_phone_trgm",
+            "phone",
+            postgresql_using="gin",
+            postgresql_ops={"phone": "gin_trgm_ops"},
+        ),
+    )
 
     id = Column(PostgresUUID(as_uuid=True), primary_key=True)
 
@@ -48,3 +85,16 @@ class PackageSchema(Base):
     )
     shipping_cost = Column(Float)
     cod_cost = Column(Float)
+
+    # deferred, loading a package never needs it
+    search_vector = deferred(
+        Column(TSVECTOR, Computed(PACKAGE_SEARCH_VECTOR, persisted=True))
+    )
+
+
+# the trigram index needs pg_trgm
+event.listen(
+    PackageSchema.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"),
+)
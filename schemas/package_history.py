@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, func
+from sqlalchemy import Column, String, ForeignKey, DateTime, func, Index
 from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
 
 from schemas import Base
@@ -8,6 +8,9 @@ from schemas.users import StaffSchema
 
 class PackageHistorySchema(Base):
     __tablename__ = "packagehistory"
+    __table_args__ = (
+        Index("ix_packagehistory_package_id_timestamp", "package_id", "timestamp"),
+    )
 
     id = Column(PostgresUUID(as_uuid=True), primary_key=True)
 
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, String, Float, Integer
+from sqlalchemy import Column, String, Float, Index, Integer
 from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
 
-from schemas import Base
+from schemas import Base, create_with
 
 
 class StorageBlockSchema(Base):
@@ -15,3 +15,87 @@ class StorageBlockSchema(Base):
     max_weight = Column(Float)
     max_size = Column(Float)
     max_package = Column(Integer)
+
+    # what the packages in the block add up to, kept by the triggers below
+    current_weight = Column(Float, nullable=False, default=0, server_default="0")
+    current_size = Column(Float, nullable=False, default=0, server_default="0")
+    current_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    @classmethod
+    def free_capacity(cls):
+        """Room left in weight, size and count, as indexed below"""
+        return (
+            cls.max_weight - cls.current_weight,
+            cls.max_size - cls.current_size,
+            cls.max_package - cls.current_count,
+        )
+
+
+# placement suggestions walk this from the emptiest block down and stop after k
+Index(
+    "ix_storageblock_free_capacity",
+    *(free.self_group().desc() for free in StorageBlockSchema.free_capacity()),
+)
+
+
+# one update per block a statement changes, in id order so concurrent
+# statements can't deadlock on the blocks. Existing databases got it from
+# migration c3e9a4b1d605.
+STORAGE_BLOCK_OCCUPANCY_TRIGGERS = """
+CREATE OR REPLACE FUNCTION storageblock_occupancy_change() RETURNS trigger AS $$
+DECLARE
+    changes text;
+    d record;
+BEGIN
+    -- packages counted in with sign 1, counted out with sign -1
+    IF TG_OP = 'INSERT' THEN
+        changes := 'SELECT block_id, weight, width * length * height AS size,
+                           1 AS sign FROM new_packages';
+    ELSIF TG_OP = 'DELETE' THEN
+        changes := 'SELECT block_id, weight, width * length * height AS size,
+                           -1 AS sign FROM old_packages';
+    ELSE
+        changes := 'SELECT block_id, weight, width * length * height AS size,
+                           1 AS sign FROM new_packages
+                    UNION ALL
+                    SELECT block_id, weight, width * length * height, -1
+                    FROM old_packages';
+    END IF;
+
+    FOR d IN EXECUTE
+        'SELECT block_id,
+                sum(sign * coalesce(weight, 0)) AS weight,
+                sum(sign * coalesce(size, 0)) AS size,
+                sum(sign) AS count
+         FROM (' || changes || ') c
+         WHERE block_id IS NOT NULL
+         GROUP BY block_id
+         -- only updates can cancel out, e.g. a status change moves nothing
+         HAVING sum(sign) <> 0
+             OR sum(sign * coalesce(weight, 0)) <> 0
+             OR sum(sign * coalesce(size, 0)) <> 0
+         ORDER BY block_id'
+    LOOP
+        UPDATE storageblock SET
+            current_weight = current_weight + d.weight,
+            current_size = current_size + d.size,
+            current_count = current_count + d.count
+        WHERE id = d.block_id;
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER storageblock_occupancy_insert
+    AFTER INSERT ON package REFERENCING NEW TABLE AS new_packages
+    FOR EACH STATEMENT EXECUTE FUNCTION storageblock_occupancy_change();
+CREATE TRIGGER storageblock_occupancy_update
+    AFTER UPDATE ON package
+    REFERENCING OLD TABLE AS old_packages NEW TABLE AS new_packages
+    FOR EACH STATEMENT EXECUTE FUNCTION storageblock_occupancy_change();
+CREATE TRIGGER storageblock_occupancy_delete
+    AFTER DELETE ON package REFERENCING OLD TABLE AS old_packages
+    FOR EACH STATEMENT EXECUTE FUNCTION storageblock_occupancy_change();
+"""
+
+create_with(StorageBlockSchema.__table__, STORAGE_BLOCK_OCCUPANCY_TRIGGERS)
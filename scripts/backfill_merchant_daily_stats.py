@@ -0,0 +1,27 @@
+"""Rebuild the merchantdailystats rollup from the packages.
+
+    python -m scripts.backfill_merchant_daily_stats [--merchant ID]
+
+The triggers keep it current, this is for the first fill and for repairing it.
+"""
+
+import argparse
+from uuid import UUID
+
+from connection import SessionLocal
+from repositories.merchant_daily_stats import MerchantDailyStatsRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--merchant", type=UUID, help="only this merchant")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        days = MerchantDailyStatsRepository(db).backfill(args.merchant)
+
+    print(f"rebuilt {days} merchant days")
+
+
+if __name__ == "__main__":
+    main()
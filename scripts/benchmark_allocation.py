@@ -0,0 +1,43 @@
+"""Batch block allocation, packages x blocks.
+
+    python -m scripts.benchmark_allocation [packages:blocks...]
+
+Only ``first_fit_decreasing`` itself, loading and writing the batch are single
+queries either way. Blocks are random and partly full like a running warehouse.
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from utils.allocation import UNPLACED, first_fit_decreasing
+
+
+def make_batch(packages: int, blocks: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return (
+        rng.uniform(0.1, 30, packages),
+        rng.uniform(100, 120000, packages),
+        rng.uniform(0, 60, blocks),
+        rng.uniform(0, 2_000_000, blocks),
+        rng.integers(0, 3, blocks),
+    )
+
+
+def main(sizes: list[tuple[int, int]]):
+    print(f"{'packages':>10} {'blocks':>8} {'ms':>10} {'placed':>8}")
+    for packages, blocks in sizes:
+        batch = make_batch(packages, blocks)
+        start = time.perf_counter()
+        placement = first_fit_decreasing(*batch)
+        elapsed = time.perf_counter() - start
+        placed = int((placement != UNPLACED).sum())
+        print(f"{packages:>10,} {blocks:>8,} {elapsed * 1000:>10.1f} {placed:>8,}")
+
+
+if __name__ == "__main__":
+    main(
+        [tuple(int(n) for n in size.split(":")) for size in sys.argv[1:]]
+        or [(1_000, 1_000), (5_000, 5_000), (10_000, 5_000)]
+    )
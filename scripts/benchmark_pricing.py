@@ -0,0 +1,92 @@
+"""Scalar vs NumPy package pricing.
+
+    python -m scripts.benchmark_pricing [sizes...]
+
+Both paths get the same column arrays, the scalar one loops over them the way
+bulk creation used to, so the numbers compare the pricing itself and leave out
+building PackageCreate objects.
+"""
+
+import sys
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+import numpy as np
+
+from models.package_rate import PackageRate
+from utils.pricing import price_batch, price_package
+
+rates = [
+    PackageRate(
+        id=uuid4(),
+        name=f"rate {i}",
+        base_rate=21000 + i * 1000,
+        base_weight=2 + i,
+        oversize_rate=10000,
+        overweight_rate_per_kg=5000,
+        fragile_rate=15000,
+        urgent_rate=20000,
+    )
+    for i in range(4)
+]
+
+
+def make_columns(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return (
+        rng.uniform(1, 60, n),
+        rng.uniform(1, 60, n),
+        rng.uniform(1, 60, n),
+        rng.uniform(0, 12, n),
+        rng.integers(0, 2, n).astype(bool),
+        rng.integers(0, 2, n).astype(bool),
+        rng.integers(0, len(rates), n),
+    )
+
+
+def scalar(columns) -> list[float]:
+    return [
+        price_package(
+            SimpleNamespace(
+                length=length,
+                width=width,
+                height=height,
+                weight=weight,
+                is_urgent=is_urgent,
+                is_fragile=is_fragile,
+            ),
+            rates[rate_index],
+        )
+        for length, width, height, weight, is_urgent, is_fragile, rate_index in zip(
+            *(column.tolist() for column in columns)
+        )
+    ]
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(sizes: list[int]):
+    print(f"{'packages':>10} {'scalar ms':>12} {'numpy ms':>12} {'speedup':>9}")
+    for n in sizes:
+        columns = make_columns(n)
+        assert price_batch(*columns, rates=rates).tolist() == scalar(columns)
+
+        repeat = 5 if n <= 100_000 else 1
+        scalar_time = best_of(lambda: scalar(columns), repeat)
+        numpy_time = best_of(lambda: price_batch(*columns, rates=rates), repeat)
+        print(
+            f"{n:>10,} {scalar_time * 1000:>12.2f} {numpy_time * 1000:>12.2f}"
+            f" {scalar_time / numpy_time:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1_000, 100_000, 1_000_000])
@@ -0,0 +1,39 @@
+"""Check storageblock current_weight/size/count against the packages.
+
+    python -m scripts.reconcile_storage_blocks [--repair]
+
+Triggers keep the counters exact, drift means something wrote around them,
+e.g. with the triggers disabled. Exits with 1 when drift was found and left.
+"""
+
+import argparse
+import sys
+
+from connection import SessionLocal
+from repositories.storage_block import StorageBlockRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--repair", action="store_true", help="set the counters to the real values"
+    )
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        drifted = StorageBlockRepository(db).reconcile(repair=args.repair)
+
+    for block in drifted:
+        print(
+            f"{block['id']}: weight {block['current_weight']} -> {block['weight']},"
+            f" size {block['current_size']} -> {block['size']},"
+            f" count {block['current_count']} -> {block['count']}"
+        )
+    action = "repaired" if args.repair else "found"
+    print(f"{action} drift in {len(drifted)} blocks")
+    if drifted and not args.repair:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
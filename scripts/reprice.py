@@ -0,0 +1,37 @@
+"""Recompute shipping_cost of existing packages from the current package rates.
+
+    python -m scripts.reprice [--rate ID] [--status ORDERED ...] [--batch-size N]
+                              [--dry-run]
+"""
+
+import argparse
+from uuid import UUID
+
+from connection import SessionLocal
+from repositories.package import PackageRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=UUID, help="only packages with this rate")
+    parser.add_argument("--status", nargs="*", help="only packages in these statuses")
+    parser.add_argument(
+        "--batch-size", type=int, help="commit every N packages instead of at once"
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        result = PackageRepository(db).reprice(
+            rate_id=args.rate,
+            statuses=args.status,
+            dry_run=args.dry_run,
+            batch_size=args.batch_size,
+        )
+
+    action = "would change" if result["dry_run"] else "changed"
+    print(f"{action} {result['packages']} packages, total delta {result['delta']}")
+
+
+if __name__ == "__main__":
+    main()
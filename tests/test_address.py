@@ -16,6 +16,47 @@ def test_search_address(client):
     assert len(response.json()) >= 1
 
 
+def test_search_address_without_diacritics(client):
+    response = client.get("/api/v1/address/search", params={"q": "can THO ninh"})
+    assert response.status_code == 200
+    results = response.json()
+    assert results
+    assert all(r["province"] == "Cần Thơ" for r in results)
+    assert all(r["district"] == "Ninh Kiều" for r in results)
+    assert "province" in results[0]["matched_fields"]
+
+
+def test_search_address_ranking(client):
+    # both words are in the district of every match, the commune only of some
+    response = client.get("/api/v1/address/search", params={"q": "chau thanh"})
+    assert response.status_code == 200
+    results = response.json()
+    assert {r["district"] for r in results} == {"Châu Thành"}
+    assert results[0]["commune"] == "Thị trấn Châu Thành"
+
+
+def test_search_address_paged(client):
+    everything = client.get("/api/v1/address/search", params={"q": "", "limit": 1000})
+    assert everything.status_code == 200
+    ids = [r["id"] for r in everything.json()]
+    assert len(ids) >= 9
+
+    pages = [
+        client.get(
+            "/api/v1/address/search",
+            params={"q": "", "limit": 4, "offset": offset},
+        ).json()
+        for offset in range(0, len(ids), 4)
+    ]
+    assert [r["id"] for page in pages for r in page] == ids
+
+
+def test_search_address_literal_wildcards(client):
+    response = client.get("/api/v1/address/search", params={"q": "%"})
+    assert response.status_code == 200
+    assert response.json() == []
+
+
 def test_create_address(client):
     """Test creating an address and return the created data for other tests"""
     address = AddressCreate(
@@ -0,0 +1,61 @@
+import numpy as np
+
+from utils.allocation import UNPLACED, first_fit_decreasing
+
+
+def test_first_fit_decreasing_biggest_first():
+    # the 6 goes in first and takes the first block, the 5 would not fit with it
+    placement = first_fit_decreasing(
+        weight=[1, 5, 6],
+        size=[1, 1, 1],
+        free_weight=[7, 6],
+        free_size=[10, 10],
+        free_count=[5, 5],
+    )
+    assert placement.tolist() == [0, 1, 0]
+
+
+def test_first_fit_decreasing_every_dimension():
+    placement = first_fit_decreasing(
+        weight=[1, 1, 1, 50],
+        size=[100, 1, 1, 1],
+        free_weight=[10, 10],
+        free_size=[10, 10],
+        free_count=[1, 1],
+    )
+    # too big, too heavy, and out of room in count for the last small one
+    assert placement.tolist() == [UNPLACED, 0, 1, UNPLACED]
+
+
+def test_first_fit_decreasing_no_blocks():
+    placement = first_fit_decreasing([1, 2], [1, 2], [], [], [])
+    assert placement.tolist() == [UNPLACED, UNPLACED]
+
+
+def test_first_fit_decreasing_respects_capacity():
+    rng = np.random.default_rng(0)
+    weight = rng.uniform(0, 20, 3000)
+    size = rng.uniform(0, 5000, 3000)
+    free_weight = rng.uniform(0, 200, 500)
+    free_size = rng.uniform(0, 50000, 500)
+    free_count = rng.integers(0, 10, 500)
+
+    placement = first_fit_decreasing(weight, size, free_weight, free_size, free_count)
+
+    placed = placement != UNPLACED
+    blocks = placement[placed]
+    used_weight = np.bincount(blocks, weight[placed], minlength=500)
+    used_size = np.bincount(blocks, size[placed], minlength=500)
+    used_count = np.bincount(blocks, minlength=500)
+    assert (used_weight <= free_weight + 1e-9).all()
+    assert (used_size <= free_size + 1e-9).all()
+    assert (used_count <= free_count).all()
+
+    # what is left out fits nowhere, not even in what the others left over
+    left_weight = free_weight - used_weight
+    left_size = free_size - used_size
+    left_count = free_count - used_count
+    for i in np.flatnonzero(~placed):
+        assert not (
+            (left_weight >= weight[i]) & (left_size >= size[i]) & (left_count > 0)
+        ).any()
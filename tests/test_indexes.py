@@ -0,0 +1,139 @@
+import json
+import random
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, select, text
+
+from connection import engine, SessionLocal
+from repositories.address import AddressRepository
+from repositories.package import PackageRepository
+from repositories.package_history import PackageHistoryRepository
+from repositories.storage_block import StorageBlockRepository
+from schemas.package import PackageSchema
+
+# tables that must never be read with a sequential scan on the hot paths
+HOT_TABLES = {"package", "order", "packagehistory", "address", "storageblock"}
+
+
+@contextmanager
+def captured_statements():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def seq_scans(plan: dict) -> list[str]:
+    found = []
+    if plan["Node Type"] == "Seq Scan" and plan["Relation Name"] in HOT_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def assert_no_seq_scan(statements):
+    assert statements
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        # with seq scans priced out, the planner only picks one if no index fits
+        cursor.execute("SET enable_seqscan = off")
+        for statement, parameters in statements:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = cursor.fetchone()[0]
+            plan = plan if isinstance(plan, list) else json.loads(plan)
+            scans = seq_scans(plan[0]["Plan"])
+            assert not scans, f"sequential scan on {scans} for:\n{statement}"
+        connection.rollback()
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def sample_package(db):
+    packages = db.execute(
+        select(PackageSchema).where(PackageSchema.block_id.is_not(None))
+    ).scalars()
+    return random.choice(list(packages))
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        lambda p: {"merchant_id": p.merchant_id},
+        lambda p: {"merchant_id": p.merchant_id, "status": p.status},
+        lambda p: {"block_id": p.block_id},
+        lambda p: {"order_id": p.order_id},
+        lambda p: {"status": p.status},
+        lambda p: {"days_ago": 3},
+        lambda p: {"q": p.name},
+    ],
+)
+def test_package_query_uses_indexes(db, sample_package, filters):
+    repo = PackageRepository(db)
+    with captured_statements() as statements:
+        repo.query_packages_paginated(**filters(sample_package))
+    assert_no_seq_scan(statements)
+
+
+def test_package_phone_search_uses_index(db, sample_package):
+    if not db.scalar(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")):
+        pytest.skip("pg_trgm is not installed")
+    repo = PackageRepository(db)
+    with captured_statements() as statements:
+        repo.query_packages_paginated(q=sample_package.phone[-6:])
+    assert_no_seq_scan(statements)
+
+
+def test_address_search_uses_index(db):
+    if not db.scalar(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")):
+        pytest.skip("pg_trgm is not installed")
+    repo = AddressRepository(db)
+    with captured_statements() as statements:
+        repo.search(["can", "tho"], limit=20)
+    assert_no_seq_scan(statements)
+
+
+def test_package_days_ago_uses_indexes(db, sample_package):
+    repo = PackageRepository(db)
+    with captured_statements() as statements:
+        repo.query_package_days_ago(sample_package.merchant_id, 30)
+    assert_no_seq_scan(statements)
+
+
+def test_block_sums_use_indexes(db, sample_package):
+    repo = StorageBlockRepository(db)
+    with captured_statements() as statements:
+        repo.get_sum_weight(sample_package.block_id)
+        repo.get_sum_size(sample_package.block_id)
+        repo.get_sum_count(sample_package.block_id)
+    assert_no_seq_scan(statements)
+
+
+def test_block_suggestions_use_index(db):
+    repo = StorageBlockRepository(db)
+    with captured_statements() as statements:
+        repo.find_blocks(1000, 1, k=5)
+    assert_no_seq_scan(statements)
+
+
+def test_package_history_uses_indexes(db, sample_package):
+    repo = PackageHistoryRepository(db)
+    with captured_statements() as statements:
+        repo.get_history_by_package_id(sample_package.id)
+    assert_no_seq_scan(statements)
@@ -0,0 +1,19 @@
+from conftest import client
+
+
+def test_get_pool_status(client, staff_headers):
+    client.get("/api/v1/storage_block")
+    response = client.get("/api/v1/_internal/pool", headers=staff_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["mode"] in ("sync", "async")
+    pool = data[data["mode"]]
+    assert pool["pool_size"] > 0
+    assert pool["checked_out"] >= 0
+    assert pool["wait"]["checkouts"] > 0
+
+
+def test_get_pool_status_requires_staff(client, merchant_headers):
+    assert client.get("/api/v1/_internal/pool").status_code == 401
+    response = client.get("/api/v1/_internal/pool", headers=merchant_headers)
+    assert response.status_code == 401
@@ -77,6 +77,22 @@ def test_get_order(client):
     assert response.status_code == 200
 
 
+@pytest.mark.parametrize("count", ["exact", "window", "cached", "estimate", "none"])
+def test_get_order_count_strategy(client, count):
+    exact = client.get("/api/v1/order").json()
+    response = client.get("/api/v1/order", params={"count": count})
+    assert response.status_code == 200
+    data = response.json()
+    assert [o["id"] for o in data["data"]] == [o["id"] for o in exact["data"]]
+    if count in ("exact", "window"):
+        assert data["count_exact"]
+        assert data["items"] == exact["items"]
+    elif count == "none":
+        assert data["items"] is None
+    else:
+        assert data["items"] >= 0
+
+
 def test_get_order_by_id(client, random_order_id):
     id = random_order_id
     response = client.get(f"/api/v1/order/{id}")
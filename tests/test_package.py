@@ -1,15 +1,36 @@
+import csv
+import io
+import json
+import os
 import random
+import time
+from datetime import timedelta
+from gzip import decompress
+from io import BytesIO
 from uuid import uuid4
 
 import pytest
+from openpyxl import load_workbook
+from sqlalchemy import Date, cast, delete, func, insert, select
 
 from conftest import client
+from connection import SessionLocal
+from models.import_job import ImportJobCreate
 from models.package import PackageCreate, Package
+from repositories.import_job import ImportJobRepository
+from repositories.merchant_daily_stats import MerchantDailyStatsRepository
+from schemas.import_job import ImportJobSchema
+from schemas.merchant_daily_stats import MerchantDailyStatsSchema
+from schemas.order import OrderSchema
+from schemas.package import PackageSchema
+from schemas.storage_block import StorageBlockSchema
 from seedings.utils import (
     get_storage_block_under_capacity,
     get_random_package_rate_id,
     get_storage_block_within_limits,
 )
+from utils import import_jobs
+from utils.jwt import create_access_token_dict
 
 
 @pytest.fixture
@@ -97,6 +118,436 @@ def test_create_package(
 test_create_package.created_data = None
 
 
+def test_search_packages_cursor(client):
+    first = client.get("/api/v1/package/search", params={"limit": 5})
+    assert first.status_code == 200
+    first = first.json()
+    assert first["next_cursor"]
+
+    by_page = client.get("/api/v1/package/search", params={"limit": 5, "offset": 2})
+    by_cursor = client.get(
+        "/api/v1/package/search",
+        params={"limit": 5, "cursor": first["next_cursor"], "count": "none"},
+    )
+    assert by_cursor.status_code == 200
+    assert by_cursor.json()["items"] is None
+    assert [p["id"] for p in by_cursor.json()["data"]] == [
+        p["id"] for p in by_page.json()["data"]
+    ]
+
+
+def test_search_packages_text(client):
+    response = client.get("/api/v1/package/search", params={"q": "Package 123"})
+    assert response.status_code == 200
+    results = response.json()["data"]
+    assert "Receiver of package 123" in [p["name"] for p in results]
+    assert all("123" in p["description"] for p in results)
+    assert "search_vector" not in results[0]
+
+    prefix = client.get(
+        "/api/v1/package/search", params={"q": "receiv packa", "status": "ORDERED"}
+    )
+    assert prefix.status_code == 200
+    assert prefix.json()["items"] > 0
+    assert all(p["status"] == "ORDERED" for p in prefix.json()["data"])
+
+
+def test_search_packages_phone(client):
+    response = client.get("/api/v1/package/search", params={"q": "0000-0123"})
+    assert response.status_code == 200
+    phones = [p["phone"] for p in response.json()["data"]]
+    assert len(phones) == 1
+    assert phones[0].endswith("00000123")
+
+
+def test_search_packages_no_match(client):
+    for q in ["zzqqxx", "!!"]:
+        response = client.get("/api/v1/package/search", params={"q": q})
+        assert response.status_code == 200
+        assert response.json()["data"] == []
+
+
+def test_search_packages_q_with_cursor(client):
+    first = client.get("/api/v1/package/search", params={"limit": 5}).json()
+    response = client.get(
+        "/api/v1/package/search",
+        params={"q": "package", "cursor": first["next_cursor"]},
+    )
+    assert response.status_code == 400
+
+
+def test_search_packages_invalid_cursor(client):
+    response = client.get("/api/v1/package/search", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_export_packages_xlsx(client, random_merchant_id):
+    token = create_access_token_dict({"user_id": random_merchant_id})
+    response = client.get(
+        "/api/v1/package/my_packages/export",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+
+    sheet = load_workbook(BytesIO(response.content)).active
+    header = [cell.value for cell in sheet[6]]
+    assert header[-2:] == ["shipping_cost", "cod_cost"]
+
+    rows = list(sheet.iter_rows(min_row=7, values_only=True))
+    assert sheet["E4"].value == f"Total Packages: {len(rows)}"
+    cod_total = sum(row[header.index("cod_cost")] for row in rows)
+    revenue = float(sheet["E2"].value.removeprefix("Total Revenue: "))
+    assert revenue == pytest.approx(cod_total)
+
+
+@pytest.mark.parametrize("gzip", [False, True])
+def test_export_packages_copy(client, random_merchant_id, gzip):
+    headers = {
+        "Authorization": f"Bearer {create_access_token_dict({'user_id': random_merchant_id})}"
+    }
+    params = {"gzip": gzip, "limit": 50}
+
+    as_csv = client.get(
+        "/api/v1/package/my_packages/export",
+        params={"format": "csv", **params},
+        headers=headers,
+    )
+    as_ndjson = client.get(
+        "/api/v1/package/my_packages/export",
+        params={"format": "ndjson", **params},
+        headers=headers,
+    )
+    assert as_csv.status_code == 200
+    assert as_ndjson.status_code == 200
+
+    csv_body, ndjson_body = as_csv.content, as_ndjson.content
+    if gzip:
+        csv_body, ndjson_body = decompress(csv_body), decompress(ndjson_body)
+
+    rows = list(csv.DictReader(io.StringIO(csv_body.decode())))
+    lines = [json.loads(line) for line in ndjson_body.decode().splitlines()]
+    assert len(rows) == len(lines)
+    assert [row["id"] for row in rows] == [line["id"] for line in lines]
+    if lines:
+        assert list(lines[0]) == list(rows[0])
+
+
+@pytest.fixture
+def bulk_csv(random_address_id, random_package_rate_id):
+    def build(bad_lines=(), block_id=None, bad_addresses=()):
+        rows = io.StringIO()
+        writer = csv.writer(rows)
+        writer.writerow(
+            ["description", "address_id", "name", "phone", "street", "width"]
+            + ["height", "length", "weight", "is_fragile", "is_urgent"]
+            + ["package_rate_id", "block_id"]
+        )
+        for i in range(20):
+            weight = "heavy" if i + 2 in bad_lines else 1 + i
+            # well formed, but no such address
+            address_id = uuid4() if i + 2 in bad_addresses else random_address_id
+            writer.writerow(
+                [f"Bulk {i}", address_id, "Receiver", "0123456789", "Street"]
+                + [10, 10, 10, weight, "True", "", random_package_rate_id]
+                + [block_id or ""]
+            )
+        return rows.getvalue()
+
+    return build
+
+
+@pytest.fixture
+def merchant_headers(random_merchant_id):
+    token = create_access_token_dict({"user_id": random_merchant_id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_my_packages_cached_count(client, merchant_headers):
+    # days_ago defaults to 365, the cutoff it binds differs on every call
+    params = {"count": "cached"}
+    first = client.get(
+        "/api/v1/package/my_packages", params=params, headers=merchant_headers
+    )
+    assert first.status_code == 200
+    second = client.get(
+        "/api/v1/package/my_packages", params=params, headers=merchant_headers
+    )
+    assert second.status_code == 200
+    assert not second.json()["count_exact"]
+    assert second.json()["items"] == first.json()["items"]
+
+
+def test_bulk_create_packages(client, bulk_csv, merchant_headers):
+    response = client.post(
+        "/api/v1/package/my_packages/bulk",
+        params={"batch_size": 7},
+        files={"file": ("packages.csv", bulk_csv(), "text/csv")},
+        headers=merchant_headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["created_packages"] == 20
+    assert response.json()["rejected_packages"] == 0
+
+
+def test_bulk_create_packages_rejects_bad_row(client, bulk_csv, merchant_headers):
+    response = client.post(
+        "/api/v1/package/my_packages/bulk",
+        files={"file": ("packages.csv", bulk_csv(bad_lines=[5]), "text/csv")},
+        headers=merchant_headers,
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Line 5:")
+
+
+def test_bulk_create_packages_skip_invalid(client, bulk_csv, merchant_headers):
+    response = client.post(
+        "/api/v1/package/my_packages/bulk",
+        params={"skip_invalid": True, "batch_size": 7},
+        files={"file": ("packages.csv", bulk_csv(bad_lines=[5, 12]), "text/csv")},
+        headers=merchant_headers,
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["created_packages"] == 18
+    assert report["rejected_packages"] == 2
+    assert [error["line"] for error in report["errors"]] == [5, 12]
+
+
+def merchant_orders(merchant_id) -> int:
+    with SessionLocal() as db:
+        return db.scalar(
+            select(func.count()).where(OrderSchema.merchant_id == merchant_id)
+        )
+
+
+def test_bulk_create_packages_unknown_address(
+    client, bulk_csv, merchant_headers, random_merchant_id
+):
+    before = merchant_orders(random_merchant_id)
+    response = client.post(
+        "/api/v1/package/my_packages/bulk",
+        params={"batch_size": 7},
+        files={"file": ("packages.csv", bulk_csv(bad_addresses=[9]), "text/csv")},
+        headers=merchant_headers,
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Line 9: unknown address"
+    # the order is rolled back with the packages
+    assert merchant_orders(random_merchant_id) == before
+
+
+def test_bulk_create_packages_unknown_address_skip_invalid(
+    client, bulk_csv, merchant_headers
+):
+    response = client.post(
+        "/api/v1/package/my_packages/bulk",
+        params={"skip_invalid": True, "batch_size": 7},
+        files={"file": ("packages.csv", bulk_csv(bad_addresses=[4, 15]), "text/csv")},
+        headers=merchant_headers,
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["created_packages"] == 18
+    assert report["errors"] == [
+        {"line": 4, "error": "unknown address"},
+        {"line": 15, "error": "unknown address"},
+    ]
+
+
+@pytest.fixture
+def small_block():
+    """A block for 5 of the bulk_csv packages, each of them fits on its own"""
+    id = uuid4()
+    with SessionLocal() as db:
+        db.execute(
+            insert(StorageBlockSchema),
+            {"id": id, "name": "Small", "max_package": 5}
+            | {"max_weight": 1e6, "max_size": 1e9},
+        )
+        db.commit()
+    yield id
+    with SessionLocal() as db:
+        db.execute(delete(PackageSchema).where(PackageSchema.block_id == id))
+        db.execute(delete(StorageBlockSchema).where(StorageBlockSchema.id == id))
+        db.commit()
+
+
+def block_count(block_id) -> int:
+    with SessionLocal() as db:
+        return db.scalar(select(func.count()).where(PackageSchema.block_id == block_id))
+
+
+def test_bulk_create_packages_overflow_block(
+    client, bulk_csv, merchant_headers, small_block
+):
+    # batches of 3, the block fills up in the second one
+    response = client.post(
+        "/api/v1/package/my_packages/bulk",
+        params={"batch_size": 3},
+        files={"file": ("packages.csv", bulk_csv(block_id=small_block), "text/csv")},
+        headers=merchant_headers,
+    )
+    assert response.status_code == 400
+    detail = response.json()["detail"]
+    assert detail.startswith("Line 7:")
+    assert f"exceeds the limit of the block {small_block}" in detail
+    assert block_count(small_block) == 0
+
+
+def test_bulk_create_packages_overflow_block_skip_invalid(
+    client, bulk_csv, merchant_headers, small_block
+):
+    response = client.post(
+        "/api/v1/package/my_packages/bulk",
+        params={"batch_size": 3, "skip_invalid": True},
+        files={"file": ("packages.csv", bulk_csv(block_id=small_block), "text/csv")},
+        headers=merchant_headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["created_packages"] == 5
+    assert response.json()["rejected_packages"] == 15
+    assert block_count(small_block) == 5
+
+
+def test_bulk_create_packages_background(client, bulk_csv, merchant_headers):
+    response = client.post(
+        "/api/v1/package/my_packages/bulk",
+        params={"background": True, "skip_invalid": True, "batch_size": 7},
+        files={"file": ("packages.csv", bulk_csv(bad_lines=[3]), "text/csv")},
+        headers=merchant_headers,
+    )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    for _ in range(100):
+        job = client.get(
+            f"/api/v1/package/my_packages/bulk/{job_id}", headers=merchant_headers
+        ).json()
+        if job["status"] in ("SUCCEEDED", "FAILED"):
+            break
+        time.sleep(0.1)
+
+    assert job["status"] == "SUCCEEDED"
+    assert job["order_id"] is not None
+    assert job["rows_processed"] == 20
+    assert job["rows_rejected"] == 1
+    assert job["result"]["created_packages"] == 19
+
+
+def test_bulk_import_job_not_found(client, merchant_headers):
+    response = client.get(
+        f"/api/v1/package/my_packages/bulk/{uuid4()}", headers=merchant_headers
+    )
+    assert response.status_code == 404
+
+
+def test_import_job_claim_lost(
+    bulk_csv, random_merchant_id, random_order_id, monkeypatch
+):
+    path = import_jobs.save_upload(BytesIO(bulk_csv().encode()))
+    with SessionLocal() as db:
+        job_id = (
+            ImportJobRepository(db)
+            .create(
+                ImportJobCreate(
+                    merchant_id=random_merchant_id,
+                    order_id=random_order_id,
+                    file_path=path,
+                    batch_size=100,
+                )
+            )
+            .id
+        )
+
+    def order_packages() -> int:
+        with SessionLocal() as db:
+            return db.scalar(
+                select(func.count()).where(PackageSchema.order_id == random_order_id)
+            )
+
+    before = order_packages()
+    read_package_rows = import_jobs.read_package_rows
+
+    def stalled(*args):
+        rows = read_package_rows(*args)
+        yield next(rows)
+        # the worker stalls past IMPORT_STALE_AFTER, a restart requeues the job
+        # and another worker claims it
+        with SessionLocal() as db:
+            jobs = ImportJobRepository(db)
+            assert job_id in jobs.requeue_abandoned(timedelta(0))
+            assert jobs.claim(job_id) is not None
+        yield from rows
+
+    monkeypatch.setattr(import_jobs, "read_package_rows", stalled)
+    import_jobs.run_import_job(job_id)
+
+    try:
+        # nothing committed, the job and its file belong to the other worker
+        assert order_packages() == before
+        assert os.path.exists(path)
+        with SessionLocal() as db:
+            assert db.get(ImportJobSchema, job_id).status == "RUNNING"
+    finally:
+        os.remove(path)
+        with SessionLocal() as db:
+            db.delete(db.get(ImportJobSchema, job_id))
+            db.commit()
+
+
+def test_bulk_create_packages_missing_column(client, merchant_headers):
+    response = client.post(
+        "/api/v1/package/my_packages/bulk",
+        files={"file": ("packages.csv", "description,name\nx,y\n", "text/csv")},
+        headers=merchant_headers,
+    )
+    assert response.status_code == 400
+    assert "Missing column" in response.json()["detail"]
+
+
+def test_quote_packages(client, random_package_rate_id, merchant_headers):
+    rate = client.get(f"/api/v1/package_rate/{random_package_rate_id}").json()
+    spec = {
+        "width": 50,
+        "height": 40,
+        "length": 30,
+        "weight": rate["base_weight"] + 2.5,
+        "is_urgent": True,
+        "package_rate_id": random_package_rate_id,
+    }
+    quote = {"packages": [spec, {**spec, "width": 10}]}
+    assert client.post("/api/v1/package/quote", json=quote).status_code == 401
+
+    response = client.post(
+        "/api/v1/package/quote", json=quote, headers=merchant_headers
+    )
+    assert response.status_code == 200
+    oversized, regular = response.json()["packages"]
+
+    assert oversized["oversize"] == rate["oversize_rate"]
+    assert regular["oversize"] == 0
+    assert oversized["overweight"] == 2 * rate["overweight_rate_per_kg"]
+    assert oversized["urgent"] == rate["urgent_rate"]
+    assert oversized["fragile"] == 0
+    assert oversized["total"] == (
+        rate["base_rate"]
+        + rate["urgent_rate"]
+        + rate["oversize_rate"]
+        + 2 * rate["overweight_rate_per_kg"]
+    )
+    assert response.json()["total"] == oversized["total"] + regular["total"]
+
+
+def test_quote_packages_unknown_rate(client, merchant_headers):
+    spec = {"width": 1, "height": 1, "length": 1, "weight": 1}
+    response = client.post(
+        "/api/v1/package/quote",
+        json={"packages": [{**spec, "package_rate_id": str(uuid4())}]},
+        headers=merchant_headers,
+    )
+    assert response.status_code == 400
+
+
 @pytest.fixture
 def created_package(client):
     if not test_create_package.created_data:
@@ -185,3 +636,65 @@ def test_delete_package(client, created_package):
     id, data = created_package
     response = client.delete(f"/api/v1/package/{id}")
     assert response.status_code == 200
+
+
+def merchant_days(db):
+    """(rollup, the same numbers computed from the packages)"""
+    rollup = {
+        (row.merchant_id, row.date): (row.count, row.shipping, row.cod)
+        for row in db.scalars(select(MerchantDailyStatsSchema))
+        # days whose packages were all deleted stay behind as zeros
+        if row.count or row.shipping or row.cod
+    }
+    packages = {
+        (row[0], row[1]): tuple(row[2:])
+        for row in db.execute(
+            select(
+                OrderSchema.merchant_id,
+                cast(OrderSchema.date, Date),
+                func.count(PackageSchema.id),
+                func.coalesce(func.sum(PackageSchema.shipping_cost), 0),
+                func.coalesce(func.sum(PackageSchema.cod_cost), 0),
+            )
+            .join(OrderSchema, PackageSchema.order_id == OrderSchema.id)
+            .group_by(OrderSchema.merchant_id, cast(OrderSchema.date, Date))
+        )
+    }
+    return rollup, packages
+
+
+def test_merchant_daily_stats(client, bulk_csv, merchant_headers):
+    response = client.post(
+        "/api/v1/package/my_packages/bulk",
+        params={"batch_size": 7},
+        files={"file": ("packages.csv", bulk_csv(), "text/csv")},
+        headers=merchant_headers,
+    )
+    assert response.status_code == 200
+
+    with SessionLocal() as db:
+        created = db.scalars(
+            select(PackageSchema).where(PackageSchema.description.like("Bulk %"))
+        ).all()
+        created[0].cod_cost += 1000
+        created[1].status = "DELIVERED"
+        db.delete(created[2])
+        db.commit()
+
+        rollup, packages = merchant_days(db)
+        assert rollup.keys() == packages.keys()
+        for key, values in packages.items():
+            assert rollup[key] == pytest.approx(values)
+
+        MerchantDailyStatsRepository(db).backfill()
+        assert merchant_days(db)[0] == pytest.approx(packages)
+
+    response = client.get(
+        "/api/v1/merchant/dashboard/package_per_day",
+        params={"days_ago": 7},
+        headers=merchant_headers,
+    )
+    assert response.status_code == 200
+    days = response.json()
+    assert len(days) == 7
+    assert sum(day["count"] for day in days) >= 1
@@ -1,9 +1,15 @@
-from uuid import uuid4
+import time
+from uuid import uuid4, UUID
 
 import pytest
+from sqlalchemy import func, select
 
 from conftest import client
-from models.package_rate import PackageRateCreate
+from connection import SessionLocal, url
+from models.package_rate import PackageRateCreate, PackageRateUpdate
+from repositories.package_rate import PackageRateRepository
+from schemas.package import PackageSchema
+from utils.rate_cache import RateCache, RateListener, rate_cache
 
 
 def test_get_package_rates(client):
@@ -66,6 +72,44 @@ def test_patch_package_rate(client, created_package_rate):
     assert response.json() == json
 
 
+def test_rate_cache_invalidated_on_patch(client, created_package_rate):
+    id, json = created_package_rate
+    with SessionLocal() as db:
+        assert rate_cache.get(db, UUID(id)).base_rate == json["base_rate"]
+
+    response = client.patch(
+        f"/api/v1/package_rate/{id}", json={**json, "base_rate": 23000}
+    )
+    assert response.status_code == 200
+
+    with SessionLocal() as db:
+        assert rate_cache.get(db, UUID(id)).base_rate == 23000
+
+
+def test_rate_listener_invalidates_other_caches(created_package_rate):
+    id, _ = created_package_rate
+    other_process_cache = RateCache()
+    listener = RateListener(other_process_cache, url)
+    listener.start()
+    try:
+        assert listener.listening.wait(timeout=5)
+        with SessionLocal() as db:
+            other_process_cache.get(db, UUID(id))
+            assert other_process_cache._fresh_rates() is not None
+
+            PackageRateRepository(db).update(
+                UUID(id), PackageRateUpdate(fragile_rate=1)
+            )
+            for _ in range(50):
+                if other_process_cache._fresh_rates() is None:
+                    break
+                time.sleep(0.1)
+            assert other_process_cache._fresh_rates() is None
+            assert other_process_cache.get(db, UUID(id)).fragile_rate == 1
+    finally:
+        listener.stop()
+
+
 def test_delete_address(client, created_package_rate):
     id, _ = created_package_rate
     response = client.delete(f"/api/v1/package_rate/{id}")
@@ -73,3 +117,78 @@ def test_delete_address(client, created_package_rate):
 
     get_response = client.get(f"/api/v1/package_rate/{id}")
     assert get_response.status_code == 404
+
+
+def test_reprice_packages(client, staff_headers):
+    packages = client.get("/api/v1/package/search", params={"limit": 50}).json()
+    rate_id = packages["data"][0]["package_rate_id"]
+    rate = client.get(f"/api/v1/package_rate/{rate_id}").json()
+    reprice = f"/api/v1/package_rate/{rate_id}/reprice"
+
+    response = client.post(
+        reprice, headers=staff_headers, params={"status": ["ORDERED"], "batch_size": 7}
+    )
+    assert response.status_code == 200
+    dry_run = client.post(
+        reprice, headers=staff_headers, params={"status": ["ORDERED"], "dry_run": True}
+    )
+    assert dry_run.json() == {"dry_run": True, "packages": 0, "delta": 0}
+
+    def ordered_totals():
+        with SessionLocal() as db:
+            return db.execute(
+                select(func.count(), func.sum(PackageSchema.shipping_cost)).where(
+                    PackageSchema.package_rate_id == rate_id,
+                    PackageSchema.status == "ORDERED",
+                )
+            ).one()
+
+    ordered, shipping = ordered_totals()
+
+    client.patch(
+        f"/api/v1/package_rate/{rate_id}",
+        json={**rate, "base_rate": rate["base_rate"] + 1000},
+    )
+    try:
+        dry_run = client.post(
+            reprice,
+            headers=staff_headers,
+            params={"status": ["ORDERED"], "dry_run": True},
+        )
+        assert dry_run.json() == {
+            "dry_run": True,
+            "packages": ordered,
+            "delta": 1000 * ordered,
+        }
+
+        response = client.post(
+            reprice, headers=staff_headers, params={"status": ["ORDERED"]}
+        )
+        assert response.json() == {
+            "dry_run": False,
+            "packages": ordered,
+            "delta": 1000 * ordered,
+        }
+    finally:
+        # later tests total these shipping costs, put them back as they were
+        client.patch(f"/api/v1/package_rate/{rate_id}", json=rate)
+        response = client.post(
+            reprice, headers=staff_headers, params={"status": ["ORDERED"]}
+        )
+    assert response.json()["delta"] == -1000 * ordered
+    assert ordered_totals() == (ordered, shipping)
+
+
+def test_reprice_unknown_rate(client, staff_headers):
+    response = client.post(
+        f"/api/v1/package_rate/{uuid4()}/reprice", headers=staff_headers
+    )
+    assert response.status_code == 404
+
+
+def test_reprice_requires_staff(client, merchant_headers):
+    rate_id = client.get("/api/v1/package_rate").json()[0]["id"]
+    reprice = f"/api/v1/package_rate/{rate_id}/reprice"
+    assert client.post(reprice, params={"dry_run": True}).status_code == 401
+    response = client.post(reprice, params={"dry_run": True}, headers=merchant_headers)
+    assert response.status_code == 401
@@ -0,0 +1,81 @@
+from uuid import uuid4
+
+import numpy as np
+
+from models.package import PackageCreate
+from models.package_rate import PackageRate
+from utils.pricing import price_batch, price_package, price_packages
+
+rates = [
+    PackageRate(
+        id=uuid4(),
+        name=f"rate {i}",
+        base_rate=21000 + i * 1000.5,
+        base_weight=2 + i * 0.7,
+        oversize_rate=10000 + i * 333.3,
+        overweight_rate_per_kg=5000.25 + i,
+        fragile_rate=15000,
+        urgent_rate=20000.1,
+    )
+    for i in range(3)
+]
+
+
+def random_packages(n: int, seed: int = 0) -> list[PackageCreate]:
+    rng = np.random.default_rng(seed)
+    # dimensions around the 50000 cm3 threshold, weights around the base weights
+    sides = rng.uniform(1, 60, size=(n, 3)).round(2)
+    sides[: n // 10] = [50, 40, 25]
+    weights = rng.uniform(0, 12, size=n).round(3)
+    weights[n // 10 : n // 5] = rates[0].base_weight + rng.integers(
+        -2, 3, n // 5 - n // 10
+    )
+    return [
+        PackageCreate(
+            merchant_id=uuid4(),
+            order_id=uuid4(),
+            description="",
+            address_id=uuid4(),
+            street="",
+            name="",
+            phone="",
+            length=length,
+            width=width,
+            height=height,
+            weight=weight,
+            is_urgent=bool(rng.integers(2)),
+            is_fragile=bool(rng.integers(2)),
+            package_rate_id=rates[rng.integers(len(rates))].id,
+        )
+        for (length, width, height), weight in zip(sides, weights)
+    ]
+
+
+def test_price_batch_matches_scalar():
+    packages = random_packages(2000)
+    positions = {rate.id: i for i, rate in enumerate(rates)}
+    by_id = {rate.id: rate for rate in rates}
+
+    totals = price_batch(
+        np.array([p.length for p in packages]),
+        np.array([p.width for p in packages]),
+        np.array([p.height for p in packages]),
+        np.array([p.weight for p in packages]),
+        np.array([p.is_urgent for p in packages]),
+        np.array([p.is_fragile for p in packages]),
+        np.array([positions[p.package_rate_id] for p in packages]),
+        rates=rates,
+    )
+    expected = [price_package(p, by_id[p.package_rate_id]) for p in packages]
+
+    # exactly the same floats, not approximately
+    assert totals.tolist() == expected
+
+
+def test_price_packages_unknown_rate():
+    packages = random_packages(5)
+    packages[2].package_rate_id = uuid4()
+    prices = price_packages(packages, {rate.id: rate for rate in rates})
+
+    assert prices[2] is None
+    assert None not in prices[:2] + prices[3:]
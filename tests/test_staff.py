@@ -3,10 +3,13 @@ import random
 from uuid import uuid4
 
 import pytest
+from sqlalchemy import select, update
 
 from conftest import client
+from connection import SessionLocal
 from models.users.account import AccountCreate, AccountUpdate
 from models.users.staff import StaffCreateNoID, StaffUpdate, StaffDetails
+from schemas.package import PackageSchema
 
 
 @pytest.fixture
@@ -136,3 +139,73 @@ def test_delete_invalid(client):
     response = client.delete(f"/api/v1/staff/{uuid4()}")
     print(response.json())
     assert response.status_code == 404
+
+
+def test_dashboard_overview(client, staff_headers):
+    dates = {"start_date": "2000-01-01T00:00:00", "end_date": "2100-01-01T00:00:00"}
+    response = client.get(
+        "/api/v1/staff/dashboard/overview",
+        params={**dates, "top": 3},
+        headers=staff_headers,
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+
+    packages = client.get("/api/v1/package").json()
+    assert summary["count"] == len([p for p in packages if p["order_id"]])
+    assert sum(s["count"] for s in summary["status"]) == summary["count"]
+    assert sum(d["count"] for d in summary["days"]) == summary["count"]
+    assert sum(d["shipping"] for d in summary["days"]) == pytest.approx(
+        summary["shipping"]
+    )
+    top = summary["top_merchants"]
+    assert 0 < len(top) <= 3
+    assert [m["shipping"] for m in top] == sorted(
+        (m["shipping"] for m in top), reverse=True
+    )
+
+    response = client.get(
+        "/api/v1/staff/dashboard/recent_packages",
+        params={**dates, "limit": 5, "count": "none"},
+        headers=staff_headers,
+    )
+    assert response.status_code == 200
+    assert len(response.json()["data"]) == 5
+
+
+def test_dashboard_overview_null_status(client, staff_headers):
+    with SessionLocal() as db:
+        package = db.scalars(
+            select(PackageSchema).where(PackageSchema.order_id.is_not(None)).limit(1)
+        ).one()
+        id, status = package.id, package.status
+        package.status = None
+        db.commit()
+    try:
+        response = client.get(
+            "/api/v1/staff/dashboard/overview",
+            params={
+                "start_date": "2000-01-01T00:00:00",
+                "end_date": "2100-01-01T00:00:00",
+            },
+            headers=staff_headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["summary"]["status"][-1]["status"] is None
+    finally:
+        with SessionLocal() as db:
+            db.execute(
+                update(PackageSchema)
+                .where(PackageSchema.id == id)
+                .values(status=status)
+            )
+            db.commit()
+
+
+def test_dashboard_overview_merchant(client, merchant_headers):
+    response = client.get(
+        "/api/v1/staff/dashboard/overview",
+        params={"start_date": "2000-01-01T00:00:00", "end_date": "2000-01-02T00:00:00"},
+        headers=merchant_headers,
+    )
+    assert response.status_code == 401
@@ -1,9 +1,18 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from uuid import uuid4
 
 import pytest
+from sqlalchemy import delete, insert, select, update
 
 from conftest import client
+from connection import SessionLocal
+from models.package import PackageCreate, PackageUpdate
 from models.storage_block import StorageBlockCreate, StorageBlock, StorageBlockUpdate
+from repositories.package import PACKAGE_COLUMNS, PackageRepository
+from repositories.storage_block import StorageBlockRepository
+from schemas.package import PackageSchema
+from schemas.storage_block import StorageBlockSchema
 
 
 def test_get_storage_block(client):
@@ -50,3 +59,294 @@ def test_delete_block(client, get_block_data):
     id, data = get_block_data
     response = client.delete(f"/api/v1/storage_block/{id}")
     assert response.status_code == 200
+
+
+@pytest.fixture
+def two_blocks():
+    with SessionLocal() as db:
+        ids = [uuid4(), uuid4()]
+        db.execute(
+            insert(StorageBlockSchema),
+            [
+                {"id": id, "name": "Counted", "max_weight": 1e6, "max_size": 1e9}
+                | {"max_package": 100}
+                for id in ids
+            ],
+        )
+        db.commit()
+    yield ids
+    with SessionLocal() as db:
+        db.execute(delete(PackageSchema).where(PackageSchema.block_id.in_(ids)))
+        db.execute(delete(StorageBlockSchema).where(StorageBlockSchema.id.in_(ids)))
+        db.commit()
+
+
+def occupancy(db, block_id):
+    return StorageBlockRepository(db).get_occupancy(block_id)[3:]
+
+
+def test_block_occupancy_counters(two_blocks):
+    first, second = two_blocks
+    with SessionLocal() as db:
+        template = db.execute(select(*PACKAGE_COLUMNS).limit(1)).one()._asdict()
+        packages = [
+            template
+            | {"id": uuid4(), "block_id": first, "weight": i + 1}
+            | {"width": 2, "height": 3, "length": 4}
+            for i in range(5)
+        ]
+        db.execute(insert(PackageSchema), packages)
+        db.commit()
+        assert occupancy(db, first) == (15, 120, 5)
+
+        # a move, a change and a delete in one transaction
+        db.execute(
+            update(PackageSchema)
+            .where(PackageSchema.id.in_([p["id"] for p in packages[:2]]))
+            .values(block_id=second)
+        )
+        db.execute(
+            update(PackageSchema)
+            .where(PackageSchema.id == packages[2]["id"])
+            .values(weight=10, width=10)
+        )
+        db.execute(delete(PackageSchema).where(PackageSchema.id == packages[3]["id"]))
+        db.commit()
+        assert occupancy(db, first) == (15, 144, 2)
+        assert occupancy(db, second) == (3, 48, 2)
+        assert StorageBlockRepository(db).reconcile() == []
+
+
+def test_block_occupancy_reconcile(two_blocks):
+    first, _ = two_blocks
+    with SessionLocal() as db:
+        db.execute(
+            update(StorageBlockSchema)
+            .where(StorageBlockSchema.id == first)
+            .values(current_count=7, current_weight=1.5)
+        )
+        db.commit()
+
+        repo = StorageBlockRepository(db)
+        drifted = repo.reconcile()
+        assert [block["id"] for block in drifted] == [first]
+        assert occupancy(db, first) == (1.5, 0, 7)
+
+        assert repo.reconcile(repair=True) == drifted
+        assert occupancy(db, first) == (0, 0, 0)
+        assert repo.reconcile() == []
+
+
+def add_packages(block_id, count: int, **fields) -> list[PackageSchema]:
+    """Creates ``count`` packages through the repository, each in its own
+    session and thread, all at once. Returns what was created"""
+    with SessionLocal() as db:
+        template = db.execute(select(*PACKAGE_COLUMNS).limit(1)).one()._asdict()
+    start = threading.Barrier(count)
+
+    def add(_):
+        package = PackageCreate(**(template | {"block_id": block_id} | fields))
+        with SessionLocal() as db:
+            start.wait()
+            try:
+                return PackageRepository(db).create(package).id
+            except ValueError:
+                return None
+
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return [id for id in pool.map(add, range(count)) if id]
+
+
+@pytest.mark.parametrize(
+    "limits, fits",
+    [
+        ({"max_package": 3}, 3),
+        ({"max_weight": 10}, 3),  # 3 kg each
+        ({"max_size": 100}, 4),  # 24 cm3 each
+    ],
+)
+def test_block_capacity_concurrent_create(two_blocks, limits, fits):
+    block_id, _ = two_blocks
+    with SessionLocal() as db:
+        db.execute(
+            update(StorageBlockSchema)
+            .where(StorageBlockSchema.id == block_id)
+            .values(**limits)
+        )
+        db.commit()
+
+    created = add_packages(block_id, 12, weight=3, width=2, height=3, length=4)
+    assert len(created) == fits
+
+    with SessionLocal() as db:
+        block = StorageBlockRepository(db).get_occupancy(block_id)
+        assert block.current_count <= block.max_package
+        assert block.current_weight <= block.max_weight
+        assert block.current_size <= block.max_size
+        assert StorageBlockRepository(db).reconcile() == []
+
+
+def test_block_capacity_concurrent_move(two_blocks):
+    full, other = two_blocks
+    with SessionLocal() as db:
+        db.execute(
+            update(StorageBlockSchema)
+            .where(StorageBlockSchema.id == full)
+            .values(max_package=4)
+        )
+        db.commit()
+    # 2 packages in the target already, 10 trying to move in
+    add_packages(full, 2, weight=1)
+    ids = add_packages(other, 10, weight=1)
+    with SessionLocal() as db:
+        order_id = db.get(PackageSchema, ids[0]).order_id
+    start = threading.Barrier(len(ids))
+
+    def move(id):
+        package = PackageUpdate(block_id=full, order_id=order_id)
+        with SessionLocal() as db:
+            start.wait()
+            try:
+                PackageRepository(db).update(id, package)
+                return True
+            except ValueError:
+                return False
+
+    with ThreadPoolExecutor(max_workers=len(ids)) as pool:
+        moved = sum(pool.map(move, ids))
+    assert moved == 2
+
+    with SessionLocal() as db:
+        assert StorageBlockRepository(db).get_occupancy(full).current_count == 4
+        assert StorageBlockRepository(db).reconcile() == []
+
+
+def test_allocate_blocks(client, two_blocks, staff_headers, merchant_headers):
+    first, second = two_blocks
+    with SessionLocal() as db:
+        db.execute(
+            update(StorageBlockSchema)
+            .where(StorageBlockSchema.id.in_(two_blocks))
+            .values(max_weight=10, max_package=3)
+        )
+        db.commit()
+        template = db.execute(select(*PACKAGE_COLUMNS).limit(1)).one()._asdict()
+        # 23 kg for 20 kg of room, the 9 goes alone, the 2 fills up after it
+        # and one of the 4s is left out
+        packages = [
+            template | {"id": uuid4(), "block_id": None, "weight": weight}
+            for weight in [4, 9, 2, 4, 4]
+        ]
+        db.execute(insert(PackageSchema), packages)
+        db.commit()
+    ids = [str(package["id"]) for package in packages]
+    body = {"package_ids": ids + [str(uuid4())], "block_ids": [str(first), str(second)]}
+
+    response = client.post("/api/v1/storage_block/allocate", json=body)
+    assert response.status_code == 401
+    response = client.post(
+        "/api/v1/storage_block/allocate", json=body, headers=merchant_headers
+    )
+    assert response.status_code == 401
+
+    response = client.post(
+        "/api/v1/storage_block/allocate?dry_run=true", json=body, headers=staff_headers
+    )
+    assert response.status_code == 200
+    with SessionLocal() as db:
+        assert occupancy(db, first)[2] == occupancy(db, second)[2] == 0
+
+    response = client.post(
+        "/api/v1/storage_block/allocate", json=body, headers=staff_headers
+    )
+    assert response.status_code == 200
+    allocation = response.json()
+    assert len(allocation["assignments"]) == 4
+    assert len(allocation["unplaced"]) == 1
+    assert allocation["skipped"] == body["package_ids"][-1:]
+    with SessionLocal() as db:
+        used = [occupancy(db, block)[::2] for block in two_blocks]
+        assert sorted(used) == [(9, 1), (10, 3)]
+        assert StorageBlockRepository(db).reconcile() == []
+
+    # placed packages are not moved again
+    response = client.post(
+        "/api/v1/storage_block/allocate", json=body, headers=staff_headers
+    )
+    assert len(response.json()["skipped"]) == 5
+
+
+def test_suggest_blocks(client, two_blocks):
+    first, second = two_blocks
+    # far beyond any real block, so nothing else can be suggested
+    with SessionLocal() as db:
+        db.execute(
+            update(StorageBlockSchema)
+            .where(StorageBlockSchema.id.in_(two_blocks))
+            .values(max_weight=1e15, max_size=1e18)
+        )
+        db.commit()
+    add_packages(first, 1, weight=1000)
+    params = {"volume": 1e17, "weight": 1e14}
+
+    response = client.get("/api/v1/storage_block/suggest", params=params)
+    assert response.status_code == 200
+    suggested = [block["id"] for block in response.json()]
+    assert suggested == [str(second), str(first)]
+
+    response = client.get("/api/v1/storage_block/suggest", params=params | {"k": 1})
+    assert [block["id"] for block in response.json()] == [str(second)]
+
+    response = client.get("/api/v1/storage_block/suggest", params={"volume": 1e10})
+    assert response.status_code == 422
+
+
+def test_move_packages(client, two_blocks, staff_headers, merchant_headers):
+    first, second = two_blocks
+    ids = add_packages(first, 5, weight=2, width=2, height=3, length=4)
+
+    # empty the first block
+    response = client.post(
+        "/api/v1/package/move",
+        json={"block_id": str(second), "from_block_ids": [str(first)]},
+        headers=staff_headers,
+    )
+    assert response.status_code == 200
+    assert response.json() == {"moved": 5, "weight": 10, "size": 120}
+
+    # two back by id, the rest can't follow into a block of 4
+    with SessionLocal() as db:
+        db.execute(
+            update(StorageBlockSchema)
+            .where(StorageBlockSchema.id == first)
+            .values(max_package=4)
+        )
+        db.commit()
+    response = client.post(
+        "/api/v1/package/move",
+        json={"block_id": str(first), "package_ids": [str(id) for id in ids[:2]]},
+        headers=staff_headers,
+    )
+    assert response.json()["moved"] == 2
+    response = client.post(
+        "/api/v1/package/move",
+        json={"block_id": str(first), "from_block_ids": [str(second)]},
+        headers=staff_headers,
+    )
+    assert response.status_code == 400
+
+    with SessionLocal() as db:
+        assert occupancy(db, first) == (4, 48, 2)
+        assert occupancy(db, second) == (6, 72, 3)
+        assert StorageBlockRepository(db).reconcile() == []
+
+    response = client.post(
+        "/api/v1/package/move", json={"block_id": str(first)}, headers=staff_headers
+    )
+    assert response.status_code == 400
+
+    # only staff move packages
+    move = {"block_id": str(first), "from_block_ids": [str(second)]}
+    assert client.post("/api/v1/package/move", json=move).status_code == 401
+    response = client.post("/api/v1/package/move", json=move, headers=merchant_headers)
+    assert response.status_code == 401
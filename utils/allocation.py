@@ -0,0 +1,47 @@
+import numpy as np
+
+# placement of a package that fits in no block
+UNPLACED = -1
+
+
+def first_fit_decreasing(
+    weight: np.ndarray,
+    size: np.ndarray,
+    free_weight: np.ndarray,
+    free_size: np.ndarray,
+    free_count: np.ndarray,
+) -> np.ndarray:
+    """Block index for every package, ``UNPLACED`` for the ones that fit nowhere.
+
+    Packages go biggest first, size being the larger of their weight and volume
+    relative to an average block, each into the first block with room for it in
+    all three dimensions. Blocks are tried in the order given, so put the ones
+    to fill first in front. The free_* arrays are not modified.
+    """
+    weight = np.asarray(weight, dtype=np.float64)
+    size = np.asarray(size, dtype=np.float64)
+    free_weight = np.array(free_weight, dtype=np.float64)
+    free_size = np.array(free_size, dtype=np.float64)
+    free_count = np.array(free_count, dtype=np.int64)
+
+    placement = np.full(len(weight), UNPLACED, dtype=np.intp)
+    if not len(weight) or not len(free_weight):
+        return placement
+
+    # weight and volume in comparable units, the share of an average block
+    key = np.maximum(
+        weight / max(free_weight.mean(), 1e-9), size / max(free_size.mean(), 1e-9)
+    )
+    open_blocks = free_count > 0
+    for i in np.argsort(-key, kind="stable"):
+        fits = open_blocks & (free_weight >= weight[i]) & (free_size >= size[i])
+        block = fits.argmax()
+        if not fits[block]:
+            continue
+        placement[i] = block
+        free_weight[block] -= weight[i]
+        free_size[block] -= size[i]
+        free_count[block] -= 1
+        if not free_count[block]:
+            open_blocks[block] = False
+    return placement
@@ -0,0 +1,173 @@
+import zlib
+from datetime import datetime
+from typing import Iterable, Iterator, Literal, Mapping
+from uuid import UUID
+
+import xlsxwriter
+from sqlalchemy import Engine, Select, func, literal
+
+# exported package columns in sheet order, dimensions and costs come last
+PACKAGE_EXPORT_COLUMNS = [
+    "id",
+    "order_id",
+    "address_id",
+    "description",
+    "street",
+    "name",
+    "phone",
+    "is_fragile",
+    "is_urgent",
+    "status",
+    "order_date",
+    "width",
+    "length",
+    "height",
+    "weight",
+    "shipping_cost",
+    "cod_cost",
+]
+CURRENCY_COLUMNS = {"shipping_cost", "cod_cost"}
+DATE_COLUMNS = {"order_date"}
+
+HEADER_ROW = 5
+FONT = "JetBrains Mono"
+
+
+def _column_formats(workbook, extra: dict | None = None) -> list:
+    extra = extra or {}
+    formats = []
+    for column in PACKAGE_EXPORT_COLUMNS:
+        if column in CURRENCY_COLUMNS:
+            formats.append(workbook.add_format({"num_format": '#,##0"₫"', **extra}))
+        elif column in DATE_COLUMNS:
+            formats.append(
+                workbook.add_format({"num_format": "yyyy-mm-dd hh:mm:ss", **extra})
+            )
+        else:
+            formats.append(workbook.add_format(extra) if extra else None)
+    return formats
+
+
+def _cell_value(value):
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def write_packages_xlsx(
+    path: str,
+    rows: Iterable[Mapping],
+    summary: dict,
+    days_ago: int,
+    exported_on: str,
+):
+    """Write the package report to ``path`` one row at a time.
+
+    ``constant_memory`` flushes each row to disk as soon as the next one starts,
+    so rows must come in sheet order and memory stays flat whatever the row count.
+    ``summary`` holds the totals and column widths, computed beforehand in SQL.
+    """
+    workbook = xlsxwriter.Workbook(
+        path, {"constant_memory": True, "remove_timezone": True}
+    )
+    sheet = workbook.add_worksheet("Packages")
+
+    title_format = workbook.add_format(
+        {"font_name": FONT, "font_size": 18, "bold": True}
+    )
+    subtitle_format = workbook.add_format({"font_name": FONT, "font_size": 11})
+    header_format = workbook.add_format(
+        {
+            "font_name": FONT,
+            "font_size": 11,
+            "bold": True,
+            "align": "center",
+            "bg_color": "#B3D8A8",
+            "border": 1,
+        }
+    )
+    plain_formats = _column_formats(workbook)
+    # zebra striping, every other row gets the fill on top of the column format
+    striped_formats = _column_formats(workbook, {"bg_color": "#FBFFE4"})
+
+    for col_num, column in enumerate(PACKAGE_EXPORT_COLUMNS):
+        width = max(summary["widths"].get(column) or 0, len(column))
+        sheet.set_column(col_num, col_num, width + 2, plain_formats[col_num])
+
+    # Header
+    sheet.write("A1", "ParcelPoint", title_format)
+    sheet.write("A2", "Package Report", subtitle_format)
+    sheet.write("E2", f"Total Revenue: {summary['sum_cod']}", subtitle_format)
+    sheet.write("A3", f"Report exported on {exported_on}", subtitle_format)
+    sheet.write("E3", f"Total Shipping fee: {summary['sum_shipping']}", subtitle_format)
+    sheet.write("A4", f"Days Queried: {days_ago}", subtitle_format)
+    sheet.write("E4", f"Total Packages: {summary['count']}", subtitle_format)
+
+    for col_num, column in enumerate(PACKAGE_EXPORT_COLUMNS):
+        sheet.write(HEADER_ROW, col_num, column, header_format)
+
+    row_num = HEADER_ROW
+    for row in rows:
+        row_num += 1
+        formats = striped_formats if row_num % 2 == 0 else plain_formats
+        for col_num, column in enumerate(PACKAGE_EXPORT_COLUMNS):
+            value = _cell_value(row[column])
+            if value is None:
+                if formats[col_num] is not None:
+                    sheet.write_blank(row_num, col_num, None, formats[col_num])
+            elif isinstance(value, datetime):
+                sheet.write_datetime(row_num, col_num, value, formats[col_num])
+            else:
+                sheet.write(row_num, col_num, value, formats[col_num])
+
+    workbook.close()
+
+
+CopyFormat = Literal["csv", "ndjson"]
+
+COPY_OPTIONS = {
+    "csv": "FORMAT csv, HEADER",
+    # one json object per line, in csv with control characters as quote and
+    # delimiter nothing inside the json is quoted or escaped
+    "ndjson": "FORMAT csv, QUOTE e'\\x01', DELIMITER e'\\x02'",
+}
+
+
+def _as_json_lines(query: Select) -> Select:
+    pairs = []
+    for column in query.selected_columns:
+        pairs += [literal(column.key), column]
+    return query.with_only_columns(func.json_build_object(*pairs))
+
+
+def copy_query(
+    engine: Engine,
+    query: Select,
+    format: CopyFormat = "csv",
+    compress: bool = False,
+) -> Iterator[bytes]:
+    """Stream ``COPY (query) TO STDOUT`` as it comes off the wire, the rows are
+    never parsed in Python. ``compress`` gzips the stream on the fly.
+
+    Runs on its own pooled connection, the request session is already closed by
+    the time a streamed response is sent.
+    """
+    if format == "ndjson":
+        query = _as_json_lines(query)
+    compiled = query.compile(dialect=engine.dialect)
+    statement = f"COPY ({compiled}) TO STDOUT WITH ({COPY_OPTIONS[format]})"
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            # psycopg binds the parameters client side, COPY can't take them
+            with cursor.copy(statement, compiled.params) as copy:
+                for data in copy:
+                    chunk = compressor.compress(data) if compressor else bytes(data)
+                    if chunk:
+                        yield chunk
+        if compressor:
+            yield compressor.flush()
+    finally:
+        connection.close()
@@ -0,0 +1,144 @@
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import IO
+from uuid import UUID, uuid4
+
+from connection import SessionLocal
+from models.order import Order
+from repositories.import_job import ImportJobRepository
+from repositories.package import PackageRepository
+from utils.package_csv import open_package_csv, read_package_rows
+
+IMPORT_DIR = os.getenv(
+    "IMPORT_DIR", os.path.join(tempfile.gettempdir(), "parcelpoint_imports")
+)
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "2"))
+# a running job that has not reported for this long is considered abandoned
+IMPORT_STALE_AFTER = timedelta(seconds=int(os.getenv("IMPORT_STALE_AFTER", "300")))
+# how often a running job renews its claim, well within IMPORT_STALE_AFTER even
+# when a batch takes long between progress reports
+IMPORT_HEARTBEAT = IMPORT_STALE_AFTER.total_seconds() / 5
+
+executor = ThreadPoolExecutor(
+    max_workers=IMPORT_WORKERS, thread_name_prefix="package-import"
+)
+
+
+def save_upload(file: IO[bytes]) -> str:
+    """Copies the upload next to the other pending imports, it has to outlive the
+    request. Raises ValueError, and keeps nothing, when the header is invalid"""
+    os.makedirs(IMPORT_DIR, exist_ok=True)
+    path = os.path.join(IMPORT_DIR, f"{uuid4()}.csv")
+    with open(path, "wb") as saved:
+        shutil.copyfileobj(file, saved)
+
+    try:
+        with open(path, "rb") as saved:
+            open_package_csv(saved)
+    except ValueError:
+        os.remove(path)
+        raise
+    return path
+
+
+def keep_claim(job_id: UUID, token: UUID, stop: threading.Event):
+    """Renews the claim every IMPORT_HEARTBEAT until ``stop`` is set or the
+    claim is lost"""
+    with SessionLocal() as db:
+        jobs = ImportJobRepository(db)
+        while not stop.wait(IMPORT_HEARTBEAT):
+            try:
+                if not jobs.renew(job_id, token):
+                    return
+            except Exception as e:
+                print(f"import job {job_id} heartbeat failed: {e}")
+                db.rollback()
+
+
+def run_import_job(job_id: UUID):
+    with SessionLocal() as job_db, SessionLocal() as db:
+        jobs = ImportJobRepository(job_db)
+        job = jobs.claim(job_id)
+        if job is None:
+            # finished, or another worker got it first
+            return
+        token = job.claim_token
+
+        order = None
+        if job.order_id is None:
+            # created with the packages, a failed import leaves no empty order
+            order = Order(
+                id=uuid4(),
+                merchant_id=job.merchant_id,
+                date=datetime.now(),
+                details=f"Bulk order auto-created at {datetime.now()}",
+            )
+        order_id = job.order_id or order.id
+
+        def progress(processed: int, rejected: int):
+            if not jobs.report_progress(job_id, token, processed, rejected):
+                raise RuntimeError("the job was requeued and claimed again")
+
+        def succeed(report: dict):
+            # in the packages' transaction, they commit together or not at all
+            if not ImportJobRepository(db).finish(
+                job_id,
+                token,
+                "SUCCEEDED",
+                result=report,
+                commit=False,
+                order_id=order_id,
+            ):
+                raise RuntimeError("the job was requeued and claimed again")
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=keep_claim,
+            args=(job_id, token, stop),
+            name="import-heartbeat",
+            daemon=True,
+        )
+        heartbeat.start()
+        claimed = True
+        try:
+            with open(job.file_path, "rb") as file:
+                rows = read_package_rows(
+                    open_package_csv(file), job.merchant_id, order_id
+                )
+                PackageRepository(db).import_packages(
+                    rows,
+                    batch_size=job.batch_size,
+                    skip_invalid=job.skip_invalid,
+                    progress=progress,
+                    before_commit=succeed,
+                    order=order,
+                )
+        except Exception as e:
+            print(f"import job {job_id} failed: {e}")
+            job_db.rollback()
+            claimed = jobs.finish(job_id, token, "FAILED", error=str(e))
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        # a worker that lost the claim leaves the file to the one that has it
+        if claimed and os.path.exists(job.file_path):
+            os.remove(job.file_path)
+
+
+def submit_import_job(job_id: UUID):
+    executor.submit(run_import_job, job_id)
+
+
+def resume_import_jobs():
+    """Queues again the jobs a previous run of the app did not finish"""
+    with SessionLocal() as db:
+        job_ids = ImportJobRepository(db).requeue_abandoned(IMPORT_STALE_AFTER)
+    for job_id in job_ids:
+        submit_import_job(job_id)
+    if job_ids:
+        print(f"resumed {len(job_ids)} import jobs")
@@ -0,0 +1,87 @@
+import csv
+import io
+from typing import IO, Iterator
+from uuid import UUID
+
+from pydantic import ValidationError
+
+from models.package import PackageCreate
+
+REQUIRED_COLUMNS = [
+    "description",
+    "address_id",
+    "name",
+    "phone",
+    "street",
+    "width",
+    "height",
+    "length",
+    "weight",
+    "is_fragile",
+    "is_urgent",
+    "package_rate_id",
+]
+
+# (line number, parsed package, why the row could not be parsed)
+ImportRow = tuple[int, PackageCreate | None, str | None]
+
+
+def parse_bool(value: str | None) -> bool:
+    value = (value or "").strip().lower()
+    if value in ("", "0", "false", "no", "n", "f"):
+        return False
+    if value in ("1", "true", "yes", "y", "t"):
+        return True
+    raise ValueError(f"Invalid boolean: {value}")
+
+
+def open_package_csv(file: IO[bytes]) -> csv.DictReader:
+    """Reader over an uploaded file, decoded as it is read instead of loading the
+    whole upload. Raises ValueError when a required column is missing"""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+    missing = [
+        column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])
+    ]
+    if missing:
+        raise ValueError(f"Missing column: {', '.join(missing)}")
+    return reader
+
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+        for error in e.errors()
+    )
+
+
+def read_package_rows(
+    reader: csv.DictReader, merchant_id: UUID, order_id: UUID
+) -> Iterator[ImportRow]:
+    for row in reader:
+        try:
+            package = PackageCreate(
+                merchant_id=merchant_id,
+                order_id=order_id,
+                description=row["description"],
+                address_id=row["address_id"],
+                name=row["name"],
+                phone=row["phone"],
+                street=row["street"],
+                width=float(row["width"]),
+                height=float(row["height"]),
+                length=float(row["length"]),
+                weight=float(row["weight"]),
+                is_fragile=parse_bool(row["is_fragile"]),
+                is_urgent=parse_bool(row["is_urgent"]),
+                status=row.get("status") or "ORDERED",
+                package_rate_id=row["package_rate_id"],
+                # optional column, packages without it are placed later
+                block_id=row.get("block_id") or None,
+            )
+        except ValidationError as e:
+            yield reader.line_num, None, _validation_message(e)
+        except (TypeError, ValueError) as e:
+            yield reader.line_num, None, f"Invalid value: {str(e)}"
+        else:
+            yield reader.line_num, package, None
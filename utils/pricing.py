@@ -0,0 +1,129 @@
+from typing import Sequence
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import case, func
+
+from models.package import PackageCreate
+from models.package_rate import PackageRate
+
+# 50000 cm3 standard base for oversize
+OVERSIZE_VOLUME = 50000
+
+
+def price_package(package: PackageCreate, rate: PackageRate) -> float:
+    oversize = package.length * package.width * package.height - OVERSIZE_VOLUME
+    overweight = int(package.weight - rate.base_weight)
+    urgent = rate.urgent_rate if package.is_urgent else 0
+    fragile = rate.fragile_rate if package.is_fragile else 0
+
+    total_fee = (
+        rate.base_rate
+        + urgent
+        + fragile
+        + (rate.oversize_rate if oversize > 0 else 0)
+        + (overweight * rate.overweight_rate_per_kg if overweight > 0 else 0)
+    )
+
+    return total_fee
+
+
+def shipping_cost_expression(package, rate):
+    """``price_package`` as a SQL expression over package and packagerate columns,
+    float8 arithmetic in the same order so it gives the same numbers"""
+    overweight = func.trunc(package.weight - rate.base_weight)
+    return (
+        rate.base_rate
+        + case((package.is_urgent, rate.urgent_rate), else_=0)
+        + case((package.is_fragile, rate.fragile_rate), else_=0)
+        + case(
+            (
+                package.length * package.width * package.height - OVERSIZE_VOLUME > 0,
+                rate.oversize_rate,
+            ),
+            else_=0,
+        )
+        + case(
+            (overweight > 0, overweight * rate.overweight_rate_per_kg),
+            else_=0,
+        )
+    )
+
+
+def price_breakdown(
+    length: np.ndarray,
+    width: np.ndarray,
+    height: np.ndarray,
+    weight: np.ndarray,
+    is_urgent: np.ndarray,
+    is_fragile: np.ndarray,
+    rate_index: np.ndarray,
+    rates: Sequence[PackageRate],
+) -> dict[str, np.ndarray]:
+    """Every fee of ``price_package`` for a whole batch of packages at once.
+
+    The arrays hold one entry per package, ``rate_index`` points into ``rates``.
+    Fees are computed with the same operations in the same order as the scalar
+    version, so ``total`` matches it exactly, not just approximately.
+    """
+    rate_index = np.asarray(rate_index, dtype=np.intp)
+
+    def rate_column(name: str) -> np.ndarray:
+        column = np.array([getattr(rate, name) for rate in rates], dtype=np.float64)
+        return column[rate_index]
+
+    base = rate_column("base_rate")
+    urgent = np.where(is_urgent, rate_column("urgent_rate"), 0.0)
+    fragile = np.where(is_fragile, rate_column("fragile_rate"), 0.0)
+
+    volume = np.asarray(length, dtype=np.float64) * width * height
+    oversize = np.where(volume - OVERSIZE_VOLUME > 0, rate_column("oversize_rate"), 0.0)
+
+    # int() truncates toward zero, so does np.trunc
+    overweight_kg = np.trunc(
+        np.asarray(weight, dtype=np.float64) - rate_column("base_weight")
+    )
+    overweight = np.where(
+        overweight_kg > 0, overweight_kg * rate_column("overweight_rate_per_kg"), 0.0
+    )
+
+    return {
+        "base": base,
+        "urgent": urgent,
+        "fragile": fragile,
+        "oversize": oversize,
+        "overweight": overweight,
+        "total": base + urgent + fragile + oversize + overweight,
+    }
+
+
+def price_batch(*columns, rates: Sequence[PackageRate]) -> np.ndarray:
+    """Shipping cost of every package, see ``price_breakdown`` for the columns"""
+    return price_breakdown(*columns, rates=rates)["total"]
+
+
+def price_packages(
+    packages: Sequence[PackageCreate], rates: dict[UUID, PackageRate]
+) -> list[float | None]:
+    """``price_package`` over a list of packages, None where the rate is unknown"""
+    rate_list = list(rates.values())
+    positions = {rate_id: i for i, rate_id in enumerate(rates)}
+    rate_index = np.array(
+        [positions.get(package.package_rate_id, -1) for package in packages],
+        dtype=np.intp,
+    )
+    known = rate_index >= 0
+    if not rate_list or not known.any():
+        return [None] * len(packages)
+
+    totals = price_batch(
+        np.array([package.length for package in packages], dtype=np.float64),
+        np.array([package.width for package in packages], dtype=np.float64),
+        np.array([package.height for package in packages], dtype=np.float64),
+        np.array([package.weight for package in packages], dtype=np.float64),
+        np.array([package.is_urgent for package in packages], dtype=bool),
+        np.array([package.is_fragile for package in packages], dtype=bool),
+        np.where(known, rate_index, 0),
+        rates=rate_list,
+    )
+    return [float(total) if ok else None for total, ok in zip(totals, known)]
@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+from typing import Iterable
+from uuid import UUID
+
+import psycopg
+from sqlalchemy import make_url, select
+from sqlalchemy.orm import Session
+
+from models.package_rate import PackageRate
+from schemas.package_rate import PackageRateSchema
+
+# PackageRateRepository notifies on this channel in the transaction that changes
+# a rate, every process drops its cache once that transaction commits
+RATE_CHANNEL = "packagerate_changed"
+
+
+class RateCache:
+    """Read-through cache of every package rate in the process.
+
+    There are only a handful of rates so a miss loads all of them. Entries are
+    plain ``PackageRate`` models, not ORM objects, so any session can use them.
+    ``ttl`` bounds staleness when no listener is running, e.g. in scripts.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._rates: dict[UUID, PackageRate] | None = None
+        self._loaded_at = 0.0
+        # bumped on every invalidation, a load that started before it is dropped
+        self._generation = 0
+
+    def _fresh_rates(self) -> dict[UUID, PackageRate] | None:
+        with self._lock:
+            if self._rates is None or time.monotonic() - self._loaded_at > self.ttl:
+                return None
+            return self._rates
+
+    def _load(self, db: Session) -> dict[UUID, PackageRate]:
+        with self._lock:
+            generation = self._generation
+
+        rates = {
+            row.id: PackageRate.model_validate(row._asdict())
+            for row in db.execute(select(*PackageRateSchema.__table__.columns))
+        }
+
+        with self._lock:
+            if generation == self._generation:
+                self._rates = rates
+                self._loaded_at = time.monotonic()
+        return rates
+
+    def get_many(self, db: Session, ids: Iterable[UUID]) -> dict[UUID, PackageRate]:
+        ids = set(ids)
+        rates = self._fresh_rates()
+        if rates is None or not ids <= rates.keys():
+            rates = self._load(db)
+        return {id: rates[id] for id in ids if id in rates}
+
+    def get(self, db: Session, id: UUID) -> PackageRate | None:
+        return self.get_many(db, [id]).get(id)
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._rates = None
+
+
+class RateListener:
+    """Drops the cache whenever another process changes a rate, over
+    ``LISTEN packagerate_changed`` on a dedicated connection"""
+
+    def __init__(self, cache: RateCache, database_url: str):
+        self.cache = cache
+        # psycopg wants a plain postgresql:// url
+        self.conninfo = (
+            make_url(database_url)
+            .set(drivername="postgresql")
+            .render_as_string(hide_password=False)
+        )
+        self.listening = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._listen, name="rate-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _listen(self):
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(self.conninfo, autocommit=True) as connection:
+                    connection.execute(f"LISTEN {RATE_CHANNEL}")
+                    # changes made while we were not listening are unknown
+                    self.cache.invalidate()
+                    self.listening.set()
+                    while not self._stop.is_set():
+                        for _ in connection.notifies(timeout=1.0):
+                            self.cache.invalidate()
+            except Exception as e:
+                print(f"rate listener disconnected: {e}")
+                self.cache.invalidate()
+                self._stop.wait(5)
+            finally:
+                self.listening.clear()
+
+
+rate_cache = RateCache(ttl=float(os.getenv("RATE_CACHE_TTL", "300")))
@@ -0,0 +1,132 @@
+import functools
+import itertools
+import logging
+import threading
+import time
+
+from sqlalchemy import Engine, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+READ_ONLY = "read_only"
+HAS_WRITTEN = "has_written"
+REPLICA = "replica"
+
+
+class ReplicaSet:
+    """Round-robin over replica engines, skipping the ones that failed a health
+    check in the last ``check_interval`` seconds."""
+
+    def __init__(self, engines: list[Engine], check_interval: float = 5.0):
+        self.engines = engines
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._cycle = itertools.cycle(engines) if engines else None
+        self._checked_at: dict[Engine, float] = {}
+        self._healthy: dict[Engine, bool] = {}
+
+    def __bool__(self):
+        return bool(self.engines)
+
+    def is_healthy(self, engine: Engine) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            checked_at = self._checked_at.get(engine)
+            if checked_at is not None and now - checked_at < self.check_interval:
+                return self._healthy[engine]
+            # claim the check so concurrent callers keep using the last result
+            self._checked_at[engine] = now
+            self._healthy.setdefault(engine, True)
+
+        error = None
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+        except Exception as e:
+            error = e
+        healthy = error is None
+
+        with self._lock:
+            changed = self._healthy[engine] != healthy
+            self._healthy[engine] = healthy
+        # once per change, not on every failed check while it is down
+        if changed and healthy:
+            logger.warning("replica %s is healthy again", engine.url.host)
+        elif changed:
+            logger.warning("replica %s is unhealthy: %s", engine.url.host, error)
+        return healthy
+
+    def choose(self) -> Engine | None:
+        if not self.engines:
+            return None
+        for _ in range(len(self.engines)):
+            with self._lock:
+                engine = next(self._cycle)
+            if self.is_healthy(engine):
+                return engine
+        return None
+
+    def status(self) -> list[dict]:
+        with self._lock:
+            return [
+                {"host": engine.url.host, "healthy": self._healthy.get(engine, True)}
+                for engine in self.engines
+            ]
+
+
+class RoutingSession(Session):
+    """Sends statements issued inside a ``read_only`` repository method to a
+    replica. Once the session has run anything on the primary outside of one,
+    everything goes to the primary for the rest of the session so a request
+    always reads its own writes.
+
+    The replica chosen for the first read serves every later read of the
+    session, replicas lag by different amounts and e.g. a count and the page
+    it counts must not disagree.
+    """
+
+    def __init__(self, replicas: ReplicaSet | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self.replicas = replicas
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        primary = super().get_bind(mapper, clause=clause, **kwargs)
+
+        # outside read_only anything may write, a select with a data modifying
+        # CTE or a text() statement too, so it all counts as a write
+        if (
+            self._flushing
+            or (clause is not None and clause.is_dml)
+            or not self.info.get(READ_ONLY)
+        ):
+            self.info[HAS_WRITTEN] = True
+            return primary
+
+        if (
+            self.replicas
+            and self.info.get(READ_ONLY)
+            and not self.info.get(HAS_WRITTEN)
+        ):
+            replica = self.info.get(REPLICA)
+            if replica is None:
+                replica = self.info[REPLICA] = self.replicas.choose()
+            if replica is not None:
+                return replica
+        return primary
+
+
+def read_only(method):
+    """Marks a repository method as safe to run on a replica."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        info = self.db.info
+        previous = info.get(READ_ONLY, False)
+        info[READ_ONLY] = True
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            info[READ_ONLY] = previous
+
+    return wrapper
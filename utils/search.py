@@ -0,0 +1,43 @@
+import re
+import unicodedata
+
+# Vietnamese letters with diacritics and the plain letter each one folds to,
+# both cases since lower() in a C locale database leaves them alone
+_ACCENTED_LOWER = "àáạảãâầấậẩẫăằắặẳẵèéẹẻẽêềếệểễìíịỉĩòóọỏõôồốộổỗơờớợởỡùúụủũưừứựửữỳýỵỷỹđ"
+ACCENTED = _ACCENTED_LOWER + _ACCENTED_LOWER.upper()
+PLAIN = "".join(
+    "d" if letter in "đĐ" else unicodedata.normalize("NFD", letter)[0].lower()
+    for letter in ACCENTED
+)
+_FOLD = str.maketrans(ACCENTED, PLAIN)
+
+# what people type around phone numbers, "0901 234-567", "(+84) 90..."
+PHONE_QUERY = re.compile(r"[\d\s().+-]+")
+
+
+def prefix_tsquery(q: str) -> str | None:
+    """``to_tsquery`` text matching every word of ``q`` as a prefix, so "nguy"
+    finds "Nguyen". Only word characters get through, users can't write
+    tsquery syntax errors"""
+    words = re.findall(r"\w+", q.lower())
+    return " & ".join(f"{word}:*" for word in words) or None
+
+
+def phone_fragment(q: str, min_length: int = 3) -> str | None:
+    """The digits of ``q`` when it looks like (part of) a phone number. Trigram
+    indexes need at least 3 characters to help a LIKE"""
+    if not PHONE_QUERY.fullmatch(q):
+        return None
+    digits = re.sub(r"\D", "", q)
+    return digits if len(digits) >= min_length else None
+
+
+def fold_accents(text: str) -> str:
+    """Lower case without diacritics, Cần Thơ -> can tho"""
+    return unicodedata.normalize("NFC", text).lower().translate(_FOLD)
+
+
+def fold_accents_sql(expression: str) -> str:
+    """``fold_accents`` in SQL. translate and lower are immutable, so unlike
+    unaccent() it can back a generated column or an index"""
+    return f"translate(lower({expression}), '{ACCENTED}', '{PLAIN}')"